@@ -13,12 +13,17 @@ from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 from django.db.models.deletion import ProtectedError
 from django.db import transaction
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils.six import StringIO
 
 from widgy.models import Node, UnknownWidget, VersionTracker, Content, VersionCommit
 from widgy.exceptions import (
     ParentWasRejected, ChildWasRejected, MutualRejection, InvalidTreeMovement,
     InvalidOperation, ParentChildRejection)
 from widgy.views.versioning import daisydiff
+from widgy.signals import published_tree_changed
+from widgy.management.commands.notify_scheduled_commits import LAST_RUN_CACHE_KEY
 
 from ..widgy_config import widgy_site
 from ..models import (
@@ -855,6 +860,24 @@ class TestVersioning(RootNodeTestCase):
         self.assertEqual(tracker.get_published_node(request_factory.get('/')),
                          commit2.root_node)
 
+    def test_commits_ahead_of_published(self):
+        tracker, commit1 = make_commit(self.widgy_site, datetime.timedelta(days=-1))
+        self.assertEqual(list(tracker.get_commits_ahead_of_published()), [])
+
+        commit2 = tracker.commit(publish_at=timezone.now() + datetime.timedelta(days=1))
+        commit3 = tracker.commit(publish_at=timezone.now() + datetime.timedelta(days=2))
+        self.assertEqual(set(tracker.get_commits_ahead_of_published()),
+                         set([commit2, commit3]))
+        with self.assertNumQueries(2):
+            self.assertEqual(tracker.get_commit_summary(), {'future': 2})
+
+        tracker.commit(publish_at=timezone.now())
+        self.assertEqual(tracker.get_commit_summary(), {'future': 0})
+
+    def test_commits_ahead_of_published_nothing_published(self):
+        tracker, commit1 = make_commit(self.widgy_site, datetime.timedelta(days=1))
+        self.assertEqual(list(tracker.get_commits_ahead_of_published()), [commit1])
+
     def test_created_at(self):
         tracker, commit = make_commit(self.widgy_site)
         created_at = commit.created_at
@@ -934,6 +957,35 @@ class TestVersioning(RootNodeTestCase):
         self.assertEqual(new_commit.parent, None)
 
 
+    def test_published_tree_changed(self):
+        sent = []
+
+        def receiver(sender, tracker_ids, **kwargs):
+            sent.extend(tracker_ids)
+        published_tree_changed.connect(receiver)
+        self.addCleanup(published_tree_changed.disconnect, receiver)
+
+        tracker, commit1 = make_commit(self.widgy_site)
+        self.assertEqual(sent, [tracker.pk])
+
+        # a scheduled commit isn't published yet
+        del sent[:]
+        commit2 = tracker.commit(publish_at=timezone.now() + datetime.timedelta(days=1))
+        self.assertEqual(sent, [])
+
+        tracker.revert_to(commit1)
+        self.assertEqual(sent, [tracker.pk])
+
+        # until notify_scheduled_commits finds it
+        del sent[:]
+        VersionCommit.objects.filter(pk=commit2.pk).update(
+            created_at=timezone.now() - datetime.timedelta(days=1),
+            publish_at=timezone.now() - datetime.timedelta(minutes=1))
+        cache.delete(LAST_RUN_CACHE_KEY)
+        call_command('notify_scheduled_commits', stdout=StringIO())
+        self.assertEqual(sent, [tracker.pk])
+
+
 class VersioningViewsTest(SwitchUserTestCase, RootNodeTestCase):
     widgy_site = widgy_site
 
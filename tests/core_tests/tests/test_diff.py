@@ -0,0 +1,138 @@
+from __future__ import absolute_import
+
+from django.utils import translation
+
+from widgy.diff import (
+    diff_trees, render_tree_diff, get_rendered_diff, get_diff_cache,
+    get_diff_cache_key, precompute_diff, INSERTED, DELETED, MOVED, MODIFIED,
+)
+from widgy.models import Node, VersionTracker
+
+from ..widgy_config import widgy_site
+from ..models import RawTextWidget
+from .base import RootNodeTestCase, make_a_nice_tree
+
+
+class TestTreeDiff(RootNodeTestCase):
+    widgy_site = widgy_site
+
+    def setUp(self):
+        super(TestTreeDiff, self).setUp()
+        make_a_nice_tree(self.root_node)
+        self.tracker = VersionTracker.objects.create(working_copy=self.root_node)
+        self.commit = self.tracker.commit()
+
+    def get_diff(self):
+        working_copy = Node.objects.get(pk=self.tracker.working_copy.pk)
+        return diff_trees(self.commit.root_node, working_copy)
+
+    def get_widget(self, text):
+        return RawTextWidget.objects.get(
+            text=text,
+            _nodes__path__startswith=self.root_node.path,
+        )
+
+    def test_no_changes(self):
+        tree_diff = self.get_diff()
+        self.assertFalse(tree_diff.has_changes)
+        self.assertFalse(any(w.kinds for w in tree_diff))
+        self.assertIn('There are no changes', render_tree_diff(tree_diff))
+
+    def test_modified(self):
+        widget = self.get_widget('left_1')
+        widget.text = 'changed'
+        widget.save()
+
+        tree_diff = self.get_diff()
+        self.assertEqual(len(tree_diff.modified), 1)
+        modified = tree_diff.modified[0]
+        self.assertEqual(modified.kinds, [MODIFIED])
+        self.assertEqual([(c.name, c.before, c.after) for c in modified.field_changes],
+                         [('text', 'left_1', 'changed')])
+        self.assertEqual(tree_diff.inserted + tree_diff.deleted + tree_diff.moved, [])
+
+        html = render_tree_diff(tree_diff)
+        self.assertIn('changed', html)
+        # unchanged siblings aren't rendered
+        self.assertNotIn('right_1', html)
+
+    def test_inserted_and_deleted(self):
+        self.get_widget('right_2').delete()
+        left, right = self.root_node.content.get_children()
+        right.add_child(self.widgy_site, RawTextWidget, text='new')
+
+        tree_diff = self.get_diff()
+        self.assertEqual([w.after.content.text for w in tree_diff.inserted], ['new'])
+        self.assertEqual([w.before.content.text for w in tree_diff.deleted], ['right_2'])
+        self.assertEqual(tree_diff.inserted[0].kinds, [INSERTED])
+        self.assertEqual(tree_diff.deleted[0].kinds, [DELETED])
+        self.assertEqual(tree_diff.modified, [])
+
+    def test_moved(self):
+        left, right = self.root_node.content.get_children()
+        self.get_widget('right_1').reposition(self.widgy_site, parent=left)
+
+        tree_diff = self.get_diff()
+        self.assertEqual([w.after.content.text for w in tree_diff.moved], ['right_1'])
+        self.assertEqual(tree_diff.moved[0].kinds, [MOVED])
+        self.assertEqual(tree_diff.inserted + tree_diff.deleted + tree_diff.modified, [])
+
+    def test_reordered(self):
+        self.get_widget('right_2').reposition(
+            self.widgy_site, right=self.get_widget('right_1'))
+
+        tree_diff = self.get_diff()
+        self.assertEqual(len(tree_diff.moved), 1)
+        self.assertEqual(tree_diff.inserted + tree_diff.deleted + tree_diff.modified, [])
+
+    def test_constant_queries(self):
+        before = Node.objects.get(pk=self.commit.root_node.pk)
+        after = Node.objects.get(pk=self.tracker.working_copy.pk)
+        # one query per tree, and one per content type
+        with self.assertNumQueries(5):
+            diff_trees(before, after)
+
+
+class TestDiffCache(RootNodeTestCase):
+    widgy_site = widgy_site
+
+    def setUp(self):
+        super(TestDiffCache, self).setUp()
+        get_diff_cache().clear()
+        self.tracker = VersionTracker.objects.create(working_copy=self.root_node)
+        self.commit1 = self.tracker.commit()
+        left, right = self.root_node.content.get_children()
+        left.add_child(self.widgy_site, RawTextWidget, text='new')
+        self.commit2 = self.tracker.commit()
+
+    def test_frozen_diffs_are_cached(self):
+        before, after = self.commit1.root_node, self.commit2.root_node
+        html = get_rendered_diff(before, after)
+        self.assertIn('new', html)
+        self.assertEqual(get_diff_cache().get(get_diff_cache_key(before, after)), html)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_rendered_diff(before, after), html)
+
+    def test_diffs_are_cached_per_language(self):
+        before, after = self.commit1.root_node, self.commit2.root_node
+        with translation.override('en'):
+            get_diff_cache().set(get_diff_cache_key(before, after), 'english')
+            self.assertEqual(get_rendered_diff(before, after), 'english')
+        with translation.override('fr'):
+            self.assertIsNone(get_diff_cache().get(get_diff_cache_key(before, after)))
+            self.assertIn('new', get_rendered_diff(before, after))
+
+        precompute_diff(before.pk, after.pk, 'de')
+        with translation.override('de'):
+            self.assertIn('new', get_diff_cache().get(get_diff_cache_key(before, after)))
+
+    def test_working_copy_diffs_arent_cached(self):
+        before, after = self.commit2.root_node, self.tracker.working_copy
+        get_rendered_diff(before, after)
+        self.assertIsNone(get_diff_cache().get(get_diff_cache_key(before, after)))
+
+    def test_precompute_diff(self):
+        before, after = self.commit1.root_node, self.commit2.root_node
+        precompute_diff(before.pk, after.pk)
+        self.assertIn('new', get_diff_cache().get(get_diff_cache_key(before, after)))
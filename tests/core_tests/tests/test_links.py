@@ -1,18 +1,32 @@
 from __future__ import absolute_import
 import copy
+import importlib
+import json
+import warnings
 
 from django import forms
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
 from django.test import TestCase
+from django.utils.six import StringIO
+
+import mock
 
 from widgy.models.links import (
     link_registry, get_link_field_from_model, LinkFormMixin, LinkFormField,
-    get_composite_key, convert_linkable_to_choice, LinkRegistry, LinkField
+    get_composite_key, convert_linkable_to_choice, LinkRegistry, LinkField,
+    LinkWidget, ReverseLink, is_indexed,
 )
+from widgy.views import LinkSearchView
 
 from ..models import (
     LinkableThing, ThingWithLink, AnotherLinkableThing, LinkableThing3,
     Bucket, VersionPageThrough, ChildThingWithLink
 )
+from ..widgy_config import widgy_site
+from .base import HttpTestCase
 
 
 class TestLinkField(TestCase):
@@ -62,6 +76,63 @@ class TestLinkRelations(TestCase):
 
         self.assertEqual(list(link_registry.get_links(linkable2)), [thing2])
 
+    def test_links_follow_changes(self):
+        linkable = LinkableThing.objects.create()
+        linkable2 = AnotherLinkableThing.objects.create()
+        thing = ThingWithLink.objects.create(link=linkable)
+        child = ChildThingWithLink.objects.create(link=linkable)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(sorted(i.pk for i in link_registry.get_links(linkable)),
+                             sorted([thing.pk, child.pk]))
+
+        thing.link = linkable2
+        thing.save()
+        self.assertEqual([i.pk for i in link_registry.get_links(linkable)], [child.pk])
+        self.assertEqual(list(link_registry.get_links(linkable2)), [thing])
+
+        child.delete()
+        self.assertEqual(list(link_registry.get_links(linkable)), [])
+
+    def test_rebuild_link_index(self):
+        linkable = LinkableThing.objects.create()
+        thing = ThingWithLink.objects.create(link=AnotherLinkableThing.objects.create())
+        # update doesn't send post_save
+        ThingWithLink.objects.filter(pk=thing.pk).update(
+            linkable_content_type=ContentType.objects.get_for_model(linkable),
+            linkable_object_id=linkable.pk,
+        )
+        self.assertEqual(list(link_registry.get_links(linkable)), [])
+
+        call_command('rebuild_link_index', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(link_registry.get_links(linkable)), [thing])
+
+    def test_migration_fills_the_link_index(self):
+        linkable = LinkableThing.objects.create()
+        thing = ThingWithLink.objects.create(link=linkable)
+        ReverseLink.objects.all().delete()
+
+        migration = importlib.import_module('widgy.migrations.0002_reverselink')
+        loader = MigrationLoader(connection)
+        schema_editor = mock.Mock(connection=connection)
+
+        # the historical ThingWithLink doesn't exist yet
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            migration.fill_reverse_links(loader.project_state(('widgy', '0002_reverselink')).apps,
+                                         schema_editor)
+        self.assertFalse(ReverseLink.objects.exists())
+        self.assertIn('core_tests.ThingWithLink', str(w[0].message))
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            migration.fill_reverse_links(loader.project_state().apps, schema_editor)
+        self.assertEqual(w, [])
+        self.assertEqual(list(link_registry.get_links(linkable)), [thing])
+
+    def test_integer_links_are_indexed(self):
+        self.assertTrue(is_indexed(get_link_field_from_model(ThingWithLink, 'link')))
+
     def test_get_all_possible_linkables(self):
         l1 = LinkableThing.objects.create()
         l2 = LinkableThing.objects.create()
@@ -118,3 +189,88 @@ class TestLinkForm(TestCase):
                 convert_linkable_to_choice(page4),
             ]),
         ])
+
+    def test_search_widget(self):
+        page = LinkableThing.objects.create(name='a page')
+        LinkableThing.objects.create(name='another page')
+        form = LinkForm(instance=ThingWithLink(link=page), site=widgy_site)
+
+        field = form.fields['link']
+        self.assertIsInstance(field.widget, LinkWidget)
+        self.assertEqual(field.choices, [])
+        html = str(form['link'])
+        self.assertIn(get_composite_key(page), html)
+        self.assertIn(convert_linkable_to_choice(page)[1], html)
+        self.assertNotIn('another page', html)
+        self.assertIn(widgy_site.reverse(widgy_site.link_search_view, kwargs={
+            'app_label': 'core_tests',
+            'object_name': 'ThingWithLink',
+            'field_name': 'link',
+        }), html)
+
+    def test_invalid_choice(self):
+        content_type = ContentType.objects.get_for_model(LinkableThing)
+        form = LinkForm({
+            'link': '%s-0' % content_type.pk,
+        })
+        self.assertFalse(form.is_valid())
+
+
+class TestLinkSearch(HttpTestCase):
+    def setUp(self):
+        super(TestLinkSearch, self).setUp()
+        self.url = widgy_site.reverse(widgy_site.link_search_view, kwargs={
+            'app_label': 'core_tests',
+            'object_name': 'ThingWithLink',
+            'field_name': 'link',
+        })
+
+    def result(self, linkable, group):
+        value, label = convert_linkable_to_choice(linkable)
+        return {'value': value, 'label': label, 'group': group}
+
+    def test_search(self):
+        apple = LinkableThing.objects.create(name='Apple')
+        LinkableThing.objects.create(name='Banana')
+        # it doesn't have any field to search
+        AnotherLinkableThing.objects.create()
+
+        resp = self.get(self.url, {'q': 'app'})
+        self.assertEqual(json.loads(resp.content.decode('utf-8')), {
+            'results': [self.result(apple, 'Linkable things')],
+            'more': False,
+        })
+
+    def test_pages(self):
+        another = AnotherLinkableThing.objects.create()
+        b = LinkableThing.objects.create(name='b')
+        a = LinkableThing.objects.create(name='a')
+        last = LinkableThing3.objects.create()
+
+        def get_page(page):
+            return json.loads(self.get(self.url, {'page': page}).content.decode('utf-8'))
+
+        with mock.patch.object(LinkSearchView, 'paginate_by', 2):
+            self.assertEqual(get_page(1), {
+                'results': [
+                    self.result(another, 'Another linkable things'),
+                    self.result(a, 'Linkable things'),
+                ],
+                'more': True,
+            })
+            self.assertEqual(get_page(2), {
+                'results': [
+                    self.result(b, 'Linkable things'),
+                    self.result(last, 'ZZZZZ should be last'),
+                ],
+                'more': False,
+            })
+            self.assertEqual(get_page(3), {'results': [], 'more': False})
+
+    def test_unknown_field(self):
+        resp = self.client.get(widgy_site.reverse(widgy_site.link_search_view, kwargs={
+            'app_label': 'core_tests',
+            'object_name': 'ThingWithLink',
+            'field_name': 'missing',
+        }))
+        self.assertEqual(resp.status_code, 404)
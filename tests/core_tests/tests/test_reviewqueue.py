@@ -4,7 +4,9 @@ import imp
 import json
 
 import django
+from django.core.management import call_command
 from django.utils import timezone
+from django.utils.six import StringIO
 from django.utils.functional import cached_property
 from django.contrib.auth.models import Permission, User
 from django.test.client import RequestFactory
@@ -13,6 +15,8 @@ from widgy.contrib.review_queue.site import ReviewedWidgySite
 from widgy.contrib.review_queue.models import (
     ReviewedVersionTracker, ReviewedVersionCommit,
 )
+from widgy.models import VersionTracker
+from widgy.signals import published_tree_changed
 
 from .base import (
     RootNodeTestCase, refetch, SwitchUserTestCase,
@@ -70,6 +74,41 @@ class ReviewQueueTest(RootNodeTestCase):
         self.assertEqual(tracker.get_published_node(request_factory.get('/')),
                          commit2.root_node)
 
+    def test_commit_summary(self):
+        tracker, commit1 = make_commit(self.widgy_site, vt_class=ReviewedVersionTracker)
+        user = User.objects.create()
+
+        self.assertEqual(tracker.get_commit_summary(), {'future': 0, 'unapproved': 1})
+
+        commit1.approve(user)
+        tracker.commit(publish_at=timezone.now() + datetime.timedelta(days=1))
+        tracker.commit(publish_at=timezone.now())
+        self.assertEqual(tracker.get_commit_summary(), {'future': 1, 'unapproved': 2})
+
+        tracker.commit(publish_at=timezone.now()).approve(user)
+        self.assertEqual(tracker.get_commit_summary(), {'future': 0, 'unapproved': 0})
+
+    def test_published_tree_changed(self):
+        sent = []
+
+        def receiver(sender, tracker_ids, **kwargs):
+            sent.extend(tracker_ids)
+        published_tree_changed.connect(receiver)
+        self.addCleanup(published_tree_changed.disconnect, receiver)
+        user = User.objects.create()
+
+        tracker, commit1 = make_commit(self.widgy_site, vt_class=ReviewedVersionTracker)
+        self.assertEqual(sent, [])
+
+        commit1.approve(user)
+        self.assertEqual(sent, [tracker.pk])
+
+        del sent[:]
+        commit2 = tracker.commit(publish_at=timezone.now())
+        self.assertEqual(sent, [])
+        ReviewedVersionCommit.objects.filter(pk=commit2.pk).approve(user)
+        self.assertEqual(sent, [tracker.pk])
+
     def test_foreign_key_to_proxy_works(self):
         """
         If ReviewedVersionTracker is implemented as a proxy, ensure a
@@ -93,6 +132,29 @@ class ReviewQueueTest(RootNodeTestCase):
         self.assertNotEqual(new_tracker.head.reviewedversioncommit.pk,
                             tracker.head.reviewedversioncommit.pk)
 
+    def test_populate_review_queue(self):
+        user = User.objects.create()
+        tracker = make_tracker(self.widgy_site, vt_class=VersionTracker)
+        commits = [tracker.commit(user=user) for _ in range(3)]
+        already_reviewed = ReviewedVersionCommit(versioncommit_ptr=commits[0])
+        already_reviewed.__dict__.update(commits[0].__dict__)
+        already_reviewed.save()
+
+        out = StringIO()
+        call_command('populate_review_queue', batch_size=1, stdout=out)
+        self.assertIn('Populated 2 of 2 commits', out.getvalue())
+
+        self.assertFalse(ReviewedVersionCommit.objects.get(pk=commits[0].pk).is_approved)
+        for commit in commits[1:]:
+            reviewed = ReviewedVersionCommit.objects.get(pk=commit.pk)
+            self.assertEqual(reviewed.approved_by, user)
+            self.assertEqual(reviewed.approved_at, commit.created_at)
+
+        # running it again doesn't do anything
+        call_command('populate_review_queue', stdout=out)
+        self.assertIn('Nothing to do', out.getvalue())
+        self.assertEqual(ReviewedVersionCommit.objects.count(), 3)
+
 
 class ReviewQueueViewsTest(SwitchUserTestCase, RootNodeTestCase):
     widgy_site = ReviewedWidgySite()
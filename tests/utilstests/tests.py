@@ -1,9 +1,14 @@
 from six.moves import zip_longest
 
-from django.test import TestCase
-from django.db import models
+import unittest
 
-from widgy.utils import html_to_plaintext, unset_pks, model_has_field
+from django.test import TestCase, TransactionTestCase
+from django.db import models, transaction
+
+from widgy.utils import (
+    html_to_plaintext, soup_to_plaintext, unset_pks, model_has_field, LRUCache,
+    collect_on_commit,
+)
 
 from .models import Child
 
@@ -109,6 +114,43 @@ class HtmlToText(TestCase):
             'content'
         )
 
+    def test_main_role(self):
+        self.assertContainsSameWords(
+            html_to_plaintext(
+                '<div>navigation</div>'
+                '<div role="main" title="main"><div>main</div> content</div>'
+                '<div>footer</div>'
+            ),
+            'main content'
+        )
+
+        self.assertContainsSameWords(
+            html_to_plaintext('<div role="main"><div>nested <div>divs</div></div> content</div>after'),
+            'nested divs content'
+        )
+
+    def test_head(self):
+        self.assertContainsSameWords(
+            html_to_plaintext('<html><head><title>title</title></head><body>content</body></html>'),
+            'content'
+        )
+
+        self.assertContainsSameWords(
+            html_to_plaintext('<head><title>title</title><body>content'),
+            'content'
+        )
+
+    def test_entities(self):
+        self.assertContainsSameWords(
+            html_to_plaintext('<p title="&quot;title&quot;">fish &amp; chips &#233;</p>'),
+            u'"title" fish & chips \xe9'
+        )
+
+    def test_same_as_soup(self):
+        from widgy.management.commands.benchmark_html_to_plaintext import get_sample_page
+        page = get_sample_page(3)
+        self.assertEqual(html_to_plaintext(page).split(), soup_to_plaintext(page).split())
+
 
 class TestUnsetPks(TestCase):
     def test_unset_pks(self):
@@ -118,6 +160,48 @@ class TestUnsetPks(TestCase):
         self.assertIsNone(obj.base_ptr_id)
 
 
+class TestLRUCache(TestCase):
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        # b was the least recently used
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+
+@unittest.skipUnless(hasattr(transaction, 'on_commit'), "on_commit was added in Django 1.9")
+class TestCollectOnCommit(TransactionTestCase):
+    def test_collect_on_commit(self):
+        calls = []
+        collect_on_commit('key', [1], calls.append)
+        self.assertEqual(calls, [set([1])])
+
+        with transaction.atomic():
+            collect_on_commit('key', [1, 2], calls.append)
+            collect_on_commit('key', [2, 3], calls.append)
+            collect_on_commit('other', [4], calls.append)
+            self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[1:], [set([1, 2, 3]), set([4])])
+
+    def test_rollback(self):
+        calls = []
+        try:
+            with transaction.atomic():
+                collect_on_commit('key', [1], calls.append)
+                raise ValueError
+        except ValueError:
+            pass
+
+        with transaction.atomic():
+            collect_on_commit('key', [2], calls.append)
+        self.assertEqual(calls, [set([2])])
+
+
 class FieldExistsModel(models.Model):
     field_a = models.IntegerField()
 
@@ -3,8 +3,12 @@ try:
     from django.contrib.admin.utils import unquote
 except ImportError:  # < Django 1.8
     from django.contrib.admin.util import unquote
+import datetime
+from collections import OrderedDict
+
+from django.core.paginator import Paginator, InvalidPage
 from django.core.urlresolvers import reverse
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from django.utils.translation import ugettext_lazy as _
 from django.conf.urls import url
@@ -12,12 +16,31 @@ from django.template.defaultfilters import slugify
 from django.http import Http404
 from django.utils.html import escape
 from django.utils.encoding import force_text
+from django.utils import timezone
+
+from .forms import SubmissionFilterForm
+from .models import (
+    Form, BaseChoiceField, FormDailyCount, FormChoiceCount, local_date,
+)
+
+
+class SubmissionPaginator(Paginator):
+    """
+    A Paginator that is given its count, to avoid a COUNT(*) query.
+    """
+    def __init__(self, object_list, per_page, count, **kwargs):
+        self.known_count = count
+        super(SubmissionPaginator, self).__init__(object_list, per_page, **kwargs)
 
-from .models import Form
+    @property
+    def count(self):
+        return self.known_count
 
 
 class FormAdmin(admin.ModelAdmin):
     list_display = ('name', 'submission_count',)
+    submissions_per_page = 100
+    analytics_days = 30
 
     def has_add_permission(self, *args, **kwargs):
         return False
@@ -32,9 +55,21 @@ class FormAdmin(admin.ModelAdmin):
             self.model._meta.model_name,
         )
 
+    @property
+    def analytics_url_name(self):
+        return '{0}_{1}_analytics'.format(
+            self.model._meta.app_label,
+            self.model._meta.model_name,
+        )
+
     def get_urls(self, *args, **kwargs):
         urls = super(FormAdmin, self).get_urls(*args, **kwargs)
-        return urls + [
+        return [
+            url(r'^(.+)/analytics/$',
+                self.admin_site.admin_view(self.analytics_view),
+                name=self.analytics_url_name,
+                ),
+        ] + urls + [
             url(r'^(.+).csv$',
                 self.admin_site.admin_view(self.download_view),
                 name=self.download_url_name,
@@ -51,7 +86,13 @@ class FormAdmin(admin.ModelAdmin):
 
 
         headers = obj.submissions.get_formfield_labels()
-        rows = obj.submissions.as_ordered_dictionaries(headers.keys())
+        page, filter_form = self.get_submissions_page(request, obj)
+        rows = [
+            OrderedDict((ident, values.get(ident, '')) for ident in headers)
+            for values in (submission.as_dict() for submission in page.object_list)
+        ]
+        filter_query = request.GET.copy()
+        filter_query.pop('page', None)
         return render(request, 'admin/form_builder/form/change_form.html', {
             'title': _('View %s submissions') % force_text(opts.verbose_name),
             'object_id': object_id,
@@ -62,21 +103,78 @@ class FormAdmin(admin.ModelAdmin):
             'opts': opts,
             'headers': headers,
             'rows': rows,
+            'page': page,
+            'filter_form': filter_form,
+            'filter_query': filter_query.urlencode(),
             'csv_file_name': self.csv_file_name(obj),
-            'download_url': reverse('admin:{0}'.format(self.download_url_name), args=[object_id])
+            'download_url': reverse('admin:{0}'.format(self.download_url_name), args=[object_id]),
+            'analytics_url': reverse('admin:{0}'.format(self.analytics_url_name), args=[object_id]),
+        })
+
+    def analytics_view(self, request, object_id):
+        """
+        Submissions per day and the counts of each choice of the choice
+        fields, from the rollup tables.
+        """
+        obj = self.get_object(request, unquote(object_id))
+        opts = self.model._meta
+        if obj is None:
+            raise Http404(_('%(name)s object with primary key %(key)r does not exist.') % {
+                'name': force_text(opts.verbose_name), 'key': escape(object_id)})
+
+        end = local_date(timezone.now())
+        start = end - datetime.timedelta(days=self.analytics_days - 1)
+        daily_counts = dict(FormDailyCount.objects.for_form(obj.ident, start, end))
+        days = [
+            (day, daily_counts.get(day, 0))
+            for day in (start + datetime.timedelta(days=i) for i in range(self.analytics_days))
+        ]
+
+        choice_counts = FormChoiceCount.objects.for_form(obj.ident)
+        fields = []
+        for field in obj.get_fields().values():
+            if isinstance(field, BaseChoiceField):
+                counts = OrderedDict((value, 0) for value, label in field.get_choices() if value)
+                counts.update(choice_counts.get(force_text(field.ident), {}))
+                fields.append((field, list(counts.items())))
+
+        return render(request, 'admin/form_builder/form/analytics.html', {
+            'title': _('%s analytics') % obj,
+            'object_id': object_id,
+            'original': obj,
+            'app_label': opts.app_label,
+            'opts': opts,
+            'days': days,
+            'fields': fields,
         })
 
+    def get_submissions_page(self, request, obj):
+        """
+        The page of submissions to show, filtered by a SubmissionFilterForm.
+        Without filters the count comes from the form's submission count.
+        """
+        filter_form = SubmissionFilterForm(request.GET)
+        submissions = filter_form.filter(obj.submissions).order_by('-created_at', '-pk')
+        if filter_form.has_filters():
+            paginator = Paginator(submissions, self.submissions_per_page)
+        else:
+            paginator = SubmissionPaginator(submissions, self.submissions_per_page,
+                                            count=obj.submission_count)
+        try:
+            page = paginator.page(request.GET.get('page', 1))
+        except InvalidPage:
+            page = paginator.page(1)
+        return page, filter_form
+
     def csv_file_name(self, obj):
         # slugify not only for readability, but for header injection as well.
         return '%s-submissions.csv' % slugify(obj.name)
 
     def download_view(self, request, object_id, *args, **kwargs):
         obj = self.get_object(request, unquote(object_id))
-        resp = HttpResponse(content_type='text/csv; charset=utf-8')
+        resp = StreamingHttpResponse(obj.submissions.iter_csv(archived=obj.archived_submissions),
+                                     content_type='text/csv; charset=utf-8')
         resp['Content-Disposition'] = 'attachment; filename="%s"' % self.csv_file_name(obj)
-
-        obj.submissions.to_csv(resp)
-
         return resp
 
     def submission_count(self, obj):
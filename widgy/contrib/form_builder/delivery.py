@@ -0,0 +1,253 @@
+"""
+Delivery of form data to other sites, for RepostHandlers.
+
+Deliveries reuse pooled HTTP connections, run on a bounded number of threads,
+time out, and stop being attempted for a while when their target URL keeps
+failing (circuit breaking). The outcome of each delivery is recorded as a
+RepostDelivery.
+"""
+from __future__ import unicode_literals
+
+import logging
+import socket
+import threading
+import time
+
+import six
+from six.moves import http_client, queue
+from six.moves.urllib.parse import urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    pass
+
+
+class Delivery(object):
+    """
+    A POST of `data`, a urlencoded bytestring, to `url`. `handler` and
+    `submission` are recorded with the outcome.
+    """
+
+    def __init__(self, url, data, handler=None, submission=None):
+        self.url = url
+        self.data = data
+        self.handler = handler
+        self.submission = submission
+        self.status_code = None
+        self.error = ''
+        self.skipped = False
+
+    def __repr__(self):
+        return '<Delivery %s %s>' % (self.url, self.status_code or self.error)
+
+    @property
+    def succeeded(self):
+        return self.status_code is not None and 200 <= self.status_code < 400
+
+
+class CircuitBreaker(object):
+    """
+    Counts the consecutive failures of each key. After `failure_threshold` of
+    them, the circuit opens and `allow` refuses the key for `reset_timeout`
+    seconds. Then one attempt is let through, which closes the circuit again
+    if it succeeds.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        with self._lock:
+            opened_at = self._opened_at.get(key)
+            if opened_at is None:
+                return True
+            if time.time() - opened_at >= self.reset_timeout:
+                # half-open, let this one through and wait for its outcome
+                self._opened_at[key] = time.time()
+                return True
+            return False
+
+    def record_success(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+            self._opened_at.pop(key, None)
+
+    def record_failure(self, key):
+        with self._lock:
+            self._failures[key] = self._failures.get(key, 0) + 1
+            if self._failures[key] >= self.failure_threshold:
+                self._opened_at[key] = time.time()
+
+
+class ConnectionPool(object):
+    """
+    Keeps idle HTTP connections per host, to be reused by later requests.
+    """
+
+    def __init__(self, timeout, max_idle=10):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def get(self, scheme, netloc, reuse=True):
+        """
+        Returns a connection and whether it was reused.
+        """
+        if reuse:
+            with self._lock:
+                idle = self._idle.get((scheme, netloc))
+                if idle:
+                    return idle.pop(), True
+        connection_class = http_client.HTTPSConnection if scheme == 'https' else http_client.HTTPConnection
+        return connection_class(netloc, timeout=self.timeout), False
+
+    def put(self, scheme, netloc, connection):
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+
+class DeliveryEngine(object):
+    def __init__(self, max_workers=4, timeout=10, failure_threshold=5, reset_timeout=60):
+        self.max_workers = max_workers
+        self.pool = ConnectionPool(timeout)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+    def deliver(self, deliveries):
+        """
+        Sends all the deliveries, at most `max_workers` at a time, and records
+        their outcome. Raises DeliveryError if any of them failed.
+        """
+        deliveries = list(deliveries)
+        if len(deliveries) == 1 or self.max_workers == 1:
+            for delivery in deliveries:
+                self.send(delivery)
+        else:
+            self._send_in_threads(deliveries)
+
+        self.record(deliveries)
+
+        failed = [d for d in deliveries if not d.succeeded]
+        if failed:
+            raise DeliveryError('Delivery failed: %s' % ', '.join(repr(d) for d in failed))
+
+    def _send_in_threads(self, deliveries):
+        pending = queue.Queue()
+        for delivery in deliveries:
+            pending.put(delivery)
+
+        def work():
+            while True:
+                try:
+                    delivery = pending.get_nowait()
+                except queue.Empty:
+                    return
+                self.send(delivery)
+
+        threads = [threading.Thread(target=work)
+                   for i in range(min(self.max_workers, len(deliveries)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def send(self, delivery):
+        """
+        POSTs one delivery, filling in its status_code or error. Doesn't
+        touch the database, so it's safe to call from any thread.
+        """
+        key = delivery.url
+        if not self.breaker.allow(key):
+            delivery.skipped = True
+            delivery.error = 'Too many failures, not trying %s for now' % key
+            return
+
+        url = urlsplit(delivery.url)
+        path = url.path or '/'
+        if url.query:
+            path += '?' + url.query
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+        reuse = True
+        while True:
+            connection, reused = self.pool.get(url.scheme, url.netloc, reuse)
+            try:
+                connection.request('POST', path, delivery.data, headers)
+            except (http_client.HTTPException, socket.error) as e:
+                connection.close()
+                if reused:
+                    # the server probably closed the idle connection, try a
+                    # new one
+                    reuse = False
+                    continue
+                delivery.error = '%s: %s' % (type(e).__name__, e)
+                break
+            try:
+                response = connection.getresponse()
+                response.read()
+            except (http_client.HTTPException, socket.error) as e:
+                # the server may have received it, a POST isn't retried
+                connection.close()
+                delivery.error = '%s: %s' % (type(e).__name__, e)
+            else:
+                delivery.status_code = response.status
+                if response.will_close:
+                    connection.close()
+                else:
+                    self.pool.put(url.scheme, url.netloc, connection)
+            break
+
+        if delivery.succeeded:
+            self.breaker.record_success(key)
+        else:
+            if not delivery.error:
+                delivery.error = 'HTTP %s' % delivery.status_code
+            self.breaker.record_failure(key)
+            logger.warning('Delivery to %s failed: %s', key, delivery.error)
+
+    def record(self, deliveries):
+        from .models import RepostDelivery
+
+        RepostDelivery.objects.bulk_create(RepostDelivery(
+            submission=delivery.submission,
+            handler_node=delivery.handler and delivery.handler.node,
+            url=delivery.url,
+            status=(RepostDelivery.DELIVERED if delivery.succeeded else
+                    RepostDelivery.SKIPPED if delivery.skipped else
+                    RepostDelivery.FAILED),
+            status_code=delivery.status_code,
+            error=six.text_type(delivery.error),
+        ) for delivery in deliveries)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_delivery_engine():
+    """
+    The process-wide DeliveryEngine, so that connections and circuit
+    breakers are shared between requests.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DeliveryEngine(
+                max_workers=getattr(settings, 'FORM_BUILDER_REPOST_MAX_WORKERS', 4),
+                timeout=getattr(settings, 'FORM_BUILDER_REPOST_TIMEOUT', 10),
+                failure_threshold=getattr(settings, 'FORM_BUILDER_REPOST_FAILURE_THRESHOLD', 5),
+                reset_timeout=getattr(settings, 'FORM_BUILDER_REPOST_RESET_TIMEOUT', 60),
+            )
+        return _engine
@@ -0,0 +1,117 @@
+"""
+Executors run the success handlers of a submitted Form. The executor is set
+by the FORM_BUILDER_HANDLER_EXECUTOR setting, the default InlineExecutor runs
+them in the request.
+"""
+from __future__ import unicode_literals
+
+import json
+import os.path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from widgy.utils import fancy_import
+
+
+class InlineExecutor(object):
+    """
+    Runs the handlers in the request, in order.
+    """
+    def execute(self, handler, request, form):
+        handler.execute(request, form)
+
+    def finish(self):
+        """
+        Called when all the handlers of a form were given to execute.
+        """
+        pass
+
+
+class DatabaseExecutor(InlineExecutor):
+    """
+    Queues the deferrable handlers as SuccessHandlerJobs, to be run by the
+    run_form_handler_jobs command, so the request doesn't wait for them.
+    """
+    def execute(self, handler, request, form):
+        from .models import SuccessHandlerJob
+
+        if handler.deferrable:
+            SuccessHandlerJob.objects.enqueue(handler, form)
+        else:
+            super(DatabaseExecutor, self).execute(handler, request, form)
+
+
+def get_handler_executor():
+    return fancy_import(getattr(
+        settings,
+        'FORM_BUILDER_HANDLER_EXECUTOR',
+        'widgy.contrib.form_builder.executors.InlineExecutor',
+    ))()
+
+
+class DeferredForm(object):
+    """
+    Stands in for the form that was submitted when a handler runs in a job.
+    It only has cleaned_data, and the submission if it was saved.
+    """
+    widgy_fields = None
+
+    def __init__(self, cleaned_data, submission=None):
+        self.cleaned_data = cleaned_data
+        self.widgy_submission = submission
+
+
+def serialize_form(form):
+    """
+    The cleaned_data of `form` as JSON. Uploaded files are saved to the
+    storage, and only their name is kept.
+    """
+    from .models import FileUpload
+
+    fields = getattr(form, 'widgy_fields', None) or {}
+    data = {}
+    files = {}
+    for name, value in form.cleaned_data.items():
+        if isinstance(value, File):
+            field = fields.get(name)
+            if isinstance(field, FileUpload):
+                files[name] = field.save_file(value)
+            else:
+                if not hasattr(value, 'widgy_storage_name'):
+                    value.widgy_storage_name = default_storage.save(
+                        os.path.join('form-uploads', default_storage.get_valid_name(os.path.basename(value.name))),
+                        value,
+                    )
+                files[name] = value.widgy_storage_name
+        else:
+            data[name] = value
+    submission = getattr(form, 'widgy_submission', None)
+    return json.dumps({
+        'data': data,
+        'files': files,
+        'submission': submission and submission.pk,
+    }, cls=DjangoJSONEncoder)
+
+
+def deserialize_form(payload, fields=None):
+    """
+    The DeferredForm of a payload from serialize_form. The uploaded files are
+    opened from the storage of their FileUpload in `fields`, a dict of the
+    form's FormFields by formfield name.
+    """
+    from .models import FormSubmission
+
+    fields = fields or {}
+    payload = json.loads(payload)
+    cleaned_data = payload['data']
+    for name, storage_name in payload['files'].items():
+        storage = getattr(fields.get(name), 'storage', default_storage)
+        value = File(storage.open(storage_name), name=os.path.basename(storage_name))
+        # it's already saved
+        value.widgy_storage_name = storage_name
+        cleaned_data[name] = value
+    submission = FormSubmission.objects.filter(pk=payload.get('submission')).first()
+    return DeferredForm(cleaned_data, submission)
@@ -1,4 +1,9 @@
+import datetime
+
 from django import forms
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
 
 import phonenumbers
 
@@ -39,3 +44,34 @@ class PhoneNumberField(forms.CharField):
             return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.NATIONAL)
         else:
             return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.INTERNATIONAL)
+
+
+def start_of_day(date):
+    ret = datetime.datetime.combine(date, datetime.time.min)
+    if settings.USE_TZ:
+        ret = timezone.make_aware(ret, timezone.get_current_timezone())
+    return ret
+
+
+class SubmissionFilterForm(forms.Form):
+    """
+    Filters the submissions shown in the form admin.
+    """
+    created_after = forms.DateField(label=_('from'), required=False)
+    created_before = forms.DateField(label=_('to'), required=False)
+    contains = forms.CharField(label=_('value contains'), required=False)
+
+    def filter(self, submissions):
+        if not self.is_valid():
+            return submissions
+        data = self.cleaned_data
+        submissions = submissions.created_between(
+            start=data['created_after'] and start_of_day(data['created_after']),
+            end=data['created_before'] and start_of_day(data['created_before'] + datetime.timedelta(days=1)),
+        )
+        if data['contains']:
+            submissions = submissions.value_contains(data['contains'])
+        return submissions
+
+    def has_filters(self):
+        return self.is_valid() and any(self.cleaned_data.values())
@@ -0,0 +1,100 @@
+import datetime
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    """
+    Moves the FormSubmissions older than --days into the ArchivedSubmission
+    table, with their values, to keep the submission tables small. Archived
+    submissions are still included in the CSV download of their form.
+
+    Submissions are archived in batches in order of their primary key, each
+    batch in its own transaction, so the command can be interrupted and run
+    again.
+    """
+    help = 'Archives old form submissions'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--days',
+                    type='int',
+                    dest='days',
+                    default=None,
+                    help="Archive the submissions older than this many days "
+                         "(FORM_BUILDER_ARCHIVE_AFTER_DAYS, 365 by default)"),
+        make_option('--batch-size',
+                    type='int',
+                    dest='batch_size',
+                    default=1000,
+                    help="The number of submissions to archive per batch"),
+    )
+
+    def handle(self, *args, **options):
+        from widgy.contrib.form_builder.models import FormSubmission
+
+        days = options['days']
+        if days is None:
+            days = getattr(settings, 'FORM_BUILDER_ARCHIVE_AFTER_DAYS', 365)
+        cutoff = timezone.now() - datetime.timedelta(days=days)
+        batch_size = options['batch_size']
+        pending = FormSubmission.objects.filter(created_at__lt=cutoff).order_by('pk')
+
+        submissions = values = 0
+        last_pk = None
+        while True:
+            batch = pending
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                values += self.archive(pks)
+            submissions += len(pks)
+            last_pk = pks[-1]
+            self.stdout.write('Archived %d submissions (up to id %d)\n' % (
+                submissions, last_pk))
+
+        self.stdout.write(
+            'Archived %d submissions older than %s, reclaimed %d rows '
+            '(%d submissions, %d values).\n' % (
+                submissions, cutoff.date(), submissions + values, submissions, values))
+
+    def archive(self, pks):
+        """
+        Moves the submissions with primary keys `pks` to the archive. Returns
+        the number of FormValues that were deleted.
+        """
+        from widgy.contrib.form_builder.models import (
+            FormSubmission, FormValue, ArchivedSubmission,
+        )
+
+        values = FormValue.objects.filter(submission__in=pks).order_by('pk')
+        by_submission = dict((pk, []) for pk in pks)
+        for value in values.values_list('submission', 'field_ident', 'field_node', 'field_name', 'value'):
+            by_submission[value[0]].append(value[1:])
+
+        submissions = FormSubmission.objects.filter(pk__in=pks)
+        ArchivedSubmission.objects.bulk_create(
+            ArchivedSubmission(
+                id=pk,
+                created_at=created_at,
+                form_node_id=form_node_id,
+                form_ident=form_ident,
+                data=data if data is not None else FormSubmission.dump_data(by_submission[pk]),
+                fields_key=fields_key if data is not None else FormSubmission.get_fields_key(
+                    v[0] for v in by_submission[pk]),
+            )
+            for pk, created_at, form_node_id, form_ident, data, fields_key in submissions.values_list(
+                'pk', 'created_at', 'form_node', 'form_ident', 'data', 'fields_key')
+        )
+
+        deleted_values = sum(len(v) for v in by_submission.values())
+        values.delete()
+        # through the ORM, so that the submission counts are updated
+        submissions.delete()
+        return deleted_values
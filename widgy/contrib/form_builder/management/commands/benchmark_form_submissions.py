@@ -0,0 +1,81 @@
+from __future__ import division
+
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Measures the throughput of FormSubmission.objects.submit for a form. The
+    submissions are made the same way SaveDataHandler makes them, inside a
+    transaction that is rolled back afterwards, so no data is left behind.
+    """
+    args = '<form_pk>'
+    help = 'Measures how many submissions per second a form can save'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--count',
+                    type='int',
+                    dest='count',
+                    default=1000,
+                    help="The number of submissions to make"),
+    )
+
+    def handle(self, *args, **options):
+        from widgy.contrib.form_builder.models import Form, FormSubmission
+
+        if len(args) != 1:
+            raise CommandError('Usage: benchmark_form_submissions <form_pk>')
+        try:
+            form = Form.objects.get(pk=args[0])
+        except (Form.DoesNotExist, ValueError):
+            raise CommandError('Form %s does not exist' % args[0])
+
+        form_class = form.build_form_class()
+        fields = form_class.widgy_fields
+        data = dict((name, self.get_value(field)) for name, field in fields.items())
+        count = options['count']
+
+        try:
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries:
+                    FormSubmission.objects.submit(form=form, data=data, fields=fields)
+
+                start = time.time()
+                for _ in range(count):
+                    FormSubmission.objects.submit(form=form, data=data, fields=fields)
+                elapsed = time.time() - start
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write('%d submissions of %d fields in %.2fs\n' % (count, len(fields), elapsed))
+        self.stdout.write('%.1f submissions/s, %d queries per submission\n' % (
+            count / elapsed, len(queries)))
+
+    def get_value(self, field):
+        """
+        A value for `field` like the ones in a form's cleaned_data.
+        """
+        from widgy.contrib.form_builder.models import (
+            BaseChoiceField, MultipleChoiceField, FileUpload,
+        )
+
+        if isinstance(field, FileUpload):
+            # don't write files to the storage
+            return None
+        elif isinstance(field, BaseChoiceField):
+            choices = [value for value, label in field.get_choices() if value]
+            if isinstance(field, MultipleChoiceField):
+                return choices[:1]
+            return choices[0] if choices else ''
+        else:
+            return 'benchmark'
@@ -0,0 +1,61 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    """
+    Converts FormSubmissions stored as FormValues to compact submissions, that
+    keep their values in the data column. Submissions are converted in batches
+    in order of their primary key, each batch in its own transaction, so the
+    command can be interrupted and run again.
+    """
+    help = 'Moves the FormValues of form submissions into the submission rows'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size',
+                    type='int',
+                    dest='batch_size',
+                    default=1000,
+                    help="The number of submissions to convert per batch"),
+    )
+
+    def handle(self, *args, **options):
+        from widgy.contrib.form_builder.models import FormSubmission
+
+        batch_size = options['batch_size']
+        pending = FormSubmission.objects.filter(data=None).order_by('pk')
+        total = pending.count()
+
+        done = 0
+        last_pk = None
+        while True:
+            batch = pending
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                self.convert(pks)
+            done += len(pks)
+            last_pk = pks[-1]
+            self.stdout.write('Converted %d of %d submissions (up to id %d)\n' % (
+                done, total, last_pk))
+
+    def convert(self, pks):
+        from widgy.contrib.form_builder.models import FormSubmission, FormValue
+
+        values = FormValue.objects.filter(submission__in=pks).order_by('pk')
+        by_submission = dict((pk, []) for pk in pks)
+        for value in values.values_list('submission', 'field_ident', 'field_node', 'field_name', 'value'):
+            by_submission[value[0]].append(value[1:])
+
+        for pk, submission_values in by_submission.items():
+            FormSubmission.objects.filter(pk=pk).update(
+                data=FormSubmission.dump_data(submission_values),
+                fields_key=FormSubmission.get_fields_key(v[0] for v in submission_values),
+                search_text=FormSubmission.get_search_text(v[3] for v in submission_values),
+            )
+        values.delete()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the submission counts and rollups of all forms from their submissions'
+
+    def handle(self, *args, **options):
+        from widgy.contrib.form_builder.models import (
+            FormSubmissionCount, FormDailyCount, FormChoiceCount,
+        )
+
+        FormSubmissionCount.objects.recount()
+        self.stdout.write('Recounted the submissions of %d forms.\n' % FormSubmissionCount.objects.count())
+        FormDailyCount.objects.recount()
+        FormChoiceCount.objects.recount()
+        self.stdout.write('Rebuilt the daily and choice counts.\n')
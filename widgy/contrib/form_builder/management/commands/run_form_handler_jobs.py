@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Runs the success handlers queued by
+    widgy.contrib.form_builder.executors.DatabaseExecutor. Failed jobs are
+    retried with an exponential backoff, up to --max-attempts times. Jobs
+    still running after --lease seconds are claimed again, in case their
+    worker died.
+    """
+    help = 'Runs queued form success handlers'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--concurrency',
+                    type='int',
+                    dest='concurrency',
+                    default=1,
+                    help="The number of jobs to run at the same time"),
+        make_option('--once',
+                    action='store_true',
+                    dest='once',
+                    default=False,
+                    help="Exit when there are no jobs ready instead of waiting for more"),
+        make_option('--max-attempts',
+                    type='int',
+                    dest='max_attempts',
+                    default=5,
+                    help="How many times to try a job before giving up on it"),
+        make_option('--backoff',
+                    type='int',
+                    dest='backoff',
+                    default=30,
+                    help="Seconds to wait before the first retry, doubled for each one after"),
+        make_option('--poll-interval',
+                    type='float',
+                    dest='poll_interval',
+                    default=5,
+                    help="Seconds to wait when there are no jobs ready"),
+        make_option('--lease',
+                    type='int',
+                    dest='lease',
+                    default=None,
+                    help="Seconds after which a running job is assumed dead and run again"),
+    )
+
+    def handle(self, *args, **options):
+        self.options = options
+        if options['concurrency'] == 1:
+            self.work()
+            return
+
+        threads = [threading.Thread(target=self.work_in_thread)
+                   for i in range(options['concurrency'])]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            # join with a timeout so KeyboardInterrupt gets through
+            while thread.is_alive():
+                thread.join(1)
+
+    def work_in_thread(self):
+        try:
+            self.work()
+        finally:
+            connection.close()
+
+    def work(self):
+        from widgy.contrib.form_builder.models import SuccessHandlerJob
+
+        while True:
+            job = SuccessHandlerJob.objects.claim_next(lease=self.options['lease'])
+            if job is None:
+                if self.options['once']:
+                    return
+                time.sleep(self.options['poll_interval'])
+                continue
+
+            pk = job.pk
+            if job.run_and_record(max_attempts=self.options['max_attempts'],
+                                  backoff=self.options['backoff']):
+                logger.info('Job %s succeeded', pk)
+            else:
+                logger.error('Job %s failed (attempt %d):\n%s', pk, job.attempts, job.last_error)
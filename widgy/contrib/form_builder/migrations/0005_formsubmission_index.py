@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0004_formsubmission_data'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='formsubmission',
+            index_together=set([('form_ident', 'created_at')]),
+        ),
+    ]
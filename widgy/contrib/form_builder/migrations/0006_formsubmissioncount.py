@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def count_submissions(apps, schema_editor):
+    FormSubmission = apps.get_model('form_builder', 'FormSubmission')
+    FormSubmissionCount = apps.get_model('form_builder', 'FormSubmissionCount')
+
+    counts = FormSubmission.objects.order_by().values('form_ident').annotate(
+        count=models.Count('pk'),
+    ).values_list('form_ident', 'count')
+    FormSubmissionCount.objects.bulk_create(
+        FormSubmissionCount(form_ident=form_ident, count=count)
+        for form_ident, count in counts
+    )
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0005_formsubmission_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormSubmissionCount',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('form_ident', models.CharField(unique=True, max_length=36)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'form submission count',
+                'verbose_name_plural': 'form submission counts',
+            },
+        ),
+        migrations.RunPython(count_submissions, noop),
+    ]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('widgy', '0001_initial'),
+        ('form_builder', '0006_formsubmissioncount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuccessHandlerJob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('payload', models.TextField()),
+                ('status', models.CharField(default='pending', max_length=20, choices=[('pending', 'pending'), ('running', 'running'), ('failed', 'failed')])),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, db_index=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('handler_node', models.ForeignKey(related_name='+', to='widgy.Node')),
+            ],
+            options={
+                'verbose_name': 'success handler job',
+                'verbose_name_plural': 'success handler jobs',
+            },
+        ),
+    ]
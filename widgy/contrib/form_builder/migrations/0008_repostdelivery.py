@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('widgy', '0001_initial'),
+        ('form_builder', '0007_successhandlerjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepostDelivery',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('url', models.CharField(max_length=2048)),
+                ('status', models.CharField(max_length=20, choices=[('delivered', 'delivered'), ('failed', 'failed'), ('skipped', 'skipped')])),
+                ('status_code', models.PositiveIntegerField(null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('handler_node', models.ForeignKey(related_name='+', on_delete=django.db.models.deletion.SET_NULL, to='widgy.Node', null=True)),
+                ('submission', models.ForeignKey(related_name='deliveries', on_delete=django.db.models.deletion.SET_NULL, to='form_builder.FormSubmission', null=True)),
+            ],
+            options={
+                'verbose_name': 'repost delivery',
+                'verbose_name_plural': 'repost deliveries',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0008_repostdelivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileupload',
+            name='max_size',
+            field=models.PositiveIntegerField(help_text='Bigger files are refused as soon as the upload reaches this size. Leave empty for no limit.', null=True, verbose_name='maximum size (KB)', blank=True),
+        ),
+    ]
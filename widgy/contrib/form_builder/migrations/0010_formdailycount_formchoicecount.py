@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0009_fileupload_max_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormChoiceCount',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('form_ident', models.CharField(max_length=36)),
+                ('field_ident', models.CharField(max_length=36)),
+                ('value', models.CharField(max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'form choice count',
+                'verbose_name_plural': 'form choice counts',
+            },
+        ),
+        migrations.CreateModel(
+            name='FormDailyCount',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('form_ident', models.CharField(max_length=36)),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'form daily count',
+                'verbose_name_plural': 'form daily counts',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='formchoicecount',
+            unique_together=set([('form_ident', 'field_ident', 'value')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='formdailycount',
+            unique_together=set([('form_ident', 'date')]),
+        ),
+        migrations.AlterField(
+            model_name='formvalue',
+            name='field_ident',
+            field=models.CharField(max_length=36, db_index=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('widgy', '0001_initial'),
+        ('form_builder', '0010_formdailycount_formchoicecount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSubmission',
+            fields=[
+                ('id', models.IntegerField(serialize=False, primary_key=True)),
+                ('created_at', models.DateTimeField()),
+                ('form_ident', models.CharField(max_length=36, db_index=True)),
+                ('data', models.TextField()),
+                ('form_node', models.ForeignKey(related_name='archived_form_submissions', on_delete=django.db.models.deletion.PROTECT, to='widgy.Node')),
+            ],
+            options={
+                'verbose_name': 'archived submission',
+                'verbose_name_plural': 'archived submissions',
+            },
+        ),
+    ]
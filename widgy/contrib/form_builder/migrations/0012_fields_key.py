@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import defaultdict, OrderedDict
+import hashlib
+import json
+
+from django.db import models, migrations
+
+
+def get_fields_key(data):
+    # the same as FormSubmission.get_fields_key
+    idents = json.loads(data, object_pairs_hook=OrderedDict).keys()
+    return hashlib.sha1(' '.join(idents).encode('utf-8')).hexdigest()
+
+
+def fill_fields_keys(Model, batch_size=1000):
+    pending = Model.objects.exclude(data=None).order_by('pk')
+    last_pk = None
+    while True:
+        batch = pending
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        rows = list(batch.values_list('pk', 'data')[:batch_size])
+        if not rows:
+            break
+        pks_by_key = defaultdict(list)
+        for pk, data in rows:
+            pks_by_key[get_fields_key(data)].append(pk)
+        for fields_key, pks in pks_by_key.items():
+            Model.objects.filter(pk__in=pks).update(fields_key=fields_key)
+        last_pk = rows[-1][0]
+
+
+def fill_all_fields_keys(apps, schema_editor):
+    fill_fields_keys(apps.get_model('form_builder', 'FormSubmission'))
+    fill_fields_keys(apps.get_model('form_builder', 'ArchivedSubmission'))
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0011_archivedsubmission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formsubmission',
+            name='fields_key',
+            field=models.CharField(max_length=40, null=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='archivedsubmission',
+            name='fields_key',
+            field=models.CharField(max_length=40, null=True),
+        ),
+        migrations.RunPython(fill_all_fields_keys, noop),
+    ]
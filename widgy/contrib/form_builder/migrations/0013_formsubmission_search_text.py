@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import json
+
+from django.db import models, migrations
+
+
+def get_search_text(data):
+    # the same as FormSubmission.get_search_text
+    fields = json.loads(data, object_pairs_hook=OrderedDict)
+    return '\n'.join('%s' % field['value'] for field in fields.values())
+
+
+def fill_search_text(apps, schema_editor):
+    FormSubmission = apps.get_model('form_builder', 'FormSubmission')
+    pending = FormSubmission.objects.exclude(data=None).order_by('pk')
+    last_pk = None
+    while True:
+        batch = pending
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        rows = list(batch.values_list('pk', 'data')[:1000])
+        if not rows:
+            break
+        for pk, data in rows:
+            FormSubmission.objects.filter(pk=pk).update(search_text=get_search_text(data))
+        last_pk = rows[-1][0]
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0012_fields_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formsubmission',
+            name='search_text',
+            field=models.TextField(null=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_text, noop),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form_builder', '0013_formsubmission_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='successhandlerjob',
+            name='claimed_at',
+            field=models.DateTimeField(null=True, editable=False),
+        ),
+    ]
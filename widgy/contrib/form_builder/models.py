@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 
 import csv
+import json
 import urllib
 import base64
 import hashlib
@@ -8,17 +9,27 @@ import os.path
 import six
 import uuid
 import copy
-from collections import OrderedDict
-
-from django.db import models, transaction
+import datetime
+import traceback
+import itertools
+import binascii
+import mimetypes
+from email.mime.base import MIMEBase
+from collections import OrderedDict, Counter, defaultdict
+from operator import or_
+from six.moves import reduce
+
+from django.db import models, transaction, connections, IntegrityError
 from django import forms
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _, ugettext
 from django.shortcuts import redirect
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.utils.functional import cached_property
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.encoding import python_2_unicode_compatible, force_bytes, force_text
 from django.template.defaultfilters import truncatechars
 from django.core.files import File
@@ -30,10 +41,11 @@ import html2text
 from widgy.models import Content, Node
 from widgy.signals import pre_delete_widget
 from widgy.models.mixins import StrictDefaultChildrenMixin, DefaultChildrenMixin, TabbedContainer, StrDisplayNameMixin
-from widgy.utils import update_context, build_url, QuerySet, unset_pks
+from widgy.utils import update_context, build_url, QuerySet, unset_pks, LRUCache, html_to_plaintext
 from widgy.contrib.page_builder.models import Bucket, Html
 from widgy.contrib.page_builder.forms import MiniCKEditorField, CKEditorField
 from .forms import PhoneNumberField
+from .uploads import MaxUploadSizeValidator
 import widgy
 
 
@@ -45,12 +57,30 @@ class FormElement(Content):
 
     @property
     def parent_form(self):
+        # elements found by walking a frozen form know it already
+        index = getattr(self, '_form_index', None)
+        if index is not None:
+            return index.form
+
         for i in self.get_ancestors():
             if isinstance(i, Form):
                 return i
 
         assert False, "This FormElement, doesn't belong to a Form?!?!?"
 
+    @property
+    def form_index(self):
+        """
+        The FormIndex of the form this element belongs to. It's shared by
+        all the elements of a compiled frozen form, so looking up fields
+        doesn't walk the tree again. Editable trees can change, so they are
+        walked every time.
+        """
+        index = getattr(self, '_form_index', None)
+        if index is None:
+            index = self.parent_form.get_index()
+        return index
+
     @classmethod
     def valid_child_of(cls, parent, obj=None):
         for p in list(parent.get_ancestors()) + [parent]:
@@ -61,6 +91,9 @@ class FormElement(Content):
 
 class FormSuccessHandler(FormElement):
     draggable = True
+    # Whether the handler can run after the request, in a SuccessHandlerJob.
+    # It will get None for the request and a form with only cleaned_data.
+    deferrable = False
 
     class Meta:
         abstract = True
@@ -86,9 +119,11 @@ class SaveDataHandler(FormSuccessHandler):
         verbose_name_plural = _('save data handlers')
 
     def execute(self, request, form):
-        FormSubmission.objects.submit(
+        # other handlers can refer to the submission, see RepostHandler
+        form.widgy_submission = FormSubmission.objects.submit(
             form=self.parent_form,
-            data=form.cleaned_data
+            data=form.cleaned_data,
+            fields=getattr(form, 'widgy_fields', None),
         )
 
 
@@ -117,13 +152,25 @@ class RepostHandler(BaseMappingHandler):
 
     The subclass must have a url_to_post field.
     """
+    deferrable = True
 
     class Meta:
         abstract = True
 
-    def execute(self, request, form):
+    def get_deliveries(self, request, form):
+        """
+        The Deliveries to send for a submission. They are sent together, so
+        subclasses that post to several URLs get them sent concurrently.
+        """
+        from .delivery import Delivery
         query_string = six.moves.urllib.parse.urlencode(self.get_mapping(request, form)).encode('ascii')
-        six.moves.urllib.request.urlopen(self.url_to_post, query_string)
+        return [Delivery(self.url_to_post, query_string,
+                         handler=self,
+                         submission=getattr(form, 'widgy_submission', None))]
+
+    def execute(self, request, form):
+        from .delivery import get_delivery_engine
+        get_delivery_engine().deliver(self.get_deliveries(request, form))
 
 
 class MappingValue(FormElement):
@@ -170,31 +217,25 @@ class FieldMappingValue(StrDisplayNameMixin, MappingValue):
 
     def __str__(self):
         try:
-            label = self.fields_mapping[self.field_ident].label
+            label = self.fields_mapping[force_text(self.field_ident)].label
         except KeyError:
             return u''
         else:
             return _('{0} to {1}').format(label, self.name)
 
     def get_fields(self):
-        return [f for f in self.parent_form.depth_first_order()
-                if isinstance(f, FormField)]
+        return list(self.form_index.fields.values())
 
     def update_mapping(self, mapping, form):
         try:
-            form_field_name = self.fields_mapping[self.field_ident].get_formfield_name()
+            form_field_name = self.fields_mapping[force_text(self.field_ident)].get_formfield_name()
             mapping[self.name] = form.cleaned_data[form_field_name]
         except KeyError:
             pass
 
     @cached_property
     def fields_mapping(self):
-        # Dict comprehension syntax for Python <2.7
-        return dict(
-            (field.ident, field)
-            for field in self.parent_form.depth_first_order()
-            if isinstance(field, FormField)
-        )
+        return self.form_index.by_ident
 
 
 @widgy.register
@@ -234,6 +275,7 @@ class EmailSuccessHandlerBase(StrDisplayNameMixin, FormSuccessHandler):
     )
 
     form = EmailSuccessHandlerBaseForm
+    deferrable = True
 
     class Meta:
         abstract = True
@@ -243,8 +285,11 @@ class EmailSuccessHandlerBase(StrDisplayNameMixin, FormSuccessHandler):
 
     def format_message(self, request, form):
         data = []
+        fields = getattr(form, 'widgy_fields', None)
+        if fields is None:
+            fields = self.parent_form.get_fields()
         # keep the data in the same order as the form
-        for name, field in self.parent_form.get_fields().items():
+        for name, field in fields.items():
             serialized_value = field.serialize_value(
                 form.cleaned_data[name]
             )
@@ -265,13 +310,57 @@ class EmailSuccessHandlerBase(StrDisplayNameMixin, FormSuccessHandler):
         msg.attach_alternative(message_text, 'text/html')
 
         if self.include_form_data:
-            for value in form.cleaned_data.values():
-                if isinstance(value, File):
-                    value.file.seek(0)  # The file has already been read once to save to disk.
-                    msg.attach(value.name, value.read(), getattr(value, 'content_type', None))
+            for attachment in self.get_attachments(form):
+                msg.attach(attachment)
 
         msg.send()
 
+    attachment_chunk_size = 64 * 1024
+
+    def get_attachments(self, form):
+        """
+        The uploaded files to attach to the message, as MIME parts. Files
+        bigger than FORM_BUILDER_MAX_ATTACHMENT_SIZE bytes aren't attached,
+        the form data in the message links to them instead.
+        """
+        max_size = getattr(settings, 'FORM_BUILDER_MAX_ATTACHMENT_SIZE', 10 * 1024 * 1024)
+        for value in form.cleaned_data.values():
+            if isinstance(value, File) and (max_size is None or value.size <= max_size):
+                yield self.make_attachment(value)
+
+    def make_attachment(self, value):
+        """
+        A MIME part for the File `value`. The file is read from its storage
+        and base64 encoded a chunk at a time, so only the encoded content is
+        held in memory, not the whole file as well.
+        """
+        mimetype = (getattr(value, 'content_type', None) or
+                    mimetypes.guess_type(value.name)[0] or
+                    'application/octet-stream')
+        part = MIMEBase(*mimetype.split('/', 1))
+
+        lines = []
+        rest = b''
+        value.seek(0)  # The file has already been read once to save to disk.
+        for chunk in value.chunks(self.attachment_chunk_size):
+            chunk = rest + force_bytes(chunk)
+            # 57 bytes are encoded to a line of 76 characters
+            end = len(chunk) - len(chunk) % 57
+            lines.extend(binascii.b2a_base64(chunk[i:i + 57]) for i in range(0, end, 57))
+            rest = chunk[end:]
+        if rest:
+            lines.append(binascii.b2a_base64(rest))
+        part.set_payload(force_text(b''.join(lines)))
+        part['Content-Transfer-Encoding'] = 'base64'
+
+        filename = os.path.basename(value.name)
+        try:
+            filename.encode('ascii')
+        except UnicodeEncodeError:
+            filename = ('utf-8', '', filename)
+        part.add_header('Content-Disposition', 'attachment', filename=filename)
+        return part
+
     def get_to_emails(self, form):
         raise NotImplemented
 
@@ -324,18 +413,16 @@ class EmailUserHandler(EmailSuccessHandlerBase):
         verbose_name_plural = _('user success emails')
 
     def get_to_emails(self, form):
-        try:
-            to = [f for f in self.parent_form.depth_first_order()
-                  if hasattr(f, 'ident') and f.ident == self.to_ident][0]
-        except IndexError:
+        to = self.form_index.by_ident.get(force_text(self.to_ident))
+        if to is None:
             # no matching fields found, or to_ident is blank
             return []
         else:
             return [form.cleaned_data[to.get_formfield_name()]]
 
     def get_email_fields(self):
-        return [i for i in self.parent_form.depth_first_order()
-                if isinstance(i, FormInput) and i.type == 'email']
+        return [i for i in self.form_index.of_type(FormInput)
+                if i.type == 'email']
 
     def post_create(self, site):
         email_fields = self.get_email_fields()
@@ -353,7 +440,7 @@ class SubmitButton(StrDisplayNameMixin, FormElement):
 
     @property
     def deletable(self):
-        return len([i for i in self.parent_form.depth_first_order() if isinstance(i, SubmitButton)]) > 1
+        return len(self.form_index.of_type(SubmitButton)) > 1
 
     class Meta:
         verbose_name = _('submit button')
@@ -362,6 +449,9 @@ class SubmitButton(StrDisplayNameMixin, FormElement):
     def __str__(self):
         return self.text
 
+    def get_search_text(self):
+        return ''
+
 
 def untitled_form():
     untitled = ugettext('Untitled form')
@@ -479,7 +569,7 @@ class Form(TabbedContainer, StrDisplayNameMixin, StrictDefaultChildrenMixin, Con
         def annotate_submission_count(self):
             return self.extra(select={
                 'submission_count':
-                'SELECT COUNT(*) FROM form_builder_formsubmission'
+                'SELECT COALESCE(MAX(count), 0) FROM form_builder_formsubmissioncount'
                 ' WHERE form_ident = form_builder_form.ident'
             })
 
@@ -499,21 +589,43 @@ class Form(TabbedContainer, StrDisplayNameMixin, StrictDefaultChildrenMixin, Con
                 return False
         return super(Form, cls).valid_child_of(parent, obj)
 
-    def build_form_class(self):
+    def get_search_text(self):
+        return ''
+
+    def get_search_children(self):
+        # the meta isn't shown on the page
+        return [self.children['fields']]
+
+    def compile(self):
         """
-        Returns a django.forms.Form class based on my child widgets.
+        The CompiledForm for this form. Frozen forms can't change, so theirs
+        is built once and kept in a process-local cache, and each call gets a
+        copy of it.
         """
-        fields = OrderedDict(
-            (child.get_formfield_name(), child.get_formfield())
-            for child in self.depth_first_order() if isinstance(child, BaseFormField)
-        )
+        if not self.node.is_frozen:
+            return CompiledForm(self)
 
-        mixins = []
-        for child in self.depth_first_order():
-            if hasattr(child, 'get_form_mixins'):
-                mixins.extend(child.get_form_mixins())
+        key = (self.node.pk, force_text(self.ident))
+        compiled = compiled_forms.get(key)
+        if compiled is None:
+            compiled = CompiledForm(self, frozen=True)
+            compiled_forms.set(key, compiled)
+        return compiled.copy()
 
-        return type(str('WidgyForm'), tuple(mixins + [forms.BaseForm]), {'base_fields': fields})
+    def get_index(self):
+        """
+        The FormIndex of my tree. A frozen form shares the one of its
+        compiled form.
+        """
+        if self.node.is_frozen:
+            return self.compile().index
+        return FormIndex(self)
+
+    def build_form_class(self):
+        """
+        Returns a django.forms.Form class based on my child widgets.
+        """
+        return self.compile().form_class
 
     @property
     def context_var(self):
@@ -569,11 +681,14 @@ class Form(TabbedContainer, StrDisplayNameMixin, StrictDefaultChildrenMixin, Con
             request.GET['from'],
             success=self.success_key,
         ))
-        for child in self.depth_first_order():
-            if isinstance(child, FormReponseHandler):
-                resp = child.execute(request, form)
-            elif isinstance(child, FormSuccessHandler):
-                child.execute(request, form)
+        from .executors import get_handler_executor
+        executor = get_handler_executor()
+        for handler in self.compile().handlers:
+            if isinstance(handler, FormReponseHandler):
+                resp = handler.execute(request, form)
+            else:
+                executor.execute(handler, request, form)
+        executor.finish()
         return resp
 
     def make_root(self):
@@ -592,11 +707,7 @@ class Form(TabbedContainer, StrDisplayNameMixin, StrictDefaultChildrenMixin, Con
         """
         A dictionary of formfield name -> FormField widget
         """
-        ret = OrderedDict()
-        for child in self.depth_first_order():
-            if isinstance(child, FormField):
-                ret[child.get_formfield_name()] = child
-        return ret
+        return OrderedDict(self.compile().fields)
 
     @property
     def submissions(self):
@@ -607,13 +718,20 @@ class Form(TabbedContainer, StrDisplayNameMixin, StrictDefaultChildrenMixin, Con
             form_ident=self.ident
         ).prefetch_related('values')
 
+    @property
+    def archived_submissions(self):
+        """
+        The submissions of this logical form that have been archived.
+        """
+        return ArchivedSubmission.objects.filter(form_ident=self.ident)
+
     @property
     def submission_count(self):
         # see also objects.annotate_submission_count to prefetch this value
         if hasattr(self, '_submission_count'):
             return self._submission_count
 
-        return self.submissions.count()
+        return FormSubmissionCount.objects.get_count(self.ident)
 
     @submission_count.setter
     def submission_count(self, value):
@@ -634,6 +752,118 @@ class Form(TabbedContainer, StrDisplayNameMixin, StrictDefaultChildrenMixin, Con
         return new
 
 
+class FormIndex(object):
+    """
+    The widgets in the tree of a Form, from one walk of it: its FormFields by
+    formfield name (`fields`) and by ident (`by_ident`), and all the widgets
+    by type (`of_type`). If the tree is `frozen`, every widget in it gets the
+    index, see FormElement.form_index. Editable trees can change after the
+    walk, so their widgets don't keep it.
+    """
+
+    def __init__(self, form, elements=None, frozen=False):
+        self.form = form
+        if elements is None:
+            elements = form.depth_first_order()
+        self.elements = elements
+        self.frozen = frozen
+        self.fields = OrderedDict()
+        self.by_ident = {}
+        self._by_type = {}
+        for element in self.elements:
+            if frozen:
+                element._form_index = self
+            if isinstance(element, FormField):
+                self.fields[element.get_formfield_name()] = element
+                self.by_ident[force_text(element.ident)] = element
+
+    def of_type(self, cls):
+        """
+        The widgets that are instances of `cls`, in depth first order.
+        """
+        if cls not in self._by_type:
+            self._by_type[cls] = [i for i in self.elements if isinstance(i, cls)]
+        return self._by_type[cls]
+
+
+class CompiledForm(object):
+    """
+    Everything that is built by walking the tree of a Form: its FormIndex,
+    its django.forms.Form class, its FormField widgets by formfield name, its
+    success handlers in the order they run, and the size limits of its file
+    uploads by formfield name.
+
+    The compiled forms of frozen forms are cached in `compiled_forms` and
+    shared by all the requests and threads of the process, so their widgets
+    must not be handed out: Form.compile returns a copy() of them.
+    """
+
+    def __init__(self, form, frozen=False):
+        self.index = FormIndex(form, frozen=frozen)
+        formfields = OrderedDict()
+        self.upload_limits = {}
+        mixins = []
+        for child in self.index.elements:
+            if isinstance(child, BaseFormField):
+                name = child.get_formfield_name()
+                formfields[name] = child.get_formfield()
+                if getattr(child, 'upload_size_limit', None):
+                    self.upload_limits[name] = child.upload_size_limit
+            if hasattr(child, 'get_form_mixins'):
+                mixins.extend(child.get_form_mixins())
+
+        # Django copies the base_fields for each form instance, so the class
+        # can be shared.
+        self.base_form_class = type(str('WidgyForm'), tuple(mixins + [forms.BaseForm]), {
+            'base_fields': formfields,
+            'widgy_upload_limits': self.upload_limits,
+        })
+        self._bind()
+
+    def _bind(self):
+        self.fields = self.index.fields
+        self.handlers = self.index.of_type(FormSuccessHandler)
+        self.form_class = type(str('WidgyForm'), (self.base_form_class,), {
+            # so that submitting doesn't have to walk the tree again
+            'widgy_fields': self.fields,
+        })
+
+    def copy(self):
+        """
+        A CompiledForm with its own shallow copies of the widgets and of
+        their nodes, and an index of them, so that what they cache or are
+        given while handling a request stays in that request. The form class
+        and upload limits are shared.
+        """
+        new = copy.copy(self)
+        copies = []
+        for element in self.index.elements:
+            element_copy = copy.copy(element)
+            node = copy.copy(element.node)
+            # the tree is rebuilt from the copies below
+            node.__dict__.pop('_children', None)
+            node.__dict__.pop('_parent', None)
+            node.content = element_copy
+            element_copy.node = node
+            copies.append(element_copy)
+
+        # Link the copied nodes to each other, so that walking the tree of a
+        # copy never reaches the cached widgets. depth_first_order starts
+        # with the form.
+        nodes = [element.node for element in copies]
+        root = nodes.pop(0)
+        if root.depth == 1:
+            root._parent = None
+        root.consume_children(nodes)
+
+        new.index = FormIndex(copies[0], copies, frozen=self.index.frozen)
+        new._bind()
+        return new
+
+
+compiled_forms = LRUCache(getattr(settings, 'FORM_BUILDER_COMPILED_FORM_CACHE_SIZE', 100))
+
+
 class BaseFormField(FormElement):
     formfield_class = None
 
@@ -661,6 +891,9 @@ class BaseFormField(FormElement):
         """
         return []
 
+    def get_search_text(self):
+        return ''
+
 
 class FormFieldForm(forms.ModelForm):
     help_text = MiniCKEditorField(label=_('help text'), required=False)
@@ -695,6 +928,9 @@ class FormField(StrDisplayNameMixin, BaseFormField):
     def __str__(self):
         return self.label
 
+    def get_search_text(self):
+        return ' '.join(filter(None, [self.label, html_to_plaintext(self.help_text)]))
+
     def serialize_value(self, value):
         """
         Used to turn the python object from cleaned_data into a string
@@ -805,6 +1041,22 @@ class BaseChoiceField(FormField):
     def get_choices(self):
         return [(i.strip(), i.strip()) for i in self.choices.splitlines()]
 
+    def get_chosen(self, value):
+        """
+        The list of choices in `value`, a value from cleaned_data.
+        """
+        return [value] if value else []
+
+    def parse_serialized_value(self, value):
+        """
+        The list of choices in `value`, a value from serialize_value.
+        """
+        return [value] if value else []
+
+    def get_search_text(self):
+        labels = [force_text(label) for value, label in self.get_choices() if value]
+        return ' '.join([super(BaseChoiceField, self).get_search_text()] + labels)
+
     @property
     def widget(self):
         return self.widget_class(attrs=self.widget_attrs)
@@ -877,6 +1129,28 @@ class MultipleChoiceField(BaseChoiceField):
         """
         return ','.join(i.replace('\\', '\\\\').replace(',', '\\,') for i in value)
 
+    def get_chosen(self, value):
+        return list(value or [])
+
+    def parse_serialized_value(self, value):
+        """
+        Splits a value from serialize_value back into its choices.
+        """
+        choices = []
+        current = []
+        chars = iter(value)
+        for char in chars:
+            if char == '\\':
+                current.append(next(chars, ''))
+            elif char == ',':
+                choices.append(''.join(current))
+                current = []
+            else:
+                current.append(char)
+        if value:
+            choices.append(''.join(current))
+        return choices
+
     @property
     def widget_class(self):
         return self.WIDGET_CLASSES.get(self.type, forms.CheckboxSelectMultiple)
@@ -908,9 +1182,15 @@ class Uncaptcha(BaseFormField):
         # only allow 1 uncaptcha per form
         if not isinstance(parent, FormBody):
             return False
-        if obj in parent.depth_first_order():
+        # only frozen trees, which can't change, keep their index
+        index = getattr(parent, '_form_index', None)
+        if index is not None:
+            elements = index.elements
+        else:
+            elements = parent.depth_first_order()
+        if obj in elements:
             return True
-        if [i for i in parent.depth_first_order() if isinstance(i, cls)]:
+        if [i for i in elements if isinstance(i, cls)]:
             return False
         else:
             return super(Uncaptcha, cls).valid_child_of(parent, obj)
@@ -922,26 +1202,52 @@ class Uncaptcha(BaseFormField):
 
 @widgy.register
 class FileUpload(FormField):
+    max_size = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_('maximum size (KB)'),
+        help_text=_('Bigger files are refused as soon as the upload reaches this size. Leave empty for no limit.'),
+    )
+
     formfield_class = forms.FileField
     storage = default_storage
 
+    @property
+    def upload_size_limit(self):
+        """
+        The maximum size of an upload in bytes, or None.
+        """
+        if self.max_size:
+            return self.max_size * 1024
+        return None
+
+    def get_formfield_kwargs(self):
+        kwargs = super(FileUpload, self).get_formfield_kwargs()
+        if self.upload_size_limit:
+            kwargs['validators'] = [MaxUploadSizeValidator(self.upload_size_limit)]
+        return kwargs
+
     def generate_filename(self, filename):
         return os.path.join(
             'form-uploads',
             self.storage.get_valid_name(os.path.basename(filename))
         )
 
-    def _save(self, value):
-        filename = self.generate_filename(value.name)
-        filename = self.storage.save(filename, value)
-        self.filename = self.storage.url(filename)
+    def save_file(self, value):
+        """
+        Saves an uploaded file to the storage, only once however many times it
+        is called, and returns its name in the storage.
+        """
+        # The name is kept on the file, not on self, because compiled forms
+        # share their widgets between submissions.
+        if not hasattr(value, 'widgy_storage_name'):
+            filename = self.generate_filename(value.name)
+            value.widgy_storage_name = self.storage.save(filename, value)
+        return value.widgy_storage_name
 
     def serialize_value(self, value):
         if value:
-            if not hasattr(self, 'filename'):
-                self._save(value)
-
-            return self.filename
+            return self.storage.url(self.save_file(value))
         else:
             return ''
 
@@ -954,6 +1260,122 @@ class ImageUpload(FileUpload):
         proxy = True
 
 
+class EchoBuffer(object):
+    """
+    A file-like object that returns what is written to it, to get the lines
+    out of a csv writer one at a time.
+    """
+    def write(self, value):
+        return value
+
+
+class CompactSubmissionQuerySet(QuerySet):
+    """
+    Methods for querysets of submissions that keep their values in a data
+    column, see FormSubmission.compact_values.
+    """
+
+    def get_compact_formfields(self):
+        """
+        A dictionary of field ident -> (submission pk, {'node': field node
+        pk, 'name': field name}), from the newest compact submission that has
+        each field. All the submissions with the same fields_key have the same
+        fields, so only the newest one per form and fields_key is read.
+        """
+        latest_pks = self.prefetch_related(None).order_by().values(
+            'form_node', 'fields_key',
+        ).annotate(latest=models.Max('pk')).values('latest')
+        rows = self.model.objects.filter(
+            pk__in=latest_pks,
+        ).order_by('-pk').values_list('pk', 'data')
+
+        fields = {}
+        for pk, data in rows:
+            for ident, field in FormSubmission.load_data(data).items():
+                fields.setdefault(ident, (pk, field))
+        return fields
+
+    def get_compact_formfield_labels(self):
+        """
+        get_formfield_labels for compact submissions.
+        """
+        return get_field_labels(dict(
+            (ident, field) for ident, (pk, field) in self.get_compact_formfields().items()
+        ))
+
+    def count_compact_choices(self, field, counts):
+        """
+        Adds how many of the submissions chose each choice of `field` to
+        `counts`, a dictionary of choice -> count, reading their data column.
+
+        PostgreSQL groups the submissions by the value of the field. The
+        other backends don't all have JSON functions, so the data column of
+        each submission is decoded here.
+        """
+        ident = force_text(field.ident)
+        qs = self.prefetch_related(None).order_by()
+        connection = connections[self.db]
+        if connection.vendor == 'postgresql' and getattr(connection, 'pg_version', 0) >= 90300:
+            column = '%s.%s' % (connection.ops.quote_name(self.model._meta.db_table),
+                                connection.ops.quote_name(self.model._meta.get_field('data').column))
+            values = qs.extra(
+                select={'choice_value': "(%s::json -> %%s ->> 'value')" % column},
+                select_params=[ident],
+            ).values_list('choice_value').annotate(count=models.Count('pk'))
+        else:
+            values = (
+                (FormSubmission.load_data(data).get(ident, {}).get('value'), 1)
+                for data in qs.values_list('data', flat=True).iterator()
+            )
+        for value, count in values:
+            if value is not None:
+                for choice in field.parse_serialized_value(value):
+                    counts[choice] = counts.get(choice, 0) + count
+
+    def _count_by_day(self, *group_by):
+        connection = connections[self.db]
+        tzname = timezone.get_current_timezone_name() if settings.USE_TZ else None
+        column = '%s.%s' % (connection.ops.quote_name(self.model._meta.db_table),
+                            connection.ops.quote_name(self.model._meta.get_field('created_at').column))
+        sql, params = connection.ops.datetime_trunc_sql('day', column, tzname)
+        rows = self.order_by().extra(
+            select={'day': sql}, select_params=params,
+        ).values(*(group_by + ('day',))).annotate(
+            count=models.Count('pk'),
+        ).order_by(*(group_by + ('day',)))
+        for row in rows:
+            day = row['day']
+            # sqlite gives back a string
+            if isinstance(day, six.string_types):
+                day = parse_datetime(day) or parse_date(day)
+            if isinstance(day, datetime.datetime):
+                day = day.date()
+            yield tuple(row[i] for i in group_by) + (day, row['count'])
+
+
+def get_field_labels(fields):
+    """
+    Takes a dictionary of field ident -> {'node': field node pk, 'name':
+    field name} and returns an ordered dictionary of field ident -> label, in
+    the order of the fields in their form. The fields that were deleted use
+    their name and come last.
+    """
+    nodes = Node.objects.in_bulk(
+        set(f['node'] for f in fields.values() if f['node'] is not None)
+    )
+    Node.attach_content_instances(list(nodes.values()))
+
+    def sort_key(item):
+        node = nodes.get(item[1]['node'])
+        return (node is None, node and node.path)
+
+    ret = OrderedDict()
+    for ident, field in sorted(fields.items(), key=sort_key):
+        node = nodes.get(field['node'])
+        ret[ident] = node.content.label if node else field['name']
+    return ret
+
+
 class FormSubmission(models.Model):
     """
     Holds the data from one submission of a Form.
@@ -962,46 +1384,142 @@ class FormSubmission(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     form_node = models.ForeignKey(Node, on_delete=models.PROTECT, related_name='form_submissions')
     form_ident = models.CharField(max_length=Form._meta.get_field('ident', False).max_length)
-
-    class FormSubmissionQuerySet(QuerySet):
+    # The values of a compact submission, see compact_values. When it's
+    # NULL, the values are stored as FormValues.
+    data = models.TextField(null=True, editable=False)
+    # Identifies the fields in data, see get_fields_key.
+    fields_key = models.CharField(max_length=40, null=True, editable=False)
+    # The values in data, one per line, for value_contains.
+    search_text = models.TextField(null=True, editable=False)
+
+    class FormSubmissionQuerySet(CompactSubmissionQuerySet):
         def get_formfield_labels(self):
             """
             A dictionary of field uuid to field label. We use the label of the
             field that was used by the most recent submission. Note that this
             means only fields that have been submitted will show up here.
             """
-
-            uuids = FormValue.objects.filter(
-                submission__in=self,
-            ).values('field_ident').distinct().order_by('field_node__path').values_list('field_ident', flat=True)
-
             ret = OrderedDict([
                 ('created_at', ugettext('Created at')),
             ])
-            for field_uuid in uuids:
-                latest_value = FormValue.objects.filter(
-                    field_ident=field_uuid,
-                ).order_by('-submission__created_at', '-pk').select_related('field_node')[0]
-                ret[field_uuid] = latest_value.get_label()
+            ret.update(get_field_labels(dict(
+                (ident, field) for ident, (pk, field) in self.get_formfields().items()
+            )))
             return ret
 
+        def get_formfields(self):
+            """
+            A dictionary of field ident -> (submission pk, {'node': field node
+            pk, 'name': field name}), from the newest submission that has each
+            field.
+            """
+            uuids = FormValue.objects.filter(
+                submission__in=self.filter(data=None),
+            ).values('field_ident')
+            # The latest value of each field, in one query. Values are
+            # created with their submission, so the highest pk is the latest.
+            latest_pks = FormValue.objects.filter(
+                field_ident__in=uuids,
+            ).order_by().values('field_ident').annotate(
+                latest=models.Max('pk'),
+            ).values('latest')
+            latest_values = FormValue.objects.filter(
+                pk__in=latest_pks,
+            ).values_list('field_ident', 'submission', 'field_node', 'field_name')
+
+            fields = self.exclude(data=None).get_compact_formfields()
+            for ident, submission_pk, node_pk, name in latest_values:
+                # Submissions are converted to compact ones oldest first, so
+                # either kind can be the newer one.
+                if ident not in fields or fields[ident][0] < submission_pk:
+                    fields[ident] = (submission_pk, {'node': node_pk, 'name': name})
+            return fields
+
+        def created_between(self, start=None, end=None):
+            qs = self
+            if start is not None:
+                qs = qs.filter(created_at__gte=start)
+            if end is not None:
+                qs = qs.filter(created_at__lt=end)
+            return qs
+
+        def value_contains(self, text):
+            """
+            Submissions with a value that contains `text`. The values of
+            compact submissions are searched in their search_text.
+            """
+            return self.filter(
+                models.Q(data=None, values__value__icontains=text) |
+                models.Q(search_text__icontains=text)
+            ).distinct()
+
+        def count_by_day(self):
+            """
+            A list of (date, number of submissions) for the days that have
+            submissions, in the current time zone. Counted in the database.
+            """
+            return list(self._count_by_day())
+
+        def choice_counts(self, field):
+            """
+            How many of the submissions chose each choice of `field`, a
+            BaseChoiceField, as an OrderedDict of choice -> count. The choices
+            of the field come first, in order, followed by the ones it doesn't
+            have anymore.
+
+            FormValues are counted in the database, compact submissions by
+            count_compact_choices.
+            """
+            counts = OrderedDict((value, 0) for value, label in field.get_choices() if value)
+            ident = force_text(field.ident)
+
+            values = FormValue.objects.filter(
+                submission__in=self.filter(data=None),
+                field_ident=ident,
+            ).order_by().values_list('value').annotate(count=models.Count('pk'))
+            for value, count in values:
+                for choice in field.parse_serialized_value(value):
+                    counts[choice] = counts.get(choice, 0) + count
+
+            self.exclude(data=None).count_compact_choices(field, counts)
+            return counts
+
+        def iterator_in_chunks(self, chunk_size=500):
+            """
+            Iterates over the submissions in primary key order, fetching
+            (and prefetching the values of) `chunk_size` of them at a time,
+            so that memory use doesn't depend on the number of submissions.
+            """
+            qs = self.prefetch_related('values').order_by('pk')
+            chunk = list(qs[:chunk_size])
+            while chunk:
+                for submission in chunk:
+                    yield submission
+                chunk = list(qs.filter(pk__gt=chunk[-1].pk)[:chunk_size])
+
         def as_dictionaries(self):
-            return (i.as_dict() for i in self.all())
+            return (i.as_dict() for i in self.iterator_in_chunks())
 
         def as_ordered_dictionaries(self, order):
             for submission in self.as_dictionaries():
                 yield OrderedDict((ident, submission.get(ident, ''))
                                   for ident in order)
 
-        def to_csv(self, output):
+        def iter_csv(self, archived=None):
             """
-            Write out our submissions as csv to output, a file-like object.
+            Yields our submissions as lines of csv, for a
+            StreamingHttpResponse. The ArchivedSubmissions in `archived` come
+            first.
             """
 
-            values = self.as_dictionaries()
             headers = self.get_formfield_labels()
+            rows = self.as_dictionaries()
+            if archived is not None:
+                for ident, label in archived.get_formfield_labels().items():
+                    headers.setdefault(ident, label)
+                rows = itertools.chain(archived.as_dictionaries(), rows)
 
-            writer = csv.DictWriter(output, list(headers))
+            writer = csv.DictWriter(EchoBuffer(), list(headers))
 
             # python2 csv expects bytes, but python3's works in unicode
             if six.PY2:
@@ -1013,25 +1531,72 @@ class FormSubmission(models.Model):
                 def encode(d):
                     return d
 
-            writer.writerow(encode(headers))
+            yield writer.writerow(encode(headers))
 
-            for row in values:
-                writer.writerow(encode(row))
+            for row in rows:
+                yield writer.writerow(encode(row))
 
-        def submit(self, form, data):
-            submission = self.create(
-                form_node=form.node,
-                form_ident=form.ident,
-            )
+        def to_csv(self, output, archived=None):
+            """
+            Write out our submissions as csv to output, a file-like object.
+            """
+            for line in self.iter_csv(archived):
+                output.write(line)
 
-            for name, field in form.get_fields().items():
-                value = field.serialize_value(data[name])
-                submission.values.create(
-                    field_node=field.node,
-                    field_name=field.label,
-                    field_ident=field.ident,
-                    value=value,
-                )
+        def submit(self, form, data, fields=None):
+            """
+            Saves `data`, the cleaned_data of a form built by
+            `form.build_form_class()`. `fields` is the ``widgy_fields`` of
+            that form class, defaults to `form.get_fields()`.
+
+            The counters of the form are updated once the submission is
+            committed, so concurrent submissions don't hold their row locks
+            for the whole transaction.
+            """
+            if fields is None:
+                fields = form.get_fields()
+
+            with transaction.atomic():
+                if getattr(settings, 'FORM_BUILDER_COMPACT_SUBMISSIONS', False):
+                    values = [(field.ident, field.node.pk, field.label, field.serialize_value(data[name]))
+                              for name, field in fields.items()]
+                    submission = self.create(
+                        form_node=form.node,
+                        form_ident=form.ident,
+                        data=FormSubmission.dump_data(values),
+                        fields_key=FormSubmission.get_fields_key(v[0] for v in values),
+                        search_text=FormSubmission.get_search_text(v[3] for v in values),
+                    )
+                else:
+                    submission = self.create(
+                        form_node=form.node,
+                        form_ident=form.ident,
+                    )
+
+                    FormValue.objects.bulk_create([
+                        FormValue(
+                            submission=submission,
+                            field_node_id=field.node.pk,
+                            field_name=field.label,
+                            field_ident=field.ident,
+                            value=field.serialize_value(data[name]),
+                        )
+                        for name, field in fields.items()
+                    ])
+
+            form_ident = form.ident
+            date = local_date(submission.created_at)
+            choices = [
+                (field.ident, choice)
+                for name, field in fields.items() if isinstance(field, BaseChoiceField)
+                for choice in field.get_chosen(data[name])
+            ]
+
+            def update_counters():
+                FormSubmissionCount.objects.increment(form_ident)
+                FormDailyCount.objects.increment(form_ident, date)
+                FormChoiceCount.objects.increment_many(form_ident, choices)
+            on_commit(update_counters)
             return submission
 
     objects = FormSubmissionQuerySet.as_manager()
@@ -1039,14 +1604,432 @@ class FormSubmission(models.Model):
     class Meta:
         verbose_name = _('form submission')
         verbose_name_plural = _('form submissions')
+        index_together = [
+            ('form_ident', 'created_at'),
+        ]
+
+    @staticmethod
+    def dump_data(values):
+        """
+        Serializes an iterable of (field_ident, field_node_pk, field_name,
+        value) for the data column.
+        """
+        return json.dumps(OrderedDict(
+            (force_text(ident), {'node': node_pk, 'name': name, 'value': value})
+            for ident, node_pk, name, value in values
+        ))
+
+    @staticmethod
+    def load_data(data):
+        return json.loads(data, object_pairs_hook=OrderedDict)
+
+    @staticmethod
+    def get_fields_key(idents):
+        """
+        A hash of the field idents of a compact submission, the same for all
+        the submissions that have the same fields.
+        """
+        return hashlib.sha1(' '.join(force_text(i) for i in idents).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_search_text(values):
+        """
+        The search_text of a compact submission with `values`.
+        """
+        return '\n'.join(force_text(v) for v in values)
+
+    @property
+    def is_compact(self):
+        return self.data is not None
+
+    @cached_property
+    def compact_values(self):
+        """
+        An ordered dictionary of field_ident -> {'node': field_node_pk,
+        'name': field_name, 'value': value}, the same information as the
+        FormValues of a non-compact submission.
+        """
+        return self.load_data(self.data)
+
+    def as_dict(self):
+        ret = {'created_at': self.created_at}
+        if self.is_compact:
+            for ident, field in self.compact_values.items():
+                ret[ident] = field['value']
+        else:
+            for value in self.values.all():
+                ret[value.field_ident] = value.value
+        return ret
+
+
+class ArchivedSubmission(models.Model):
+    """
+    A FormSubmission that was moved out of the submissions table by the
+    archive_form_submissions command, to keep it small. Its values are kept
+    in the data column, like a compact submission.
+    """
+
+    # the primary key of the FormSubmission
+    id = models.IntegerField(primary_key=True)
+    created_at = models.DateTimeField()
+    form_node = models.ForeignKey(Node, on_delete=models.PROTECT, related_name='archived_form_submissions')
+    form_ident = models.CharField(max_length=Form._meta.get_field('ident', False).max_length,
+                                  db_index=True)
+    data = models.TextField()
+    fields_key = models.CharField(max_length=40, null=True)
+
+    class ArchivedSubmissionQuerySet(CompactSubmissionQuerySet):
+        def get_formfield_labels(self):
+            return self.get_compact_formfield_labels()
+
+        def get_formfields(self):
+            return self.get_compact_formfields()
+
+        def choice_counts(self, field):
+            counts = OrderedDict((value, 0) for value, label in field.get_choices() if value)
+            self.count_compact_choices(field, counts)
+            return counts
+
+        def iterator_in_chunks(self, chunk_size=500):
+            """
+            Iterates over the submissions in primary key order, fetching
+            `chunk_size` of them at a time.
+            """
+            qs = self.order_by('pk')
+            chunk = list(qs[:chunk_size])
+            while chunk:
+                for submission in chunk:
+                    yield submission
+                chunk = list(qs.filter(pk__gt=chunk[-1].pk)[:chunk_size])
+
+        def as_dictionaries(self):
+            return (i.as_dict() for i in self.iterator_in_chunks())
+
+    objects = ArchivedSubmissionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('archived submission')
+        verbose_name_plural = _('archived submissions')
 
     def as_dict(self):
         ret = {'created_at': self.created_at}
-        for value in self.values.all():
-            ret[value.field_ident] = value.value
+        for ident, field in FormSubmission.load_data(self.data).items():
+            ret[ident] = field['value']
         return ret
 
 
+def on_commit(func):
+    """
+    Calls `func` when the current transaction is committed, right away
+    outside of one.
+    """
+    # BBB Django < 1.9 doesn't have on_commit
+    if hasattr(transaction, 'on_commit'):
+        transaction.on_commit(func)
+    else:
+        func()
+
+
+def local_date(value):
+    """
+    The date of a datetime in the current time zone.
+    """
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+class CounterQuerySet(QuerySet):
+    """
+    A QuerySet for a table of counts, with a row per value of its other
+    fields.
+    """
+
+    def increment_counter(self, by=1, **lookup):
+        """
+        Adds `by` to the count of the row matching `lookup`, creating it if
+        there isn't one.
+        """
+        if self._add_to_count(by, **lookup):
+            return
+        try:
+            with transaction.atomic():
+                self.create(count=max(by, 0), **lookup)
+        except IntegrityError:
+            # another submission created it first
+            self._add_to_count(by, **lookup)
+
+    def _add_to_count(self, by, **lookup):
+        qs = self.filter(**lookup)
+        if by >= 0:
+            return qs.update(count=models.F('count') + by)
+        # A count that drifted, for example because rows were deleted
+        # without the ORM, stops at 0 instead of breaking the constraint
+        # of the PositiveIntegerField.
+        return qs.filter(count__gte=-by).update(count=models.F('count') + by) or qs.update(count=0)
+
+    def replace_counts(self, keys, get_counts):
+        """
+        Sets the counts of the table to the ones returned by `get_counts`, a
+        dictionary of the tuple of the values of `keys` -> count. The rows
+        are locked before the counts are computed, then updated in place, so
+        that the increments made in the meantime wait and are added to the
+        new counts. Emptying and refilling the table would lose them.
+        """
+        with transaction.atomic():
+            existing = dict(
+                (tuple(row[1:-1]), (row[0], row[-1]))
+                for row in self.select_for_update().values_list('pk', *(list(keys) + ['count']))
+            )
+            counts = get_counts()
+
+            stale = [pk for key, (pk, count) in existing.items() if key not in counts]
+            if stale:
+                self.filter(pk__in=stale).delete()
+            pks_by_count = defaultdict(list)
+            for key, (pk, count) in existing.items():
+                if key in counts and counts[key] != count:
+                    pks_by_count[counts[key]].append(pk)
+            for count, pks in pks_by_count.items():
+                self.filter(pk__in=pks).update(count=count)
+
+            missing = [key for key in counts if key not in existing]
+            try:
+                with transaction.atomic():
+                    self.bulk_create(self.model(count=counts[key], **dict(zip(keys, key)))
+                                     for key in missing)
+            except IntegrityError:
+                # a submission created some of them first
+                for key in missing:
+                    lookup = dict(zip(keys, key))
+                    if not self.filter(**lookup).update(count=counts[key]):
+                        self.create(count=counts[key], **lookup)
+
+    def increment_counters(self, lookups):
+        """
+        Adds 1 to the count of the row matching each of `lookups`, creating
+        the missing ones, like increment_counter. It takes a query to find
+        the rows that exist, one to create the others and one to update the
+        existing ones, however many lookups there are.
+        """
+        amounts = Counter(tuple(sorted(lookup.items())) for lookup in lookups)
+        if not amounts:
+            return
+
+        def matching(keys):
+            return reduce(or_, (models.Q(**dict(key)) for key in keys))
+
+        names = [name for name, value in next(iter(amounts))]
+        existing = set(
+            tuple(zip(names, values))
+            for values in self.filter(matching(amounts)).values_list(*names)
+        )
+        missing = [key for key in amounts if key not in existing]
+        if missing:
+            try:
+                with transaction.atomic():
+                    self.bulk_create(self.model(count=amounts[key], **dict(key)) for key in missing)
+            except IntegrityError:
+                # another submission created some of them first
+                for key in missing:
+                    self.increment_counter(amounts[key], **dict(key))
+
+        keys_by_amount = defaultdict(list)
+        for key in existing:
+            keys_by_amount[amounts[key]].append(key)
+        for amount, keys in keys_by_amount.items():
+            self.filter(matching(keys)).update(count=models.F('count') + amount)
+
+
+class FormSubmissionCount(models.Model):
+    """
+    The number of submissions of a logical form, kept up to date when
+    submissions are made and deleted so it doesn't have to be counted.
+    """
+
+    form_ident = models.CharField(max_length=Form._meta.get_field('ident', False).max_length,
+                                  unique=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class FormSubmissionCountQuerySet(CounterQuerySet):
+        def increment(self, form_ident, by=1):
+            self.increment_counter(by, form_ident=force_text(form_ident))
+
+        def get_count(self, form_ident):
+            counts = self.filter(form_ident=force_text(form_ident)).values_list('count', flat=True)
+            return counts[0] if counts else 0
+
+        def recount(self):
+            """
+            Recomputes the counts of all forms from their submissions.
+            """
+            def get_counts():
+                counts = FormSubmission.objects.order_by().values('form_ident').annotate(
+                    count=models.Count('pk'),
+                ).values_list('form_ident', 'count')
+                return dict(((form_ident,), count) for form_ident, count in counts)
+            self.replace_counts(['form_ident'], get_counts)
+
+    objects = FormSubmissionCountQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('form submission count')
+        verbose_name_plural = _('form submission counts')
+
+
+@receiver(models.signals.post_delete, sender=FormSubmission)
+def decrement_submission_count(sender, instance, **kwargs):
+    FormSubmissionCount.objects.increment(instance.form_ident, by=-1)
+
+
+class FormDailyCount(models.Model):
+    """
+    The number of submissions of a logical form per day, added to by
+    FormSubmission.objects.submit. Rollups like this one are for dashboards,
+    they count the submissions that were made, even if they were deleted
+    since.
+    """
+
+    form_ident = models.CharField(max_length=Form._meta.get_field('ident', False).max_length)
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class FormDailyCountQuerySet(CounterQuerySet):
+        def increment(self, form_ident, date, by=1):
+            self.increment_counter(by, form_ident=force_text(form_ident), date=date)
+
+        def for_form(self, form_ident, start=None, end=None):
+            """
+            A list of (date, count) for a form, between `start` and `end`
+            inclusive.
+            """
+            qs = self.filter(form_ident=force_text(form_ident))
+            if start is not None:
+                qs = qs.filter(date__gte=start)
+            if end is not None:
+                qs = qs.filter(date__lte=end)
+            return list(qs.order_by('date').values_list('date', 'count'))
+
+        def recount(self):
+            """
+            Recomputes the counts of all forms from their submissions,
+            archived ones included.
+            """
+            def get_counts():
+                counts = Counter()
+                for model in (FormSubmission, ArchivedSubmission):
+                    for form_ident, date, count in model.objects.all()._count_by_day('form_ident'):
+                        counts[form_ident, date] += count
+                return counts
+            self.replace_counts(['form_ident', 'date'], get_counts)
+
+    objects = FormDailyCountQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('form daily count')
+        verbose_name_plural = _('form daily counts')
+        unique_together = [
+            ('form_ident', 'date'),
+        ]
+
+
+class FormChoiceCount(models.Model):
+    """
+    How many submissions of a logical form chose each choice of its choice
+    fields, added to by FormSubmission.objects.submit.
+    """
+
+    form_ident = models.CharField(max_length=Form._meta.get_field('ident', False).max_length)
+    field_ident = models.CharField(max_length=FormField._meta.get_field('ident', False).max_length)
+    # choices that are longer are truncated
+    value = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+
+    class FormChoiceCountQuerySet(CounterQuerySet):
+        def increment(self, form_ident, field_ident, value, by=1):
+            self.increment_counter(
+                by,
+                form_ident=force_text(form_ident),
+                field_ident=force_text(field_ident),
+                value=value[:255],
+            )
+
+        def increment_many(self, form_ident, choices):
+            """
+            Adds 1 to the count of each (field_ident, value) in `choices`,
+            with a few queries for all of them.
+            """
+            self.increment_counters([
+                dict(form_ident=force_text(form_ident),
+                     field_ident=force_text(field_ident),
+                     value=value[:255])
+                for field_ident, value in choices
+            ])
+
+        def for_form(self, form_ident):
+            """
+            A dictionary of field ident -> {choice: count} for a form.
+            """
+            ret = {}
+            rows = self.filter(form_ident=force_text(form_ident)).values_list(
+                'field_ident', 'value', 'count')
+            for field_ident, value, count in rows:
+                ret.setdefault(field_ident, {})[value] = count
+            return ret
+
+        def recount(self):
+            """
+            Recomputes the counts of all forms from their submissions,
+            archived ones included. The choices of each field are parsed by
+            the version of it that the newest submission was made with.
+            """
+            def get_counts():
+                form_idents = set()
+                for model in (FormSubmission, ArchivedSubmission):
+                    form_idents.update(model.objects.order_by().values_list('form_ident', flat=True).distinct())
+
+                counts = Counter()
+                for form_ident in sorted(form_idents):
+                    querysets = [
+                        FormSubmission.objects.filter(form_ident=form_ident),
+                        ArchivedSubmission.objects.filter(form_ident=form_ident),
+                    ]
+                    for field in self._get_choice_fields(querysets):
+                        field_ident = force_text(field.ident)
+                        for qs in querysets:
+                            for value, count in qs.choice_counts(field).items():
+                                counts[form_ident, field_ident, value[:255]] += count
+                return dict((key, count) for key, count in counts.items() if count)
+            self.replace_counts(['form_ident', 'field_ident', 'value'], get_counts)
+
+        def _get_choice_fields(self, querysets):
+            """
+            The BaseChoiceFields that the submissions in `querysets` have
+            values for, as they were in the newest submission of each.
+            Fields whose node was deleted are skipped.
+            """
+            fields = {}
+            for qs in querysets:
+                for ident, (pk, field) in qs.get_formfields().items():
+                    if ident not in fields or fields[ident][0] < pk:
+                        fields[ident] = (pk, field)
+            nodes = Node.objects.in_bulk(
+                set(f['node'] for pk, f in fields.values() if f['node'] is not None)
+            )
+            Node.attach_content_instances(list(nodes.values()))
+            return [node.content for node in nodes.values()
+                    if isinstance(node.content, BaseChoiceField)]
+
+    objects = FormChoiceCountQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('form choice count')
+        verbose_name_plural = _('form choice counts')
+        unique_together = [
+            ('form_ident', 'field_ident', 'value'),
+        ]
+
+
 class FormValue(models.Model):
     """
     Holds a datum from a form submission, EAV style.
@@ -1061,7 +2044,8 @@ class FormValue(models.Model):
     field_node = models.ForeignKey(Node, on_delete=models.SET_NULL, null=True)
     field_name = models.CharField(max_length=255)
     field_ident = models.CharField(
-        max_length=FormField._meta.get_field('ident', False).max_length)
+        max_length=FormField._meta.get_field('ident', False).max_length,
+        db_index=True)
 
     value = models.TextField()
 
@@ -1072,10 +2056,158 @@ class FormValue(models.Model):
             return self.field_name
 
 
+class SuccessHandlerJob(models.Model):
+    """
+    A success handler waiting to be run by the run_form_handler_jobs command,
+    see executors.DatabaseExecutor.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+
+    handler_node = models.ForeignKey(Node, on_delete=models.CASCADE, related_name='+')
+    # JSON, see executors.serialize_form
+    payload = models.TextField()
+    status = models.CharField(max_length=20, default=PENDING, choices=[
+        (PENDING, _('pending')),
+        (RUNNING, _('running')),
+        (FAILED, _('failed')),
+    ])
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now, db_index=True)
+    # when the running job was claimed, see claim_next
+    claimed_at = models.DateTimeField(null=True, editable=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class SuccessHandlerJobQuerySet(QuerySet):
+        def enqueue(self, handler, form):
+            from .executors import serialize_form
+            return self.create(
+                handler_node=handler.node,
+                payload=serialize_form(form),
+            )
+
+        def ready(self, lease=None):
+            """
+            The pending jobs that can run now, and the running jobs that were
+            claimed more than `lease` seconds ago, their worker must have
+            died.
+            """
+            now = timezone.now()
+            if lease is None:
+                lease = getattr(settings, 'FORM_BUILDER_HANDLER_JOB_LEASE', 600)
+            return self.filter(
+                models.Q(status=SuccessHandlerJob.PENDING, run_after__lte=now) |
+                models.Q(status=SuccessHandlerJob.RUNNING,
+                         claimed_at__lt=now - datetime.timedelta(seconds=lease))
+            ).order_by('run_after', 'pk')
+
+        def claim_next(self, lease=None):
+            """
+            Marks the next ready job as running and returns it. Several
+            workers can claim jobs at the same time, each claim of a job only
+            succeeds once. A job that is still running when its `lease`
+            expires is claimed again, so the lease must be longer than any
+            job takes.
+            """
+            for job in self.ready(lease)[:10]:
+                now = timezone.now()
+                claimed = self.filter(
+                    pk=job.pk,
+                    status=job.status,
+                    claimed_at=job.claimed_at,
+                ).update(
+                    status=SuccessHandlerJob.RUNNING,
+                    claimed_at=now,
+                    attempts=models.F('attempts') + 1,
+                )
+                if claimed:
+                    job.status = SuccessHandlerJob.RUNNING
+                    job.claimed_at = now
+                    job.attempts += 1
+                    return job
+            return None
+
+    objects = SuccessHandlerJobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('success handler job')
+        verbose_name_plural = _('success handler jobs')
+
+    def run(self):
+        from .executors import deserialize_form
+        handler = self.handler_node.content
+        handler.execute(None, deserialize_form(self.payload, handler.form_index.fields))
+
+    def run_and_record(self, max_attempts=5, backoff=30):
+        """
+        Runs the job. It's deleted when it succeeds, otherwise it's retried
+        after an exponential backoff (in seconds) up to `max_attempts` times.
+        Returns whether it succeeded.
+
+        The outcome is only recorded while the job still has the claim this
+        worker made. If its lease expired and another worker claimed it
+        again, the job is left to that worker.
+        """
+        claim = SuccessHandlerJob.objects.filter(
+            pk=self.pk,
+            status=self.RUNNING,
+            claimed_at=self.claimed_at,
+        )
+        try:
+            self.run()
+        except Exception:
+            changes = {
+                'last_error': traceback.format_exc(),
+                'claimed_at': None,
+            }
+            if self.attempts >= max_attempts:
+                changes['status'] = self.FAILED
+            else:
+                changes['status'] = self.PENDING
+                changes['run_after'] = timezone.now() + datetime.timedelta(
+                    seconds=backoff * 2 ** (self.attempts - 1))
+            for name, value in changes.items():
+                setattr(self, name, value)
+            claim.update(**changes)
+            return False
+        else:
+            claim.delete()
+            return True
+
+
+class RepostDelivery(models.Model):
+    """
+    The outcome of a RepostHandler sending a submission to its URL.
+    """
+    DELIVERED = 'delivered'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+
+    submission = models.ForeignKey(FormSubmission, null=True, on_delete=models.SET_NULL,
+                                   related_name='deliveries')
+    handler_node = models.ForeignKey(Node, null=True, on_delete=models.SET_NULL, related_name='+')
+    url = models.CharField(max_length=2048)
+    status = models.CharField(max_length=20, choices=[
+        (DELIVERED, _('delivered')),
+        (FAILED, _('failed')),
+        # not attempted because the URL kept failing
+        (SKIPPED, _('skipped')),
+    ])
+    status_code = models.PositiveIntegerField(null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('repost delivery')
+        verbose_name_plural = _('repost deliveries')
+
+
 @receiver(pre_delete_widget, sender=FormInput)
 def protect_emailuserhandler_to_ident_field(sender, instance, raw, **kwargs):
     from django.db.models import ProtectedError
 
-    for child in instance.parent_form.depth_first_order():
-        if isinstance(child, EmailUserHandler) and child.to_ident == instance.ident:
+    for child in instance.form_index.of_type(EmailUserHandler):
+        if child.to_ident == instance.ident:
             raise ProtectedError("This cannot be deleted because it is being referenced by a %s." % (child.display_name,), [child])
@@ -1,11 +1,14 @@
 from __future__ import unicode_literals
 
 import contextlib
+import datetime
+import threading
 import unittest
 import uuid
 import os.path
+import socket
 
-from six.moves import StringIO
+from six.moves import StringIO, BaseHTTPServer, socketserver
 
 from django.test import TestCase, override_settings
 from django.test.client import RequestFactory
@@ -15,16 +18,25 @@ from django.utils.encoding import force_text
 from django.core import mail
 from django.db import connection
 from django.core.files.base import ContentFile
-from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadedfile import TemporaryUploadedFile, SimpleUploadedFile
 from django.conf import settings
+from django.core.management import call_command
+from django.views.generic import View
 
 import mock
 
-from widgy.contrib.form_builder.forms import PhoneNumberField
+from widgy.contrib.form_builder.delivery import Delivery, DeliveryEngine, DeliveryError
+from widgy.contrib.form_builder.executors import serialize_form, deserialize_form
+from widgy.contrib.form_builder.forms import PhoneNumberField, SubmissionFilterForm
 from widgy.contrib.form_builder.models import (
     Form, FormInput, Textarea, FormSubmission, FormField, Uncaptcha,
-    EmailUserHandler, EmailSuccessHandler, FileUpload, friendly_uuid
+    EmailUserHandler, EmailSuccessHandler, FileUpload, FormValue,
+    FormSubmissionCount, SuccessHandlerJob, RepostDelivery, FormDailyCount,
+    FormChoiceCount, ChoiceField, MultipleChoiceField, friendly_uuid, local_date,
+    compiled_forms,
 )
+from widgy.contrib.form_builder.uploads import SizeLimitUploadHandler
+from widgy.contrib.form_builder.views import HandleFormMixin
 from widgy.exceptions import ParentChildRejection
 from widgy.utils import build_url
 from widgy.models import VersionTracker
@@ -88,6 +100,42 @@ class GetFormTest(TestCase):
         form_class = self.form.build_form_class()
         self.assertTrue(hasattr(form_class, 'clean_%s' % uncaptcha.get_formfield_name()))
 
+    def test_frozen_form_class_is_cached(self):
+        self.form.children['fields'].add_child(widgy_site, FormInput,
+                                               type='text', label='Test')
+        self.assertIsNot(self.form.build_form_class(), self.form.build_form_class())
+
+        frozen = self.form.node.clone_tree(freeze=True).content
+        compiled = frozen.compile()
+        self.assertEqual(list(compiled.form_class.widgy_fields.values()), list(frozen.get_fields().values()))
+
+        refetched = Form.objects.get(pk=frozen.pk)
+        refetched.node = frozen.node
+        with self.assertNumQueries(0):
+            recompiled = refetched.compile()
+        self.assertIs(recompiled.base_form_class, compiled.base_form_class)
+        # the widgets aren't shared between the copies of the cached form
+        for name, field in recompiled.fields.items():
+            self.assertIsNot(field, compiled.fields[name])
+            self.assertEqual(field, compiled.fields[name])
+        self.assertIs(recompiled.handlers[0].form_index, recompiled.index)
+
+        # walking the tree of a copy stays in the copy
+        with self.assertNumQueries(0):
+            children = recompiled.index.form.get_children()
+        for child in children:
+            self.assertTrue(any(child is element for element in recompiled.index.elements))
+            self.assertIs(child.node.content, child)
+        children[0].changed = True
+        children[0].node.get_children().pop()
+
+        again = refetched.compile()
+        for cached in (compiled_forms.get((frozen.node.pk, force_text(frozen.ident))), again):
+            cached_children = cached.index.form.get_children()
+            self.assertFalse(hasattr(cached_children[0], 'changed'))
+            self.assertEqual(len(cached_children[0].get_children()),
+                             len(compiled.index.form.get_children()[0].get_children()))
+
 
 @contextlib.contextmanager
 def mock_now():
@@ -113,6 +161,11 @@ class TestForm(TestCase):
 
     def setUp(self):
         self.form, self.fields = self.make_form()
+        # TestCase never commits, so run the on_commit callbacks right away
+        patcher = mock.patch('django.db.transaction.on_commit', create=True,
+                             side_effect=lambda func: func())
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_friendly_uuid_python2_python3_plays_nice(self):
         """
@@ -159,6 +212,33 @@ class TestForm(TestCase):
         }
         self.assertEqual(expected, submission.as_dict())
 
+    def test_submit_with_form_class_fields(self):
+        form_class = self.form.build_form_class()
+        self.assertEqual(list(form_class.widgy_fields.values()),
+                         list(self.form.get_fields().values()))
+
+        data = dict((f.get_formfield_name(), f.label) for f in self.fields)
+        # create the counters
+        FormSubmission.objects.submit(form=self.form, data=data)
+        callbacks = []
+        with mock.patch('django.db.transaction.on_commit', create=True,
+                        side_effect=callbacks.append):
+            # savepoint, the submission, all the values, release savepoint
+            with self.assertNumQueries(4):
+                submission = FormSubmission.objects.submit(
+                    form=self.form,
+                    data=data,
+                    fields=form_class.widgy_fields,
+                )
+        self.assertEqual(submission.as_dict()[self.fields[1].ident], 'field 2')
+        self.assertEqual(FormSubmissionCount.objects.get_count(self.form.ident), 1)
+
+        # the submission count and the daily count, once committed
+        with self.assertNumQueries(2):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(FormSubmissionCount.objects.get_count(self.form.ident), 2)
+
     def test_field_names(self):
         self.submit('a', 'b', 'c')
         field_names = FormSubmission.objects.get_formfield_labels()
@@ -182,6 +262,33 @@ class TestForm(TestCase):
             self.fields[2].ident: 'field 3',
         })
 
+    def test_field_names_newest_submission(self):
+        with override_settings(FORM_BUILDER_COMPACT_SUBMISSIONS=True):
+            self.submit('a', 'b', 'c')
+        self.fields[0].label = 'field 1 edited'
+        self.fields[0].save()
+        # the FormValues are newer than the compact submission
+        self.submit('a', 'b', 'c')
+        # the labels come from the submissions once the field is gone
+        self.fields[0].delete()
+
+        field_names = FormSubmission.objects.get_formfield_labels()
+        self.assertEqual(field_names[self.fields[0].ident], 'field 1 edited')
+
+    def test_field_names_queries(self):
+        for i in range(5):
+            self.form.children['fields'].add_child(widgy_site, FormInput,
+                                                   label='extra', type='text')
+        FormSubmission.objects.submit(form=self.form, data=dict(
+            (name, 'a') for name in self.form.get_fields()
+        ))
+
+        # the latest values, the latest compact submissions, the field nodes
+        # and one per content type of field
+        with self.assertNumQueries(5):
+            field_names = self.form.submissions.get_formfield_labels()
+        self.assertEqual(len(field_names), 1 + 8)
+
     def test_prefetch_submission_count(self):
         forms = list(Form.objects.all().annotate_submission_count())
         self.assertEqual(forms[0].submission_count, 0)
@@ -208,6 +315,126 @@ class TestForm(TestCase):
         for form in forms:
             self.assertEqual(len(form.submissions), form.submission_count)
 
+    def test_submission_count_is_maintained(self):
+        first = self.submit('a', 'b', 'c')
+        self.submit('a', 'b', 'c')
+        self.assertEqual(FormSubmissionCount.objects.get_count(self.form.ident), 2)
+
+        first.delete()
+        self.assertEqual(FormSubmissionCount.objects.get_count(self.form.ident), 1)
+
+        self.form.submissions.all().delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.form.submission_count, 0)
+
+    def test_drifted_submission_count(self):
+        first = self.submit('a', 'b', 'c')
+        second = self.submit('a', 'b', 'c')
+        FormSubmissionCount.objects.all().update(count=0)
+
+        first.delete()
+        second.delete()
+        self.assertEqual(FormSubmissionCount.objects.get_count(self.form.ident), 0)
+
+    def test_recount_form_submissions(self):
+        self.submit('a', 'b', 'c')
+        self.submit('a', 'b', 'c')
+        FormSubmissionCount.objects.all().update(count=10)
+
+        call_command('recount_form_submissions', stdout=StringIO())
+
+        self.assertEqual(FormSubmissionCount.objects.get_count(self.form.ident), 2)
+
+    def test_analytics(self):
+        color = self.form.children['fields'].add_child(widgy_site, ChoiceField,
+                                                       label='color',
+                                                       type='radios',
+                                                       choices='red\nblue')
+        sizes = self.form.children['fields'].add_child(widgy_site, MultipleChoiceField,
+                                                       label='sizes',
+                                                       type='checkboxes',
+                                                       choices='S\nM, L')
+
+        def submit(chosen_color, chosen_sizes):
+            data = dict((f.get_formfield_name(), '') for f in self.fields)
+            data[color.get_formfield_name()] = chosen_color
+            data[sizes.get_formfield_name()] = chosen_sizes
+            FormSubmission.objects.submit(form=self.form, data=data)
+
+        submit('red', ['S', 'M, L'])
+        submit('red', ['S'])
+        with override_settings(FORM_BUILDER_COMPACT_SUBMISSIONS=True):
+            submit('blue', ['M, L'])
+
+        today = local_date(timezone.now())
+        color_counts = {'red': 2, 'blue': 1}
+        sizes_counts = {'S': 2, 'M, L': 2}
+
+        def assertCounts():
+            self.assertEqual(FormDailyCount.objects.for_form(self.form.ident), [(today, 3)])
+            self.assertEqual(FormChoiceCount.objects.for_form(self.form.ident), {
+                force_text(color.ident): color_counts,
+                force_text(sizes.ident): sizes_counts,
+            })
+
+        self.assertEqual(self.form.submissions.count_by_day(), [(today, 3)])
+        self.assertEqual(dict(self.form.submissions.choice_counts(color)), color_counts)
+        self.assertEqual(dict(self.form.submissions.choice_counts(sizes)), sizes_counts)
+        assertCounts()
+
+        FormDailyCount.objects.all().delete()
+        FormChoiceCount.objects.all().delete()
+        call_command('recount_form_submissions', stdout=StringIO())
+        assertCounts()
+
+    def test_recount_archived_submissions(self):
+        color = self.form.children['fields'].add_child(widgy_site, ChoiceField,
+                                                       label='color',
+                                                       type='radios',
+                                                       choices='red\nblue')
+        frozen = self.form.node.clone_tree(freeze=True).content
+        fields = frozen.get_fields()
+        data = dict((name, '') for name in fields)
+        frozen_color, = [f for f in fields.values() if isinstance(f, ChoiceField)]
+        data[frozen_color.get_formfield_name()] = 'red'
+        submission = FormSubmission.objects.submit(form=frozen, data=data)
+        # the editable form doesn't have the field anymore
+        color.delete()
+
+        old_created_at = timezone.now() - datetime.timedelta(days=40)
+        FormSubmission.objects.filter(pk=submission.pk).update(created_at=old_created_at)
+        call_command('archive_form_submissions', days=30, stdout=StringIO())
+        self.assertFalse(self.form.submissions.exists())
+
+        FormDailyCount.objects.all().delete()
+        FormChoiceCount.objects.all().delete()
+        call_command('recount_form_submissions', stdout=StringIO())
+
+        self.assertEqual(FormDailyCount.objects.for_form(self.form.ident),
+                         [(local_date(old_created_at), 1)])
+        self.assertEqual(FormChoiceCount.objects.for_form(self.form.ident), {
+            force_text(color.ident): {'red': 1},
+        })
+
+    def test_choice_counts_are_batched(self):
+        choices = [('color', 'red'), ('sizes', 'S'), ('sizes', 'M')]
+        FormChoiceCount.objects.increment_many(self.form.ident, choices)
+        FormChoiceCount.objects.increment_many(self.form.ident, choices[1:])
+
+        # one query to find the rows and one to update them
+        with self.assertNumQueries(2):
+            FormChoiceCount.objects.increment_many(self.form.ident, choices)
+        self.assertEqual(FormChoiceCount.objects.for_form(self.form.ident), {
+            'color': {'red': 2},
+            'sizes': {'S': 3, 'M': 3},
+        })
+
+    def test_parse_serialized_multiple_choices(self):
+        field = MultipleChoiceField()
+        choices = ['a, b', 'c\\d', '']
+        self.assertEqual(field.parse_serialized_value(field.serialize_value(choices)), choices)
+        self.assertEqual(field.parse_serialized_value(''), [])
+
     def test_name_is_preserved_after_field_is_deleted(self):
         self.submit('a', 'b', 'c')
         ident = self.fields[0].ident
@@ -327,6 +554,126 @@ class TestForm(TestCase):
             "%s,\N{SNOWMAN},2,3\r\n" % (now,))
         )
 
+    def test_iterator_in_chunks(self):
+        submissions = [self.submit(str(i), 'b', 'c') for i in range(5)]
+
+        # a query for each chunk and its values, and one for the empty chunk
+        with self.assertNumQueries(7):
+            chunked = list(self.form.submissions.iterator_in_chunks(chunk_size=2))
+        self.assertEqual(chunked, submissions)
+
+        with self.assertNumQueries(0):
+            values = [s.as_dict()[self.fields[0].ident] for s in chunked]
+        self.assertEqual(values, ['0', '1', '2', '3', '4'])
+
+    def test_iter_csv(self):
+        with mock_now() as now:
+            self.submit('a', 'b', 'c')
+
+        self.assertEqual([force_text(line) for line in self.form.submissions.iter_csv()], [
+            "Created at,field 1,field 2,field 3\r\n",
+            "%s,a,b,c\r\n" % (now,),
+        ])
+
+    def test_archive_form_submissions(self):
+        old = self.submit('a', 'b', 'c')
+        with override_settings(FORM_BUILDER_COMPACT_SUBMISSIONS=True):
+            old_compact = self.submit('d', 'e', 'f')
+        with mock_now() as now:
+            new = self.submit('g', 'h', 'i')
+        old_created_at = (timezone.now() - datetime.timedelta(days=40)).replace(microsecond=0)
+        FormSubmission.objects.filter(pk__in=[old.pk, old_compact.pk]).update(
+            created_at=old_created_at)
+
+        old_values = old.as_dict()
+
+        output = StringIO()
+        call_command('archive_form_submissions', days=30, stdout=output)
+
+        self.assertIn('reclaimed 5 rows (2 submissions, 3 values)', output.getvalue())
+        self.assertEqual(list(self.form.submissions), [new])
+        self.assertEqual(FormValue.objects.count(), 3)
+        self.assertEqual(self.form.submission_count, 1)
+
+        archived = self.form.archived_submissions.get(pk=old.pk)
+        self.assertEqual(archived.as_dict(), dict(old_values, created_at=old_created_at))
+
+        csv_output = StringIO()
+        self.form.submissions.to_csv(csv_output, archived=self.form.archived_submissions)
+        self.assertEqual(force_text(csv_output.getvalue()), (
+            "Created at,field 1,field 2,field 3\r\n"
+            "%s,a,b,c\r\n"
+            "%s,d,e,f\r\n"
+            "%s,g,h,i\r\n" % (old_created_at, old_created_at, now))
+        )
+
+    def test_submission_filters(self):
+        old = self.submit('apple', 'b', 'c')
+        FormSubmission.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - datetime.timedelta(days=10))
+        new = self.submit('banana', 'b', 'c')
+        with override_settings(FORM_BUILDER_COMPACT_SUBMISSIONS=True):
+            compact = self.submit('Pineapple', 'b', 'c')
+
+        submissions = self.form.submissions
+        self.assertEqual(set(submissions.value_contains('APPLE')), set([old, compact]))
+        self.assertEqual(list(submissions.value_contains('banana')), [new])
+        # the rest of the JSON isn't searched
+        self.assertEqual(list(submissions.value_contains('name')), [])
+        self.assertEqual(list(submissions.value_contains(force_text(self.fields[0].ident))), [])
+        self.assertEqual(
+            set(submissions.created_between(start=timezone.now() - datetime.timedelta(days=1))),
+            set([new, compact]))
+
+        filter_form = SubmissionFilterForm({
+            'created_before': (timezone.now() - datetime.timedelta(days=5)).date(),
+        })
+        self.assertTrue(filter_form.has_filters())
+        self.assertEqual(list(filter_form.filter(submissions)), [old])
+        self.assertFalse(SubmissionFilterForm({}).has_filters())
+
+    @override_settings(FORM_BUILDER_COMPACT_SUBMISSIONS=True)
+    def test_compact_submissions(self):
+        with mock_now() as now:
+            submission = self.submit('a', 'b', 'c')
+        self.assertTrue(submission.is_compact)
+        self.assertFalse(submission.values.exists())
+        self.assertEqual(submission.as_dict(), {
+            'created_at': now,
+            self.fields[0].ident: 'a',
+            self.fields[1].ident: 'b',
+            self.fields[2].ident: 'c',
+        })
+
+        self.fields[2].delete()
+        self.assertEqual(self.form.submissions.get_formfield_labels(), {
+            'created_at': 'Created at',
+            self.fields[0].ident: 'field 1',
+            self.fields[1].ident: 'field 2',
+            self.fields[2].ident: 'field 3',
+        })
+
+        csv_output = StringIO()
+        self.form.submissions.to_csv(csv_output)
+        self.assertEqual(force_text(csv_output.getvalue()), (
+            "Created at,field 1,field 2,field 3\r\n"
+            "%s,a,b,c\r\n" % (now,))
+        )
+
+    def test_compact_form_submissions_command(self):
+        letters = self.submit('a', 'b', 'c')
+        numbers = self.submit('1', '2', '3')
+        expected = [letters.as_dict(), numbers.as_dict()]
+        labels = self.form.submissions.get_formfield_labels()
+
+        call_command('compact_form_submissions', batch_size=1, stdout=StringIO())
+
+        self.assertFalse(FormValue.objects.exists())
+        submissions = self.form.submissions.order_by('pk')
+        self.assertTrue(all(s.is_compact for s in submissions))
+        self.assertEqual([s.as_dict() for s in submissions], expected)
+        self.assertEqual(self.form.submissions.get_formfield_labels(), labels)
+
     def test_clone_new_page(self):
         self.submit('a', 'b', 'c')
         new_form = self.form.node.clone_tree(freeze=False, new_page=True).content
@@ -353,6 +700,33 @@ class TestFormHandler(TestCase):
         self.assertEquals(len(mail.outbox), 1)
         self.assertEquals(mail.outbox[0].to, ['1@example.com'])
 
+    def test_handlers_share_the_form_index(self):
+        self.form.children['meta'].children['handlers'].add_child(widgy_site, EmailUserHandler)
+        frozen = self.form.node.clone_tree(freeze=True).content
+        compiled = frozen.compile()
+        first, second = [h for h in compiled.handlers if isinstance(h, EmailUserHandler)]
+        to_field, = [f for f in compiled.fields.values() if f.ident == self.to_field.ident]
+
+        with self.assertNumQueries(0):
+            self.assertIs(first.form_index, compiled.index)
+            self.assertIs(second.form_index, compiled.index)
+            self.assertEqual(first.parent_form, frozen)
+            self.assertEqual(second.get_email_fields(), [to_field])
+            form_obj = mock.Mock(cleaned_data={
+                to_field.get_formfield_name(): '1@example.com',
+            })
+            self.assertEqual(first.get_to_emails(form_obj), ['1@example.com'])
+
+    def test_editable_form_index_sees_changes(self):
+        compiled = self.form.compile()
+        handler, = [h for h in compiled.handlers if isinstance(h, EmailUserHandler)]
+        self.assertEqual(handler.get_email_fields(), [self.to_field])
+
+        new_field = self.form.children['fields'].add_child(widgy_site, FormInput,
+                                                           type='email', label='cc')
+        self.assertIsNot(handler.form_index, compiled.index)
+        self.assertEqual(handler.get_email_fields(), [self.to_field, new_field])
+
     def test_admin_email_success_handler(self):
         email_handler = self.form.children['meta'].children['handlers'].add_child(widgy_site, EmailSuccessHandler)
         email_handler.to = '2@example.com'
@@ -377,9 +751,41 @@ class TestFormHandler(TestCase):
         email_handler.execute(request, form_obj)
 
         self.assertEquals(len(mail.outbox), 1)
-        self.assertEquals(mail.outbox[0].attachments, [
-            ('asdf.txt', 'foobar', None),
-        ])
+        attachment, = mail.outbox[0].attachments
+        self.assertEqual(attachment.get_filename(), 'asdf.txt')
+        self.assertEqual(attachment.get_content_type(), 'text/plain')
+        self.assertEqual(attachment.get_payload(decode=True), b'foobar')
+        self.assertIn('asdf.txt', mail.outbox[0].message().as_string())
+
+    def test_email_success_handler_encodes_attachments_in_chunks(self):
+        email_handler = self.form.children['meta'].children['handlers'].add_child(widgy_site, EmailSuccessHandler)
+        email_handler.to = '2@example.com'
+        content = bytes(bytearray(range(256))) * 3
+
+        for chunk_size in (1, 7, 57, 100, 1000):
+            email_handler.attachment_chunk_size = chunk_size
+            attachment = email_handler.make_attachment(ContentFile(content, name='uploads/data.bin'))
+            self.assertEqual(attachment.get_filename(), 'data.bin')
+            self.assertEqual(attachment.get_content_type(), 'application/octet-stream')
+            self.assertEqual(attachment.get_payload(decode=True), content)
+            self.assertTrue(all(len(line) <= 76 for line in attachment.get_payload().splitlines()))
+
+    @override_settings(FORM_BUILDER_MAX_ATTACHMENT_SIZE=3)
+    def test_email_success_handler_skips_big_attachments(self):
+        email_handler = self.form.children['meta'].children['handlers'].add_child(widgy_site, EmailSuccessHandler)
+        email_handler.to = '2@example.com'
+        email_handler.save()
+
+        request, form_obj = self.get_execute_args(self.form, {
+            self.to_field.get_formfield_name(): 'ignored@example.com',
+        })
+        form_obj.cleaned_data['small'] = ContentFile('foo', name='small.txt')
+        form_obj.cleaned_data['big'] = ContentFile('foobar', name='big.txt')
+        email_handler.execute(request, form_obj)
+
+        attachment, = mail.outbox[0].attachments
+        self.assertEqual(attachment.get_filename(), 'small.txt')
+        self.assertEqual(attachment.get_payload(decode=True), b'foo')
 
     def test_email_success_handler_to_pointer_works_after_being_committed(self):
         tracker = VersionTracker.objects.create(working_copy=self.form.node)
@@ -414,11 +820,199 @@ class TestFormHandler(TestCase):
         assert form_obj.is_valid()
         return request, form_obj
 
+    @override_settings(FORM_BUILDER_HANDLER_EXECUTOR='widgy.contrib.form_builder.executors.DatabaseExecutor')
+    def test_database_executor(self):
+        request, form_obj = self.get_execute_args(self.form, {
+            self.to_field.get_formfield_name(): '1@example.com',
+        })
+        self.form.execute(request, form_obj)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(SuccessHandlerJob.objects.count(), 1)
+
+        call_command('run_form_handler_jobs', once=True)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['1@example.com'])
+        self.assertFalse(SuccessHandlerJob.objects.exists())
+
+    def test_failed_jobs_are_retried(self):
+        request, form_obj = self.get_execute_args(self.form, {
+            self.to_field.get_formfield_name(): '1@example.com',
+        })
+        SuccessHandlerJob.objects.enqueue(self.email_handler, form_obj)
+
+        with mock.patch.object(EmailUserHandler, 'execute') as execute:
+            execute.side_effect = ValueError('boom')
+            job = SuccessHandlerJob.objects.claim_next()
+            self.assertFalse(job.run_and_record(max_attempts=2))
+            self.assertIsNone(SuccessHandlerJob.objects.claim_next())
+
+            job = SuccessHandlerJob.objects.get()
+            self.assertEqual(job.status, SuccessHandlerJob.PENDING)
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertIn('boom', job.last_error)
+
+            SuccessHandlerJob.objects.update(run_after=timezone.now())
+            self.assertFalse(SuccessHandlerJob.objects.claim_next().run_and_record(max_attempts=2))
+            self.assertEqual(SuccessHandlerJob.objects.get().status, SuccessHandlerJob.FAILED)
+
+    def test_expired_jobs_are_reclaimed(self):
+        request, form_obj = self.get_execute_args(self.form, {
+            self.to_field.get_formfield_name(): '1@example.com',
+        })
+        SuccessHandlerJob.objects.enqueue(self.email_handler, form_obj)
+
+        job = SuccessHandlerJob.objects.claim_next(lease=60)
+        self.assertIsNone(SuccessHandlerJob.objects.claim_next(lease=60))
+
+        # the worker died
+        SuccessHandlerJob.objects.update(claimed_at=timezone.now() - datetime.timedelta(seconds=61))
+        reclaimed = SuccessHandlerJob.objects.claim_next(lease=60)
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual(reclaimed.attempts, 2)
+        self.assertIsNone(SuccessHandlerJob.objects.claim_next(lease=60))
+
+        self.assertTrue(reclaimed.run_and_record())
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_outcome_is_only_recorded_by_the_claim_holder(self):
+        request, form_obj = self.get_execute_args(self.form, {
+            self.to_field.get_formfield_name(): '1@example.com',
+        })
+        SuccessHandlerJob.objects.enqueue(self.email_handler, form_obj)
+
+        job = SuccessHandlerJob.objects.claim_next(lease=60)
+        SuccessHandlerJob.objects.update(claimed_at=timezone.now() - datetime.timedelta(seconds=61))
+        reclaimed = SuccessHandlerJob.objects.claim_next(lease=60)
+
+        # the first worker finishes after its lease expired
+        with mock.patch.object(EmailUserHandler, 'execute', side_effect=ValueError('boom')):
+            self.assertFalse(job.run_and_record(max_attempts=1))
+        self.assertTrue(job.run_and_record())
+        row = SuccessHandlerJob.objects.get()
+        self.assertEqual(row.status, SuccessHandlerJob.RUNNING)
+        self.assertEqual(row.claimed_at, reclaimed.claimed_at)
+        self.assertEqual(row.last_error, '')
+
+        with mock.patch.object(EmailUserHandler, 'execute', side_effect=ValueError('boom')):
+            self.assertFalse(reclaimed.run_and_record())
+        row = SuccessHandlerJob.objects.get()
+        self.assertEqual(row.status, SuccessHandlerJob.PENDING)
+        self.assertIsNone(row.claimed_at)
+        self.assertIn('boom', row.last_error)
+
+    def test_deferred_uploads_use_the_field_storage(self):
+        upload = self.form.children['fields'].add_child(widgy_site, FileUpload)
+        upload.storage = storage = mock.Mock()
+        storage.get_valid_name.side_effect = lambda name: name
+        storage.save.return_value = 'form-uploads/a.txt'
+        name = upload.get_formfield_name()
+        form_obj = mock.Mock(cleaned_data={name: ContentFile(b'a', name='a.txt')},
+                             widgy_fields={name: upload}, widgy_submission=None)
+
+        with mock.patch('widgy.contrib.form_builder.executors.default_storage') as default:
+            deferred = deserialize_form(serialize_form(form_obj), {name: upload})
+        self.assertFalse(default.open.called)
+        storage.open.assert_called_once_with('form-uploads/a.txt')
+        self.assertEqual(deferred.cleaned_data[name].widgy_storage_name, 'form-uploads/a.txt')
+
     def test_post_create_autofill(self):
         email_handler2 = self.form.children['meta'].children['handlers'].add_child(widgy_site, EmailUserHandler)
         self.assertEqual(email_handler2.to_ident, self.to_field.ident)
 
 
+class RecordingRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append((self.client_address, body))
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class RecordingServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    status = 200
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), RecordingRequestHandler)
+        self.received = []
+        self.url = 'http://127.0.0.1:%d/post/' % self.server_port
+
+
+class TestDelivery(TestCase):
+    def setUp(self):
+        self.server = RecordingServer()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_deliver_concurrently(self):
+        engine = DeliveryEngine(max_workers=2, timeout=5)
+        engine.deliver([
+            Delivery(self.server.url, b'a=1'),
+            Delivery(self.server.url, b'a=2'),
+        ])
+
+        self.assertEqual(sorted(body for address, body in self.server.received), [b'a=1', b'a=2'])
+        self.assertEqual(
+            list(RepostDelivery.objects.values_list('status', 'status_code')),
+            [(RepostDelivery.DELIVERED, 200)] * 2)
+
+    def test_connections_are_reused(self):
+        engine = DeliveryEngine(max_workers=1, timeout=5)
+        engine.deliver([Delivery(self.server.url, b'a=1')])
+        engine.deliver([Delivery(self.server.url, b'a=2')])
+
+        addresses = [address for address, body in self.server.received]
+        self.assertEqual(len(addresses), 2)
+        self.assertEqual(addresses[0], addresses[1])
+
+    def test_stale_connections_are_retried(self):
+        engine = DeliveryEngine(max_workers=1, timeout=5)
+        stale = mock.Mock()
+        stale.request.side_effect = socket.error('Broken pipe')
+        get = engine.pool.get
+        with mock.patch.object(engine.pool, 'get',
+                               side_effect=lambda scheme, netloc, reuse: (stale, True) if reuse else get(scheme, netloc, reuse)):
+            engine.deliver([Delivery(self.server.url, b'a=1')])
+
+        self.assertEqual([body for address, body in self.server.received], [b'a=1'])
+
+    def test_sent_requests_are_not_retried(self):
+        engine = DeliveryEngine(max_workers=1, timeout=5)
+        connection = mock.Mock()
+        connection.getresponse.side_effect = socket.error('Connection reset by peer')
+        with mock.patch.object(engine.pool, 'get', return_value=(connection, True)) as get:
+            with self.assertRaises(DeliveryError):
+                engine.deliver([Delivery(self.server.url, b'a=1')])
+
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(connection.request.call_count, 1)
+
+    def test_failures_open_the_circuit(self):
+        self.server.status = 500
+        engine = DeliveryEngine(timeout=5, failure_threshold=2, reset_timeout=60)
+        for i in range(3):
+            with self.assertRaises(DeliveryError):
+                engine.deliver([Delivery(self.server.url, b'a=1')])
+
+        self.assertEqual(len(self.server.received), 2)
+        self.assertEqual(
+            list(RepostDelivery.objects.order_by('pk').values_list('status', flat=True)),
+            [RepostDelivery.FAILED, RepostDelivery.FAILED, RepostDelivery.SKIPPED])
+
+
 class TestFormCompatibility(TestCase):
     @unittest.expectedFailure
     def test_uncaptcha_compatibility(self):
@@ -481,3 +1075,65 @@ class TestFileUpload(TestCase):
             file_upload.generate_filename(temp_uploaded_file.name)
         )
         os.remove(uploaded_file_path)
+
+    def test_upload_size_limit(self):
+        form = Form.add_root(widgy_site)
+        file_upload = form.children['fields'].add_child(widgy_site, FileUpload, label='File', max_size=1)
+        name = file_upload.get_formfield_name()
+        form_class = form.build_form_class()
+        self.assertEqual(form_class.widgy_upload_limits, {name: 1024})
+
+        request = RequestFactory().post('/', {
+            name: SimpleUploadedFile('big.txt', b'x' * 2048),
+        })
+        upload_handler = SizeLimitUploadHandler(form_class.widgy_upload_limits, request)
+        request.upload_handlers.insert(0, upload_handler)
+        # the file is dropped while it's being received
+        self.assertNotIn(name, request.FILES)
+        self.assertEqual(upload_handler.exceeded, {name: 1024})
+
+        # files that didn't go through the handler are validated by the field
+        form_obj = form_class({}, {name: SimpleUploadedFile('big.txt', b'x' * 2048)})
+        self.assertFalse(form_obj.is_valid())
+        self.assertEqual(form_obj.errors[name][0], 'The file is too big, the maximum size is 1.0\xa0KB.')
+
+        form_obj = form_class({}, {name: SimpleUploadedFile('small.txt', b'x' * 1024)})
+        self.assertTrue(form_obj.is_valid())
+
+    def test_uploads_are_limited_before_the_csrf_check(self):
+        form = Form.add_root(widgy_site)
+        file_upload = form.children['fields'].add_child(widgy_site, FileUpload, label='File', max_size=1)
+        view = type(str('FormView'), (HandleFormMixin, View), {}).as_view()
+
+        request = RequestFactory().post('/', {
+            file_upload.get_formfield_name(): SimpleUploadedFile('big.txt', b'x' * 2048),
+        })
+        # there's no CSRF cookie, the request is rejected without being read
+        with self.assertNumQueries(0):
+            response = view(request, form_node_pk=form.node.pk)
+        self.assertEqual(response.status_code, 403)
+        self.assertIsInstance(request.upload_handlers[0], SizeLimitUploadHandler)
+        self.assertFalse(hasattr(request, '_files'))
+
+        # there's a CSRF cookie but no token, the files are received to
+        # look for it, and limited
+        request = RequestFactory().post('/', {
+            file_upload.get_formfield_name(): SimpleUploadedFile('big.txt', b'x' * 2048),
+        })
+        request.COOKIES[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        response = view(request, form_node_pk=form.node.pk)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(request.upload_handlers[0].exceeded, {file_upload.get_formfield_name(): 1024})
+        self.assertNotIn(file_upload.get_formfield_name(), request.FILES)
+
+    def test_post_without_csrf_token_is_forbidden(self):
+        form = Form.add_root(widgy_site)
+        field = form.children['fields'].add_child(widgy_site, FormInput, label='Name', type='text')
+        view = type(str('FormView'), (HandleFormMixin, View), {}).as_view()
+
+        request = RequestFactory().post('/', {field.get_formfield_name(): 'name'})
+        request.COOKIES[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        with self.assertNumQueries(0):
+            response = view(request, form_node_pk=form.node.pk)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(FormSubmission.objects.exists())
@@ -0,0 +1,71 @@
+"""
+Size limits for the files uploaded to a Form.
+
+The limit of a FileUpload is enforced by SizeLimitUploadHandler while the
+request is being parsed, so an oversized file is dropped before it's been
+buffered to memory or disk. MaxUploadSizeValidator checks the same limit on
+the form field, for files that didn't go through the handler.
+"""
+from __future__ import unicode_literals
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.template.defaultfilters import filesizeformat
+from django.utils.translation import ugettext as _
+
+
+def get_size_error(limit):
+    return ValidationError(
+        _('The file is too big, the maximum size is %(limit)s.') % {'limit': filesizeformat(limit)},
+        code='max_size',
+    )
+
+
+class MaxUploadSizeValidator(object):
+    def __init__(self, limit):
+        self.limit = limit
+
+    def __call__(self, value):
+        if value is not None and value.size > self.limit:
+            raise get_size_error(self.limit)
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """
+    Stops receiving a file as soon as it's bigger than the limit of its
+    field. `limits` maps formfield names to a size in bytes, it can also be a
+    function returning them, called when the upload starts. The fields whose
+    file was dropped are kept in `exceeded`, mapped to their limit.
+
+    It has to come before the handlers that store the file, it only passes
+    the data on to them.
+    """
+
+    def __init__(self, limits, request=None):
+        super(SizeLimitUploadHandler, self).__init__(request)
+        self.limits = limits
+        self.exceeded = {}
+        self.limit = None
+
+    def handle_raw_input(self, *args, **kwargs):
+        if callable(self.limits):
+            self.limits = self.limits()
+
+    def new_file(self, field_name, file_name, content_type, content_length, *args, **kwargs):
+        super(SizeLimitUploadHandler, self).new_file(
+            field_name, file_name, content_type, content_length, *args, **kwargs)
+        self.limit = self.limits.get(field_name)
+        if self.limit is not None and content_length is not None and content_length > self.limit:
+            self.reject()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.limit is not None and start + len(raw_data) > self.limit:
+            self.reject()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def reject(self):
+        self.exceeded[self.field_name] = self.limit
+        raise SkipFile
@@ -1,19 +1,49 @@
 from django.views.generic.edit import FormMixin
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from widgy.models import Node
 
+from .uploads import SizeLimitUploadHandler, get_size_error
+
 
 class HandleFormMixin(FormMixin):
     """
     An abstract view mixin for handling form_builder.Form submissions.
     """
+    widgy_form_class = None
+    upload_handler = None
+
+    @method_decorator(csrf_exempt)
+    def dispatch(self, request, *args, **kwargs):
+        # CsrfViewMiddleware would read request.POST before the view runs,
+        # receiving the uploads before their size can be limited. The upload
+        # handler is put in place first, then protected_dispatch makes the
+        # check. Nothing reads the request or the database until then, the
+        # handler only looks the limits up once the files are received.
+        self.request, self.args, self.kwargs = request, args, kwargs
+        if request.method in ('POST', 'PUT') and kwargs.get('form_node_pk') is not None:
+            self.upload_handler = self.limit_upload_sizes()
+        return self.protected_dispatch(request, *args, **kwargs)
+
+    @method_decorator(csrf_protect)
+    def protected_dispatch(self, request, *args, **kwargs):
+        return super(HandleFormMixin, self).dispatch(request, *args, **kwargs)
+
     def post(self, *args, **kwargs):
         """
         copied from django.views.generic.edit.ProcessFormView, because we want
         the post method, but not the get method.
         """
-        form_class = self.get_form_class()
+        form_class = self.widgy_form_class or self.get_form_class()
+        upload_handler = self.upload_handler
+
         form = self.get_form(form_class)
+        if upload_handler is not None:
+            for name, limit in upload_handler.exceeded.items():
+                # replace the 'required' error of the missing file
+                form.errors.pop(name, None)
+                form.add_error(name, get_size_error(limit))
         if form.is_valid():
             return self.form_valid(form)
         else:
@@ -21,10 +51,25 @@ class HandleFormMixin(FormMixin):
 
     put = post
 
+    def limit_upload_sizes(self):
+        """
+        Installs a SizeLimitUploadHandler for the file fields of the form, if
+        the request hasn't been parsed already.
+        """
+        if hasattr(self.request, '_files'):
+            return None
+        upload_handler = SizeLimitUploadHandler(self.get_upload_limits, self.request)
+        self.request.upload_handlers.insert(0, upload_handler)
+        return upload_handler
+
+    def get_upload_limits(self):
+        self.widgy_form_class = self.get_form_class()
+        return getattr(self.widgy_form_class, 'widgy_upload_limits', None) or {}
+
     def get_form_node(self):
-        node = get_object_or_404(Node, pk=self.kwargs['form_node_pk'])
-        node.prefetch_tree()
-        return node
+        # The tree isn't prefetched, Form.compile walks it once when the
+        # compiled form isn't cached.
+        return get_object_or_404(Node, pk=self.kwargs['form_node_pk'])
 
     def get_form_class(self):
         self.form_node = self.get_form_node()
@@ -19,7 +19,7 @@ from widgy.db.fields import WidgyField
 from widgy.contrib.page_builder.db.fields import MarkdownField, VideoField, ImageField
 from widgy.contrib.page_builder.forms import CKEditorField
 from widgy.signals import pre_delete_widget
-from widgy.utils import build_url, SelectRelatedManager
+from widgy.utils import build_url, SelectRelatedManager, html_to_plaintext
 import widgy
 
 
@@ -37,6 +37,9 @@ class BaseLayout(StrictDefaultChildrenMixin, Content):
     def valid_child_of(cls, content, obj=None):
         return False
 
+    def get_search_text(self):
+        return ''
+
 
 class Layout(BaseLayout):
     """
@@ -54,6 +57,9 @@ class Bucket(Content):
     class Meta:
         abstract = True
 
+    def get_search_text(self):
+        return ''
+
 
 @widgy.register
 class MainContent(Bucket):
@@ -112,6 +118,10 @@ class Markdown(Content):
         verbose_name = _('markdown')
         verbose_name_plural = _('markdowns')
 
+    def get_search_text(self):
+        from widgy.templatetags.widgy_tags import mdown
+        return html_to_plaintext(mdown(self.content))
+
 
 class HtmlForm(forms.ModelForm):
     content = CKEditorField(label=_('Content'))
@@ -131,6 +141,9 @@ class Html(Content):
         verbose_name = _('HTML')
         verbose_name_plural = _('HTML editors')
 
+    def get_search_text(self):
+        return html_to_plaintext(self.content)
+
 
 @widgy.register
 class UnsafeHtml(Content):
@@ -145,6 +158,9 @@ class UnsafeHtml(Content):
         verbose_name = _('unsafe HTML')
         verbose_name_plural = _('unsafe HTML editors')
 
+    def get_search_text(self):
+        return html_to_plaintext(self.content)
+
 
 @widgy.register
 class CalloutBucket(Bucket):
@@ -271,6 +287,9 @@ class Section(StrDisplayNameMixin, Content):
     def __str__(self):
         return self.title
 
+    def get_search_text(self):
+        return self.title
+
 
 @widgy.register
 class Image(Content):
@@ -285,6 +304,9 @@ class Image(Content):
         verbose_name = _('image')
         verbose_name_plural = _('images')
 
+    def get_search_text(self):
+        return self.image and self.image.default_alt_text or ''
+
 
 class TableElement(Content):
     class Meta:
@@ -304,6 +326,9 @@ class TableElement(Content):
     def sibling_index(self):
         return self.get_siblings().index(self)
 
+    def get_search_text(self):
+        return ''
+
 
 @widgy.register
 class TableRow(TableElement):
@@ -514,6 +539,9 @@ class Figure(StrDisplayNameMixin, Content):
     def __str__(self):
         return self.title or ''
 
+    def get_search_text(self):
+        return ' '.join(filter(None, [self.title, self.caption]))
+
 
 @widgy.register
 @python_2_unicode_compatible
@@ -531,6 +559,9 @@ class Video(StrDisplayNameMixin, Content):
     def __str__(self):
         return self.video
 
+    def get_search_text(self):
+        return ''
+
 
 class ButtonForm(LinkFormMixin, forms.ModelForm):
     link = LinkFormField(label=_('Link'), required=False)
@@ -559,6 +590,9 @@ class Button(StrDisplayNameMixin, Content):
             return self.text
         return ''
 
+    def get_search_text(self):
+        return self.text or ''
+
 
 @widgy.register
 @python_2_unicode_compatible
@@ -588,6 +622,9 @@ class GoogleMap(StrDisplayNameMixin, Content):
     def __str__(self):
         return truncatechars(self.address, 35)
 
+    def get_search_text(self):
+        return ''
+
     def get_maptype_short(self):
         return {
             'roadmap': 'm',
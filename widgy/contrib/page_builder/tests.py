@@ -5,10 +5,11 @@ from django.test import TestCase
 from widgy.site import WidgySite
 from widgy.models import Node
 from widgy.exceptions import ParentChildRejection
+from widgy.utils import get_tree_search_text
 
 from widgy.contrib.page_builder.models import (
     Table, TableRow, TableHeaderData, TableHeader, TableBody,
-    Accordion, Video, MainContent
+    Accordion, Video, MainContent, Html, Figure, Button
 )
 from widgy.contrib.page_builder.forms import CKEditorField
 
@@ -243,3 +244,33 @@ class TestVideoWidget(TestCase):
 
         video = content.get_children()[0]
         self.assertEqual(video.video.embed_url, '//youtube.com/embed/dQw4w9WgXcQ')
+
+
+class TestSearchText(TestCase):
+    def test_search_text(self):
+        content = MainContent.add_root(widgy_site)
+        content.add_child(widgy_site, Html, content='<p>Some <em>text</em></p>')
+        accordion = content.add_child(widgy_site, Accordion)
+        figure = content.add_child(widgy_site, Figure, title='Title', caption='Caption')
+        figure.add_child(widgy_site, Button, text='Click')
+        content.add_child(widgy_site, Video, video='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+
+        rendered = []
+
+        def render(content):
+            rendered.append(content)
+            return ''
+
+        node = Node.objects.get(pk=content.node.pk)
+        node.prefetch_tree()
+        with self.assertNumQueries(0):
+            text = get_tree_search_text(node.content, render)
+
+        self.assertEqual(rendered, [])
+        self.assertEqual(text.split(), [
+            'Some', 'text',
+            'Title', '1', 'Title', '2',
+            'Title', 'Caption', 'Click',
+        ])
+        # the accordion's own text is empty
+        self.assertEqual(accordion.get_search_text(), '')
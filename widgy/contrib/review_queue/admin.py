@@ -75,10 +75,10 @@ class VersionCommitAdminBase(AuthorizedAdminMixin, ModelAdmin):
         return actions
 
     def approve_selected(self, request, queryset):
-        for c in queryset:
-            c.approve(request.user)
+        approved_pks = list(queryset.values_list('pk', flat=True))
+        queryset.approve(request.user)
 
-        commit_count = queryset.count()
+        commit_count = len(approved_pks)
 
         message = ungettext(
             '%d commit has been approved.',
@@ -92,7 +92,7 @@ class VersionCommitAdminBase(AuthorizedAdminMixin, ModelAdmin):
             message,
             UndoApprovalsForm(
                 initial={
-                    'actions': [c.pk for c in queryset],
+                    'actions': approved_pks,
                     'referer': request.path,
                 }
             ).render(request, self.get_site())
@@ -1,19 +1,93 @@
+from optparse import make_option
+
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Min, Max
 
 
 class Command(BaseCommand):
+    """
+    Creates a ReviewedVersionCommit for every VersionCommit that doesn't have
+    one. The child rows are inserted straight from the parent table with an
+    ``INSERT ... SELECT``, one range of commit ids at a time, so the parent rows
+    are never re-saved.
+
+    Each batch is committed on its own and commits that already have a
+    ReviewedVersionCommit are skipped, so an interrupted run can simply be
+    restarted (or resumed from the last id it reported with ``--start-id``).
+    """
     help = 'Creates the required ReviewedVersionCommit objects when migrating to a ReviewedWidgySite'
 
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size',
+                    type='int',
+                    dest='batch_size',
+                    default=10000,
+                    help="The number of commit ids to process per batch"),
+        make_option('--start-id',
+                    type='int',
+                    dest='start_id',
+                    default=None,
+                    help="Skip the commits with a lower id"),
+    )
+
     def handle(self, *args, **options):
         # XXX: why doesn't this work at the top-level?
         from widgy.models.versioning import VersionCommit
+
+        batch_size = options['batch_size']
+        missing = VersionCommit.objects.filter(reviewedversioncommit=None)
+        if options['start_id'] is not None:
+            missing = missing.filter(pk__gte=options['start_id'])
+
+        bounds = missing.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write('Nothing to do.\n')
+            return
+        total = missing.count()
+
+        done = 0
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            end = min(start + batch_size, bounds['last'] + 1)
+            with transaction.atomic():
+                done += self.populate_range(start, end)
+            self.stdout.write('Populated %d of %d commits (up to id %d)\n' % (
+                done, total, end - 1))
+
+    def get_insert_sql(self):
+        from widgy.models.versioning import VersionCommit
         from widgy.contrib.review_queue.models import ReviewedVersionCommit
 
-        for commit in VersionCommit.objects.filter(reviewedversioncommit=None):
-            new_commit = ReviewedVersionCommit(
-                versioncommit_ptr=commit,
-                approved_at=commit.created_at,
-                approved_by_id=commit.author_id,
-            )
-            new_commit.__dict__.update(commit.__dict__)
-            new_commit.save()
+        qn = connection.ops.quote_name
+        parent_opts = VersionCommit._meta
+        child_opts = ReviewedVersionCommit._meta
+
+        def column(opts, name):
+            return qn(opts.get_field(name).column)
+
+        return (
+            'INSERT INTO {child} ({ptr}, {approved_at}, {approved_by}) '
+            'SELECT {parent}.{pk}, {parent}.{created_at}, {parent}.{author} '
+            'FROM {parent} '
+            'WHERE {parent}.{pk} >= %s AND {parent}.{pk} < %s '
+            'AND NOT EXISTS (SELECT 1 FROM {child} WHERE {child}.{ptr} = {parent}.{pk})'
+        ).format(
+            child=qn(child_opts.db_table),
+            ptr=column(child_opts, 'versioncommit_ptr'),
+            approved_at=column(child_opts, 'approved_at'),
+            approved_by=column(child_opts, 'approved_by'),
+            parent=qn(parent_opts.db_table),
+            pk=qn(parent_opts.pk.column),
+            created_at=column(parent_opts, 'created_at'),
+            author=column(parent_opts, 'author'),
+        )
+
+    def populate_range(self, start, end):
+        """
+        Creates the missing ReviewedVersionCommits for commit ids in
+        [start, end). Existing commits are assumed to be approved by their
+        author. Returns the number of rows created.
+        """
+        cursor = connection.cursor()
+        cursor.execute(self.get_insert_sql(), [start, end])
+        return cursor.rowcount
@@ -1,12 +1,16 @@
-from django.db import models
+from django.db import models, transaction
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.conf import settings
 
+from widgy.signals import published_tree_changed
 from widgy.utils import QuerySet
 
 from widgy.models.versioning import VersionTracker, VersionCommit
 
+from .signals import bulk_approval_changed
+
 
 class ReviewedVersionCommit(VersionCommit):
     approved_by = models.ForeignKey(getattr(settings, 'AUTH_USER_MODEL', 'auth.User'),
@@ -27,6 +31,29 @@ class ReviewedVersionCommit(VersionCommit):
             return self.exclude(approved_at__isnull=True,
                                 approved_by__isnull=True)
 
+        def _set_approval(self, approved, **values):
+            pks = list(self.values_list('pk', flat=True))
+            if not pks:
+                return 0
+            # Filter by pk, self might not match the commits anymore after the
+            # update (self.unapproved().approve(), for example).
+            commits = self.model.objects.filter(pk__in=pks)
+            with transaction.atomic():
+                count = commits.update(**values)
+                bulk_approval_changed.send(sender=self.model, commits=commits, approved=approved)
+            return count
+
+        def approve(self, user):
+            """
+            Approves all the commits in one query. Unlike
+            ReviewedVersionCommit.approve, this sends bulk_approval_changed
+            instead of post_save.
+            """
+            return self._set_approval(True, approved_at=timezone.now(), approved_by=user)
+
+        def unapprove(self, user=None):
+            return self._set_approval(False, approved_at=None, approved_by=None)
+
     objects = ReviewedVersionCommitQuerySet.as_manager()
 
     @property
@@ -68,6 +95,20 @@ class ReviewedVersionTracker(VersionTracker):
     def commit_is_ready(self, commit):
         return commit.is_published and commit.reviewedversioncommit.is_approved
 
+    def get_ready_commits(self):
+        return super(ReviewedVersionTracker, self).get_ready_commits().filter(
+            reviewedversioncommit__approved_by__isnull=False,
+            reviewedversioncommit__approved_at__isnull=False,
+        )
+
+    def get_commit_summary(self):
+        summary = super(ReviewedVersionTracker, self).get_commit_summary()
+        summary['unapproved'] = self.get_commits_ahead_of_published().exclude(
+            reviewedversioncommit__approved_by__isnull=False,
+            reviewedversioncommit__approved_at__isnull=False,
+        ).count()
+        return summary
+
     @property
     def commits(self):
         # XXX: This select_related is overriden in get_history_list.
@@ -80,3 +121,20 @@ class ReviewedVersionTracker(VersionTracker):
     def _commits_to_clone(self):
         for c in super(ReviewedVersionTracker, self)._commits_to_clone():
             yield c.reviewedversioncommit
+
+
+@receiver(models.signals.post_save, sender=ReviewedVersionCommit)
+def approval_changed(sender, instance, created, raw=False, **kwargs):
+    # A new commit isn't approved yet. Otherwise the save might have changed
+    # its approval, which only matters if it's already published.
+    if not (created or raw) and instance.is_published:
+        published_tree_changed.send(sender=ReviewedVersionTracker, tracker_ids=[instance.tracker_id])
+
+
+@receiver(bulk_approval_changed, sender=ReviewedVersionCommit)
+def bulk_approval_changed_published_trees(sender, commits, approved, **kwargs):
+    tracker_ids = set(commits.filter(
+        publish_at__lte=timezone.now(),
+    ).values_list('tracker_id', flat=True))
+    if tracker_ids:
+        published_tree_changed.send(sender=ReviewedVersionTracker, tracker_ids=tracker_ids)
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+
+# Sent by ReviewedVersionCommitQuerySet.approve and unapprove, which don't
+# send post_save for each commit. `commits` is a queryset of the commits
+# whose approval changed.
+bulk_approval_changed = Signal(providing_args=['commits', 'approved'])
@@ -100,8 +100,7 @@ class UndoApprovalsView(AuthorizedMixin, FormView):
         if not all(self.site.has_change_permission(self.request, c) for c in commits):
             raise PermissionDenied(_("You don't have permission to approve commits."))
 
-        for c in commits:
-            c.unapprove(self.request.user)
+        commits.unapprove(self.request.user)
         url = form.cleaned_data['referer']
         if not is_safe_url(url=url, host=self.request.get_host()):
             url = '/'
@@ -12,18 +12,82 @@ from django.conf import settings
 from django.conf.urls import include, url, patterns
 from django.conf.urls.i18n import i18n_patterns
 from django.core import urlresolvers
+from django.db.models import Min, Max, Count
+from django.utils import timezone
+
+from mezzanine.core.models import CONTENT_STATUS_PUBLISHED
 
 from .models import UrlconfIncludePage
 
 
 class PatchUrlconfMiddleware(object):
+    # (class, root urlconf, logged_in) -> (version, valid_until, urlconf)
+    _urlconf_cache = {}
+
     def process_request(self, request):
         root_urlconf = getattr(request, 'urlconf', settings.ROOT_URLCONF)
-        if isinstance(root_urlconf, six.string_types):
-            root_urlconf = import_module(root_urlconf)
-        request.urlconf = self.get_urlconf(root_urlconf, self.get_pages(logged_in=request.user.is_authenticated()))
+        request.urlconf = self.get_cached_urlconf(root_urlconf, logged_in=request.user.is_authenticated())
+        request._patch_urlconf_middleware_root_urlconf = root_urlconf
         request._patch_urlconf_middleware_urlconf = request.urlconf
 
+    @classmethod
+    def get_cached_urlconf(cls, root_urlconf, logged_in):
+        """
+        The urlconf for `root_urlconf` and the pages visible when `logged_in`.
+        It's rebuilt when the pages change (see get_urlconf_version) or when
+        one of them is published or expires, otherwise the same module is
+        returned, so Django keeps its resolver.
+        """
+        version = cls.get_urlconf_version()
+        key = (cls, root_urlconf, logged_in)
+        cached = cls._urlconf_cache.get(key)
+        if cached is not None:
+            cached_version, valid_until, urlconf = cached
+            if cached_version == version and (valid_until is None or timezone.now() < valid_until):
+                return urlconf
+            # the resolver of the old urlconf would never be used again
+            urlresolvers.clear_url_caches()
+
+        if isinstance(root_urlconf, six.string_types):
+            root_module = import_module(root_urlconf)
+        else:
+            root_module = root_urlconf
+        valid_until = cls.get_next_publish_change()
+        urlconf = cls.get_urlconf(root_module, cls.get_pages(logged_in=logged_in))
+        cls._urlconf_cache[key] = (version, valid_until, urlconf)
+        return urlconf
+
+    @classmethod
+    def get_urlconf_version(cls):
+        """
+        Changes when an UrlconfIncludePage is created, saved or deleted. It's
+        read from the database, so every process of the site sees a change
+        once it's committed, without sharing a cache. Changes made without
+        saving the pages, like QuerySet.update, aren't seen.
+        """
+        version = UrlconfIncludePage.objects.aggregate(
+            count=Count('pk'),
+            last_pk=Max('pk'),
+            # Mezzanine sets it whenever a page is saved
+            updated=Max('updated'),
+        )
+        return (version['count'], version['last_pk'], version['updated'])
+
+    @classmethod
+    def get_next_publish_change(cls):
+        """
+        The next time a page will be published or will expire, None if there
+        isn't any.
+        """
+        now = timezone.now()
+        qs = UrlconfIncludePage.objects.filter(status=CONTENT_STATUS_PUBLISHED)
+        dates = [
+            qs.filter(publish_date__gt=now).aggregate(date=Min('publish_date'))['date'],
+            qs.filter(expiry_date__gt=now).aggregate(date=Min('expiry_date'))['date'],
+        ]
+        dates = [date for date in dates if date is not None]
+        return min(dates) if dates else None
+
     @classmethod
     def get_pattern_for_page(cls, page):
         return patterns('', url(r'^' + re.escape(page.slug) + '/', include(page.urlconf_name)))
@@ -70,9 +134,11 @@ class PatchUrlconfMiddleware(object):
                 # request.resolver_match.
                 urlresolvers.resolve(request.get_full_path(), request.urlconf)
             except urlresolvers.Resolver404:
-                empty_urlconf = imp.new_module('urlconf')
-                empty_urlconf.urlpatterns = patterns('')
-                urlconf = self.get_urlconf(empty_urlconf, self.get_pages(logged_in=True))
+                # The logged in urlconf only adds the login_required pages,
+                # so if it resolves there, it's one of them.
+                urlconf = self.get_cached_urlconf(
+                    getattr(request, '_patch_urlconf_middleware_root_urlconf', settings.ROOT_URLCONF),
+                    logged_in=True)
                 try:
                     urlresolvers.resolve(request.get_full_path(), urlconf)
                 except urlresolvers.Resolver404:
@@ -80,12 +146,10 @@ class PatchUrlconfMiddleware(object):
                 else:
                     from django.contrib.auth.views import redirect_to_login
                     response = redirect_to_login(request.get_full_path())
-                finally:
-                    urlresolvers.clear_url_caches()
 
-        if hasattr(request, 'urlconf'):
-            urlresolvers.clear_url_caches()
-        if hasattr(request, '_patch_urlconf_middleware_urlconf'):
+        if getattr(request, 'urlconf', None) is not getattr(request, '_patch_urlconf_middleware_urlconf', None):
+            # Something replaced our urlconf during the request, the resolver
+            # of that one would be leaked.
             urlresolvers.clear_url_caches()
 
         return response
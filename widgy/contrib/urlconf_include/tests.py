@@ -1,5 +1,8 @@
+import datetime
 import imp
 
+import mock
+
 import django
 from django.test import TestCase
 from django.test.client import RequestFactory
@@ -8,6 +11,7 @@ from django.http import HttpResponse, HttpResponseNotFound
 from django.core import urlresolvers
 from django.contrib.auth.models import AnonymousUser
 from django.conf.urls import include, url, patterns
+from django.utils import timezone
 
 from widgy.contrib.urlconf_include.middleware import PatchUrlconfMiddleware
 from widgy.contrib.urlconf_include.models import UrlconfIncludePage
@@ -164,3 +168,49 @@ class TestMiddleware(TestCase):
         r = self.get_request('/foo/login/')
         resp = view_not_found(r)
         self.assertEqual(resp.status_code, 404)
+
+    def test_urlconf_cached(self):
+        page = UrlconfIncludePage.objects.create(
+            slug='foo',
+            urlconf_name='django.contrib.auth.urls',
+        )
+
+        r1 = self.get_request()
+        plain_view(r1)
+        r2 = self.get_request()
+        plain_view(r2)
+        self.assertIs(r1.urlconf, r2.urlconf)
+
+        logged_in = self.get_request()
+        logged_in.user.is_authenticated = lambda: True
+        plain_view(logged_in)
+        self.assertIsNot(logged_in.urlconf, r1.urlconf)
+
+        page.slug = 'bar'
+        page.save()
+        r3 = self.get_request()
+        plain_view(r3)
+        self.assertIsNot(r3.urlconf, r1.urlconf)
+
+        page.delete()
+        r4 = self.get_request()
+        plain_view(r4)
+        self.assertIsNot(r4.urlconf, r3.urlconf)
+
+    def test_urlconf_rebuilt_when_published(self):
+        UrlconfIncludePage.objects.create(
+            slug='foo',
+            urlconf_name='django.contrib.auth.urls',
+            publish_date=timezone.now() + datetime.timedelta(hours=1),
+        )
+
+        r1 = self.get_request()
+        plain_view(r1)
+        with self.assertRaises(urlresolvers.Resolver404):
+            urlresolvers.resolve('/foo/login/', r1.urlconf)
+
+        later = timezone.now() + datetime.timedelta(hours=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            r2 = self.get_request()
+            plain_view(r2)
+        self.assertIsNot(r2.urlconf, r1.urlconf)
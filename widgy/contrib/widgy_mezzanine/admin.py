@@ -165,16 +165,9 @@ class WidgyPageAdmin(PageAdmin):
 
     def render_change_form(self, request, context, add=False, change=False, form_url='', obj=None, *args, **kwargs):
         if not add:
-            unapproved = 0
-            future = 0
-            for commit in obj.root_node.get_history_list():
-                if obj.root_node.commit_is_ready(commit):
-                    # got to the currently-published commit
-                    break
-                if self.has_review_queue and not commit.reviewedversioncommit.is_approved:
-                    unapproved += 1
-                if not commit.is_published:
-                    future += 1
+            summary = obj.root_node.get_commit_summary()
+            unapproved = self.has_review_queue and summary.get('unapproved', 0)
+            future = summary['future']
             if unapproved:
                 messages.warning(request, ungettext(
                     "There is one unreviewed commit for this page.",
@@ -321,6 +314,56 @@ def publish_page_on_approve(sender, instance, created, **kwargs):
             )
 
 
+def publish_pages_on_bulk_approval(sender, commits, approved, **kwargs):
+    """
+    The same as publish_page_on_approve, but for many commits at once. The
+    publication state is recomputed once per affected tracker instead of once
+    per commit.
+    """
+    site = get_site(settings.WIDGY_MEZZANINE_SITE)
+    VersionTracker = site.get_version_tracker_model()
+
+    if approved:
+        # Approving several commits of a tracker one by one leaves the page
+        # published at the earliest publish_at.
+        earliest = commits.values('tracker_id').annotate(min=Min('publish_at'))
+        for row in earliest:
+            WidgyPage.objects.filter(root_node=row['tracker_id']).filter(
+                Q(publish_date__gte=row['min']) |
+                Q(status=CONTENT_STATUS_DRAFT)
+            ).update(
+                status=CONTENT_STATUS_PUBLISHED,
+                publish_date=row['min'],
+            )
+        return
+
+    tracker_ids = set(commits.values_list('tracker_id', flat=True))
+    published = set(VersionTracker.objects.filter(
+        pk__in=tracker_ids,
+    ).published().values_list('pk', flat=True))
+    unpublished = tracker_ids - published
+    if not unpublished:
+        return
+
+    scheduled = VersionTracker.commit_model.objects.approved().filter(
+        tracker_id__in=unpublished,
+        publish_at__gt=timezone.now(),
+    ).values('tracker_id').annotate(min=Min('publish_at'))
+    for row in scheduled:
+        # There's a scheduled commit, move publish_date of the page forward
+        # up to the publish_at of the commit.
+        WidgyPage.objects.filter(root_node=row['tracker_id']).update(
+            publish_date=row['min'],
+            status=CONTENT_STATUS_PUBLISHED,
+        )
+        unpublished.discard(row['tracker_id'])
+
+    # no other published commits at all, these pages need to be unpublished
+    WidgyPage.objects.filter(root_node__in=unpublished).update(
+        status=CONTENT_STATUS_DRAFT,
+    )
+
+
 class MultiSiteFormAdmin(FormAdmin):
     def get_queryset(self, request):
         version_tracker_model = self.get_site().get_version_tracker_model()
@@ -400,6 +443,7 @@ admin.site.register(Callout, MultiSiteCalloutAdmin)
 if REVIEW_QUEUE_INSTALLED:
     from widgy.contrib.review_queue.admin import VersionCommitAdminBase
     from widgy.contrib.review_queue.models import ReviewedVersionCommit, ReviewedVersionTracker
+    from widgy.contrib.review_queue.signals import bulk_approval_changed
 
     class VersionCommitAdmin(VersionCommitAdminBase):
         def get_site(self):
@@ -424,3 +468,5 @@ if REVIEW_QUEUE_INSTALLED:
         # In the tests, review_queue is installed but a ReviewedWidgySite might
         # not be in use.
         post_save.connect(publish_page_on_approve, sender=site.get_version_tracker_model().commit_model)
+        bulk_approval_changed.connect(publish_pages_on_bulk_approval,
+                                      sender=site.get_version_tracker_model().commit_model)
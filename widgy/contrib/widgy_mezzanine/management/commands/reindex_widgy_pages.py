@@ -0,0 +1,122 @@
+from __future__ import division
+
+import multiprocessing
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def close_connections():
+    # A forked worker must not share the database connections of its parent.
+    for connection in connections.all():
+        connection.close()
+
+
+def reindex_shard(args):
+    """
+    Indexes the published WidgyPages among `pks` in the haystack connection
+    `using`, `batch_size` pages at a time. The published trees of a batch are
+    prefetched together, and the batch is sent to the backend in one update.
+    Returns the worker number, the number of pages indexed and the time it
+    took.
+    """
+    from haystack import connections as haystack_connections
+    from widgy.contrib.widgy_mezzanine import get_widgypage_model
+    from widgy.models import Node
+
+    worker, using, pks, batch_size = args
+    WidgyPage = get_widgypage_model()
+    field = WidgyPage._meta.get_field('root_node')
+    index = haystack_connections[using].get_unified_index().get_index(WidgyPage)
+    backend = haystack_connections[using].get_backend()
+
+    start = time.time()
+    count = 0
+    for i in range(0, len(pks), batch_size):
+        pages = list(index.index_queryset(using=using).filter(
+            pk__in=pks[i:i + batch_size],
+        ).select_related('root_node', 'root_node__head', 'root_node__head__root_node'))
+
+        roots = []
+        for page in pages:
+            page.widgy_search_root_node = field.get_render_node(page, None)
+            if page.widgy_search_root_node:
+                roots.append(page.widgy_search_root_node)
+        if roots:
+            Node.prefetch_trees(*roots)
+
+        if pages:
+            backend.update(index, pages)
+        count += len(pages)
+    return worker, count, time.time() - start
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the search index of the WidgyPages with a pool of worker
+    processes. The pages are split between the workers, which prepare and
+    send them to the backend in batches.
+    """
+    help = 'Indexes all the published WidgyPages using several processes'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--workers',
+                    type='int',
+                    dest='workers',
+                    default=multiprocessing.cpu_count(),
+                    help="The number of worker processes, 1 to index in this process"),
+        make_option('--batch-size',
+                    type='int',
+                    dest='batch_size',
+                    default=100,
+                    help="The number of pages to prepare and send at once"),
+        make_option('--using',
+                    dest='using',
+                    default='default',
+                    help="The haystack connection to update"),
+        make_option('--clear',
+                    action='store_true',
+                    dest='clear',
+                    default=False,
+                    help="Remove all the pages from the index first"),
+    )
+
+    def handle(self, *args, **options):
+        from haystack import connections as haystack_connections
+        from widgy.contrib.widgy_mezzanine import get_widgypage_model
+
+        WidgyPage = get_widgypage_model()
+        using = options['using']
+        workers = max(options['workers'], 1)
+        index = haystack_connections[using].get_unified_index().get_index(WidgyPage)
+
+        if options['clear']:
+            haystack_connections[using].get_backend().clear(models=[WidgyPage])
+
+        pks = list(index.index_queryset(using=using).order_by('pk').values_list('pk', flat=True))
+        # every worker gets pages from all over the site, which spreads the
+        # big ones around
+        shards = [(worker, using, pks[worker::workers], options['batch_size'])
+                  for worker in range(workers)]
+
+        start = time.time()
+        if workers == 1:
+            results = [reindex_shard(shards[0])]
+        else:
+            close_connections()
+            pool = multiprocessing.Pool(workers, initializer=close_connections)
+            try:
+                results = pool.map(reindex_shard, shards)
+            finally:
+                pool.close()
+                pool.join()
+        elapsed = time.time() - start
+
+        for worker, count, worker_elapsed in results:
+            self.stdout.write('Worker %d: %d pages in %.2fs, %.1f pages/s\n' % (
+                worker, count, worker_elapsed, count / worker_elapsed if worker_elapsed else 0))
+        total = sum(count for worker, count, worker_elapsed in results)
+        self.stdout.write('Indexed %d pages in %.2fs, %.1f pages/s\n' % (
+            total, elapsed, total / elapsed if elapsed else 0))
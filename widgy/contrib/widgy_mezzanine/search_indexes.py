@@ -1,4 +1,5 @@
 from haystack import indexes
+from django.conf import settings
 from django.utils.encoding import force_text
 
 from widgy.contrib.widgy_mezzanine import get_widgypage_model
@@ -30,8 +31,13 @@ class PageIndex(indexes.SearchIndex, indexes.Indexable):
 
     def prepare_text(self, obj):
         context = {'_current_page': obj.page_ptr, 'page': obj.page_ptr}
-        html = render_root(context, obj, 'root_node')
-        content = html_to_plaintext(html)
+        if getattr(settings, 'WIDGY_MEZZANINE_INDEX_BY_RENDERING', False):
+            html = render_root(context, obj, 'root_node')
+            content = html_to_plaintext(html)
+        else:
+            # reindex_widgy_pages prefetches the trees of the pages it indexes
+            node = getattr(obj, 'widgy_search_root_node', None)
+            content = obj._meta.get_field('root_node').get_search_text(obj, context, node=node)
         keywords = ' '.join(self.prepare_keywords(obj))
         return ' '.join([obj.title, keywords, obj.description,
                          content])
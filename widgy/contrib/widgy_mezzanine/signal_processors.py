@@ -0,0 +1,66 @@
+"""
+Keeps the haystack index of WidgyPages up to date as they are published,
+without rebuilding the whole index. Enable it with::
+
+    HAYSTACK_SIGNAL_PROCESSOR = 'widgy.contrib.widgy_mezzanine.signal_processors.PublishedTreeSignalProcessor'
+
+The notify_scheduled_commits command has to be run periodically for the
+commits that are scheduled to be published later.
+"""
+from django.db import models
+from haystack.signals import BaseSignalProcessor
+
+from widgy.contrib.widgy_mezzanine import get_widgypage_model
+from widgy.signals import published_tree_changed
+from widgy.utils import collect_on_commit
+
+WidgyPage = get_widgypage_model()
+
+
+class PublishedTreeSignalProcessor(BaseSignalProcessor):
+    """
+    Reindexes the WidgyPages whose published tree changed, and the ones that
+    were saved. The pages changed in one transaction are collected and
+    reindexed once each when it's committed, `batch_size` pages at a time.
+    """
+    batch_size = 100
+
+    def setup(self):
+        published_tree_changed.connect(self.handle_published_tree_changed)
+        models.signals.post_save.connect(self.handle_page_save, sender=WidgyPage)
+        models.signals.post_delete.connect(self.handle_delete, sender=WidgyPage)
+
+    def teardown(self):
+        published_tree_changed.disconnect(self.handle_published_tree_changed)
+        models.signals.post_save.disconnect(self.handle_page_save, sender=WidgyPage)
+        models.signals.post_delete.disconnect(self.handle_delete, sender=WidgyPage)
+
+    def handle_published_tree_changed(self, sender, tracker_ids, **kwargs):
+        page_pks = WidgyPage.objects.filter(root_node__in=tracker_ids).values_list('pk', flat=True)
+        self.schedule_update(page_pks)
+
+    def handle_page_save(self, sender, instance, raw=False, **kwargs):
+        if not raw:
+            self.schedule_update([instance.pk])
+
+    def schedule_update(self, page_pks):
+        collect_on_commit(self, page_pks, self.update_pages)
+
+    def update_pages(self, page_pks):
+        """
+        Updates the index of the published pages among `page_pks`, and removes
+        the other ones from it.
+        """
+        page_pks = sorted(page_pks)
+        for using in self.connection_router.for_write():
+            index = self.connections[using].get_unified_index().get_index(WidgyPage)
+            backend = self.connections[using].get_backend()
+            for start in range(0, len(page_pks), self.batch_size):
+                batch = page_pks[start:start + self.batch_size]
+                pages = list(index.index_queryset(using=using).filter(pk__in=batch))
+                if pages:
+                    backend.update(index, pages)
+                published = set(page.pk for page in pages)
+                for pk in batch:
+                    if pk not in published:
+                        backend.remove('%s.%s.%s' % (WidgyPage._meta.app_label, WidgyPage._meta.model_name, pk))
@@ -72,7 +72,10 @@ def make_reviewed(fn):
     because on a normal run, you are never going to be changing what models a
     ForeignKey points to (I would hope).
     """
-    from widgy.contrib.widgy_mezzanine.admin import publish_page_on_approve
+    from widgy.contrib.widgy_mezzanine.admin import (
+        publish_page_on_approve, publish_pages_on_bulk_approval,
+    )
+    from widgy.contrib.review_queue.signals import bulk_approval_changed
 
     site = reviewed_widgy_site
     rel = WidgyPage._meta.get_field('root_node').rel
@@ -91,6 +94,9 @@ def make_reviewed(fn):
         post_save.connect(publish_page_on_approve,
                           sender=site.get_version_tracker_model().commit_model,
                           dispatch_uid=dispatch_uid)
+        bulk_approval_changed.connect(publish_pages_on_bulk_approval,
+                                      sender=site.get_version_tracker_model().commit_model,
+                                      dispatch_uid=dispatch_uid)
 
     def down():
         # BBB Django 1.8 compatiblity
@@ -99,6 +105,7 @@ def make_reviewed(fn):
         else:
             rel.model = old_model
         post_save.disconnect(dispatch_uid=dispatch_uid)
+        bulk_approval_changed.disconnect(dispatch_uid=dispatch_uid)
 
     if isinstance(fn, type):
         old_pre_setup = fn._pre_setup
@@ -645,6 +652,46 @@ class TestPublicationCommitHandling(PageSetup, TestCase):
         self.assertEqual(refetch(self.page).status, CONTENT_STATUS_PUBLISHED)
         self.assertEqual(refetch(self.page).publish_date, refetch(c2).publish_at)
 
+    def get_commits(self, *commits):
+        CommitModel = self.vt.commit_model
+        return CommitModel.objects.filter(pk__in=[c.pk for c in commits])
+
+    def test_bulk_approve_publishes(self):
+        self.page.status = CONTENT_STATUS_DRAFT
+        self.page.save()
+
+        c1 = self.vt.commit(publish_at=timezone.now() + datetime.timedelta(days=2))
+        c2 = self.vt.commit(publish_at=timezone.now() + datetime.timedelta(days=1))
+
+        self.assertEqual(self.get_commits(c1, c2).approve(self.user), 2)
+
+        self.assertTrue(refetch(c1).is_approved)
+        self.assertTrue(refetch(c2).is_approved)
+        self.assertEqual(refetch(self.page).status, CONTENT_STATUS_PUBLISHED)
+        self.assertEqual(refetch(self.page).publish_date, refetch(c2).publish_at)
+
+    def test_bulk_unapprove_unpublishes(self):
+        c1 = self.vt.commit()
+        c2 = self.vt.commit()
+        self.get_commits(c1, c2).approve(self.user)
+        self.assertEqual(refetch(self.page).status, CONTENT_STATUS_PUBLISHED)
+
+        self.get_commits(c1).unapprove()
+        self.assertEqual(refetch(self.page).status, CONTENT_STATUS_PUBLISHED)
+
+        self.get_commits(c2).unapprove()
+        self.assertEqual(refetch(self.page).status, CONTENT_STATUS_DRAFT)
+
+    def test_bulk_unapprove_corrects_publish_date(self):
+        c1 = self.vt.commit()
+        c2 = self.vt.commit(publish_at=timezone.now() + datetime.timedelta(days=1))
+        self.get_commits(c1, c2).approve(self.user)
+
+        self.get_commits(c1).unapprove()
+
+        self.assertEqual(refetch(self.page).status, CONTENT_STATUS_PUBLISHED)
+        self.assertEqual(refetch(self.page).publish_date, refetch(c2).publish_at)
+
 
 class TestSelectRelated(PageSetup, TestCase):
     def test_default_manager_selects_related(self):
@@ -6,7 +6,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.utils.functional import SimpleLazyObject
 
 from django.contrib.contenttypes.models import ContentType
-from widgy.utils import fancy_import, update_context
+from widgy.utils import fancy_import, update_context, get_tree_search_text
 
 try:
     from south.modelsinspector import add_introspection_rules
@@ -156,7 +156,11 @@ class WidgyField(models.ForeignKey):
             return 'no content'
 
         root_node.prefetch_tree()
-        env = {
+        with update_context(context, self.get_render_env(model_instance, root_node, context)) as context:
+            return root_node.render(context)
+
+    def get_render_env(self, model_instance, root_node, context):
+        return {
             'widgy': {
                 'site': self.site,
                 'owner': model_instance,
@@ -164,8 +168,22 @@ class WidgyField(models.ForeignKey):
                 'parent': context and context.get('widgy'),
             },
         }
-        with update_context(context, env) as context:
-            return root_node.render(context)
+
+    def get_search_text(self, model_instance, context=None, node=None):
+        """
+        The text of the tree that `render` would render, for the search
+        index. Only the widgets that don't implement get_search_text are
+        rendered.
+        """
+        root_node = node or self.get_render_node(model_instance, context)
+        if not root_node:
+            return ''
+
+        if not hasattr(root_node, '_children'):
+            # it might have been prefetched with others by Node.prefetch_trees
+            root_node.prefetch_tree()
+        with update_context(context, self.get_render_env(model_instance, root_node, context)) as context:
+            return get_tree_search_text(root_node.content, lambda content: content.render(context))
 
     def validate(self, value, model_instance):
         # `value` is our root node's pk. If we're currently creating
@@ -0,0 +1,409 @@
+"""
+A structural diff between two widgy trees.
+
+Widgets in the two trees are matched up, then every widget in the union of
+both trees is reported as inserted, deleted, moved and/or modified. Matching
+happens in this order:
+
+1. The roots are matched if they are of the same type.
+2. Widgets that have an ``ident`` (like form fields) are matched by it.
+3. Starting from matched pairs, unmatched children are matched first by their
+   content hash, then by type in order.
+4. Whatever is left is matched across the whole tree by content hash, which is
+   how widgets that moved to another parent are found.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import logging
+import threading
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.utils.encoding import force_bytes, force_text
+from django.utils.safestring import mark_safe
+from django.utils import translation
+
+from widgy.models import Node
+
+logger = logging.getLogger(__name__)
+
+# Bump this when the output of the diff changes, to invalidate cached diffs.
+DIFF_ENGINE_VERSION = 1
+
+INSERTED = 'inserted'
+DELETED = 'deleted'
+MOVED = 'moved'
+MODIFIED = 'modified'
+
+
+def content_hash(node):
+    """
+    A hash of the type and attributes of the node's content. Two widgets with
+    the same hash are considered to be the same widget.
+    """
+    attributes = sorted(node.content.get_attributes().items())
+    key = '%s:%r' % (node.content_type_id, attributes)
+    return hashlib.sha1(force_bytes(key)).hexdigest()
+
+
+def get_ident(node):
+    ident = getattr(node.content, 'ident', None)
+    return ident and (node.content_type_id, force_text(ident))
+
+
+def longest_increasing_subsequence(seq):
+    """
+    Indexes into `seq` of one of its longest strictly increasing
+    subsequences.
+
+    >>> longest_increasing_subsequence([0, 3, 1, 2])
+    [0, 2, 3]
+    """
+    lengths = []
+    previous = []
+    for i, value in enumerate(seq):
+        length, prev = 1, None
+        for j in range(i):
+            if seq[j] < value and lengths[j] + 1 > length:
+                length, prev = lengths[j] + 1, j
+        lengths.append(length)
+        previous.append(prev)
+
+    if not seq:
+        return []
+    i = max(range(len(seq)), key=lambda k: lengths[k])
+    ret = []
+    while i is not None:
+        ret.append(i)
+        i = previous[i]
+    return ret[::-1]
+
+
+class FieldChange(object):
+    def __init__(self, name, verbose_name, before, after):
+        self.name = name
+        self.verbose_name = verbose_name
+        self.before = before
+        self.after = after
+
+    def __repr__(self):
+        return '<FieldChange %s: %r -> %r>' % (self.name, self.before, self.after)
+
+
+class WidgetDiff(object):
+    """
+    One widget of the union of both trees. `before` and `after` are the nodes
+    in the respective trees, one of them is None if the widget was inserted or
+    deleted.
+    """
+
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+        self.children = []
+        self.moved = False
+        self.field_changes = []
+
+    def __repr__(self):
+        return '<WidgetDiff %s %s>' % (self.content.display_name, self.kinds)
+
+    @property
+    def node(self):
+        return self.after or self.before
+
+    @property
+    def content(self):
+        return self.node.content
+
+    @property
+    def kinds(self):
+        if self.before is None:
+            return [INSERTED]
+        elif self.after is None:
+            return [DELETED]
+        kinds = []
+        if self.moved:
+            kinds.append(MOVED)
+        if self.field_changes:
+            kinds.append(MODIFIED)
+        return kinds
+
+    @property
+    def has_changes(self):
+        return bool(self.kinds) or any(c.has_changes for c in self.children)
+
+    @property
+    def changed_children(self):
+        return [c for c in self.children if c.has_changes]
+
+    def depth_first_order(self):
+        ret = [self]
+        for child in self.children:
+            ret.extend(child.depth_first_order())
+        return ret
+
+    def compute_field_changes(self):
+        before, after = self.before.content, self.after.content
+        if before.equal(after):
+            return
+        before_attributes = before.get_attributes()
+        after_attributes = after.get_attributes()
+        verbose_names = dict(
+            (f.attname, f.verbose_name) for f in after._meta.concrete_fields
+        )
+        for name in sorted(set(before_attributes) | set(after_attributes)):
+            b, a = before_attributes.get(name), after_attributes.get(name)
+            if b != a:
+                self.field_changes.append(FieldChange(
+                    name, verbose_names.get(name, name), b, a,
+                ))
+
+
+class TreeDiff(object):
+    """
+    The structural diff between the trees rooted at `before_root` and
+    `after_root`. Both trees are prefetched, so computing the diff takes a
+    constant number of queries.
+    """
+
+    def __init__(self, before_root, after_root):
+        self.before_root = before_root
+        self.after_root = after_root
+        Node.prefetch_trees(before_root, after_root)
+
+        self.before_to_after = {}
+        self.after_to_before = {}
+        self._match()
+        self.root = self._build()
+
+    def __iter__(self):
+        return iter(self.root.depth_first_order())
+
+    def _by_kind(self, kind):
+        return [w for w in self if kind in w.kinds]
+
+    @property
+    def inserted(self):
+        return self._by_kind(INSERTED)
+
+    @property
+    def deleted(self):
+        return self._by_kind(DELETED)
+
+    @property
+    def moved(self):
+        return self._by_kind(MOVED)
+
+    @property
+    def modified(self):
+        return self._by_kind(MODIFIED)
+
+    @property
+    def has_changes(self):
+        return self.root.has_changes
+
+    def _pair(self, before, after):
+        self.before_to_after[before] = after
+        self.after_to_before[after] = before
+        self._queue.append((before, after))
+
+    def _match(self):
+        self._queue = deque()
+        before_nodes = self.before_root.depth_first_order()
+        after_nodes = self.after_root.depth_first_order()
+        hashes = dict((n, content_hash(n)) for n in before_nodes + after_nodes)
+
+        if self.before_root.content_type_id == self.after_root.content_type_id:
+            self._pair(self.before_root, self.after_root)
+
+        before_idents = dict((get_ident(n), n) for n in before_nodes if get_ident(n))
+        for node in after_nodes:
+            before = before_idents.get(get_ident(node))
+            if before and before not in self.before_to_after and node not in self.after_to_before:
+                self._pair(before, node)
+
+        while True:
+            while self._queue:
+                self._match_children(*self._queue.popleft(), hashes=hashes)
+
+            # Widgets that moved to another parent.
+            unmatched = defaultdict(list)
+            for node in before_nodes:
+                if node not in self.before_to_after:
+                    unmatched[hashes[node]].append(node)
+            for node in after_nodes:
+                if node not in self.after_to_before and unmatched[hashes[node]]:
+                    self._pair(unmatched[hashes[node]].pop(0), node)
+            if not self._queue:
+                break
+
+    def _match_children(self, before, after, hashes):
+        before_children = [c for c in before.get_children() if c not in self.before_to_after]
+        after_children = [c for c in after.get_children() if c not in self.after_to_before]
+
+        for a in after_children:
+            for b in before_children:
+                if b not in self.before_to_after and hashes[a] == hashes[b]:
+                    self._pair(b, a)
+                    break
+
+        by_type = defaultdict(list)
+        for b in before_children:
+            if b not in self.before_to_after:
+                by_type[b.content_type_id].append(b)
+        for a in after_children:
+            if a not in self.after_to_before and by_type[a.content_type_id]:
+                self._pair(by_type[a.content_type_id].pop(0), a)
+
+    def _build(self):
+        if self.after_root in self.after_to_before:
+            root = self._build_after(self.after_root)
+        else:
+            # The roots are different widgets, the whole tree changed.
+            root = WidgetDiff(None, self.after_root)
+            root.children = [self._build_after(c) for c in self.after_root.get_children()]
+            root.children.insert(0, self._build_deleted(self.before_root))
+        return root
+
+    def _build_after(self, after):
+        before = self.after_to_before.get(after)
+        widget = WidgetDiff(before, after)
+        widget.children = [self._build_after(c) for c in after.get_children()]
+        if before is None:
+            return widget
+
+        widget.compute_field_changes()
+
+        # Children that come from elsewhere in the tree or that were reordered
+        # relative to the others have moved.
+        before_children = list(before.get_children())
+        stayed = []
+        for child in widget.children:
+            if child.before is None:
+                continue
+            if child.before in before_children:
+                stayed.append(child)
+            else:
+                child.moved = True
+        positions = [before_children.index(c.before) for c in stayed]
+        in_order = set(longest_increasing_subsequence(positions))
+        for i, child in enumerate(stayed):
+            if i not in in_order:
+                child.moved = True
+
+        # Put deleted children next to their previous sibling.
+        for i, child in enumerate(before_children):
+            if child in self.before_to_after:
+                continue
+            index = 0
+            for previous in reversed(before_children[:i]):
+                previous_widgets = [j for j, w in enumerate(widget.children) if w.before == previous]
+                if previous_widgets:
+                    index = previous_widgets[0] + 1
+                    break
+            widget.children.insert(index, self._build_deleted(child))
+
+        return widget
+
+    def _build_deleted(self, before):
+        widget = WidgetDiff(before, None)
+        widget.children = [self._build_deleted(c) for c in before.get_children()
+                           if c not in self.before_to_after]
+        return widget
+
+
+def diff_trees(before_root, after_root):
+    return TreeDiff(before_root, after_root)
+
+
+def render_tree_diff(tree_diff, template_name='widgy/diff/tree.html'):
+    """
+    Renders the outline of a TreeDiff, highlighting only the widgets that
+    changed (and their field changes).
+    """
+    return mark_safe(render_to_string(template_name, {
+        'tree_diff': tree_diff,
+        'widget_template': 'widgy/diff/widget.html',
+    }))
+
+
+def get_diff_cache():
+    return caches[getattr(settings, 'WIDGY_DIFF_CACHE', 'default')]
+
+
+def get_diff_cache_key(before_root, after_root):
+    # The rendered diff is translated, it's cached once per language.
+    return 'widgy_diff:%s:%s:%s:%s' % (DIFF_ENGINE_VERSION, translation.get_language(),
+                                       before_root.pk, after_root.pk)
+
+
+def get_rendered_diff(before_root, after_root):
+    """
+    Like ``render_tree_diff(diff_trees(before_root, after_root))``, but cached
+    when both trees are frozen, because then the diff can't change.
+    """
+    if not (before_root.is_frozen and after_root.is_frozen):
+        return render_tree_diff(diff_trees(before_root, after_root))
+
+    cache = get_diff_cache()
+    key = get_diff_cache_key(before_root, after_root)
+    html = cache.get(key)
+    if html is None:
+        html = force_text(render_tree_diff(diff_trees(before_root, after_root)))
+        cache.set(key, html, getattr(settings, 'WIDGY_DIFF_CACHE_TIMEOUT', 60 * 60 * 24 * 30))
+    return mark_safe(html)
+
+
+def precompute_diff(before_pk, after_pk, language=None):
+    """
+    Renders the diff between two frozen trees into the diff cache, in
+    `language` if it's given.
+    """
+    if language is not None:
+        with translation.override(language):
+            return precompute_diff(before_pk, after_pk)
+    try:
+        before_root = Node.objects.get(pk=before_pk)
+        after_root = Node.objects.get(pk=after_pk)
+    except Node.DoesNotExist:
+        # The transaction that created them was rolled back.
+        return
+    get_rendered_diff(before_root, after_root)
+
+
+def _precompute_diff_in_thread(before_pk, after_pk, language):
+    try:
+        precompute_diff(before_pk, after_pk, language)
+    except Exception:
+        logger.exception('Error precomputing the diff between %s and %s', before_pk, after_pk)
+    finally:
+        connection.close()
+
+
+def schedule_commit_diff(commit):
+    """
+    Precomputes the diff between `commit` and its parent in a background
+    thread when the WIDGY_PRECOMPUTE_DIFFS setting is on.
+    """
+    if not (commit.parent_id and getattr(settings, 'WIDGY_PRECOMPUTE_DIFFS', False)):
+        return
+
+    # The thread doesn't inherit the active language, the diff is rendered
+    # in the one of the user that committed.
+    args = (commit.parent.root_node_id, commit.root_node_id, translation.get_language())
+
+    def start():
+        thread = threading.Thread(target=_precompute_diff_in_thread, args=args)
+        thread.daemon = True
+        thread.start()
+
+    if hasattr(transaction, 'on_commit'):
+        transaction.on_commit(start)
+    else:
+        # BBB Django < 1.9 doesn't have on_commit, the thread may start
+        # before the commit is visible to it.
+        start()
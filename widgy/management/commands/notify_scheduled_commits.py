@@ -0,0 +1,53 @@
+import datetime
+from optparse import make_option
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+LAST_RUN_CACHE_KEY = 'widgy_notify_scheduled_commits_last_run'
+
+
+class Command(BaseCommand):
+    """
+    Sends published_tree_changed for the trackers whose scheduled commits
+    became published since the last run. Nothing happens in the database when
+    a commit's publish_at is reached, so this has to be run periodically (from
+    cron for example) by sites that listen to published_tree_changed.
+
+    The time of the last run is kept in the cache. When it isn't there, the
+    commits published in the last --minutes are used. Sending the signal twice
+    for a tracker is harmless, so the windows can overlap.
+    """
+    help = 'Sends published_tree_changed for the commits that became published'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--minutes',
+                    type='int',
+                    dest='minutes',
+                    default=60,
+                    help="How far back to look when the time of the last run isn't known"),
+    )
+
+    def handle(self, *args, **options):
+        from widgy.models.versioning import VersionCommit, VersionTracker
+        from widgy.signals import published_tree_changed
+
+        now = timezone.now()
+        since = cache.get(LAST_RUN_CACHE_KEY) or now - datetime.timedelta(minutes=options['minutes'])
+
+        # Unapproved commits of a review queue are included, the receivers
+        # will find out that the published tree didn't change.
+        tracker_ids = set(VersionCommit.objects.filter(
+            publish_at__gt=since,
+            publish_at__lte=now,
+            # the ones that were published when they were made already sent it
+            created_at__lt=F('publish_at'),
+        ).values_list('tracker_id', flat=True))
+
+        if tracker_ids:
+            published_tree_changed.send(sender=VersionTracker, tracker_ids=tracker_ids)
+        cache.set(LAST_RUN_CACHE_KEY, now, None)
+
+        self.stdout.write('%d trackers had commits published since %s\n' % (len(tracker_ids), since))
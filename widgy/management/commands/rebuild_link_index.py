@@ -0,0 +1,40 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    """
+    Recreates the ReverseLink rows of every object with a LinkField. They are
+    kept up to date as objects are saved, and filled for the existing objects
+    by the migration that creates the table. This is needed for the objects
+    that were changed with QuerySet.update, or that the migration skipped.
+
+    Each model is rebuilt in its own transaction.
+    """
+    help = 'Rebuilds the index used to find the objects that link to another'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size',
+                    type='int',
+                    dest='batch_size',
+                    default=1000,
+                    help="The number of objects to read at once"),
+    )
+
+    def handle(self, *args, **options):
+        from widgy.models.links import link_registry, get_indexed_link_fields, ReverseLink
+
+        total = 0
+        for model in link_registry.get_all_linker_classes():
+            if not get_indexed_link_fields(model):
+                continue
+
+            with transaction.atomic():
+                count = ReverseLink.objects.rebuild(model, options['batch_size'])
+
+            self.stdout.write('%s: %d links\n' % (model._meta.object_name, count))
+            total += count
+
+        self.stdout.write('Rebuilt %d links\n' % total)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import itertools
+import warnings
+
+from django.db import models, migrations
+from django.core.exceptions import FieldDoesNotExist
+
+
+def fill_reverse_links(apps, schema_editor):
+    # The LinkFields aren't in the historical models. The current models say
+    # which fields are indexed, their values are read with the historical
+    # models from the columns the LinkFields are stored in. Models that aren't
+    # migrated yet, or whose columns don't match them until a later
+    # migration, are skipped; run rebuild_link_index for them once everything
+    # is migrated.
+    from widgy.models.links import link_registry, get_indexed_link_fields
+
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ReverseLink = apps.get_model('widgy', 'ReverseLink')
+    db_alias = schema_editor.connection.alias
+    tables = set(schema_editor.connection.introspection.table_names())
+
+    skipped = []
+    for model in link_registry.get_all_linker_classes():
+        fields = get_indexed_link_fields(model)
+        opts = model._meta
+        if not fields or opts.db_table not in tables:
+            # a new table has nothing to index
+            continue
+        try:
+            historical = apps.get_model(opts.app_label, opts.object_name)
+            columns = [(historical._meta.get_field(field.ct_field).attname,
+                        historical._meta.get_field(field.fk_field).attname)
+                       for field in fields]
+        except (LookupError, FieldDoesNotExist):
+            skipped.append('%s.%s' % (opts.app_label, opts.object_name))
+            continue
+        linkers = historical._default_manager.using(db_alias)
+        linker_content_type = ContentType.objects.using(db_alias).filter(
+            app_label=opts.app_label, model=opts.model_name).first()
+        if linker_content_type is None:
+            if linkers.exists():
+                skipped.append('%s.%s' % (opts.app_label, opts.object_name))
+            continue
+
+        for field, (ct_column, fk_column) in zip(fields, columns):
+            rows = linkers.filter(**{
+                ct_column + '__isnull': False,
+                fk_column + '__isnull': False,
+            }).values_list('pk', ct_column, fk_column).iterator()
+            while True:
+                batch = list(itertools.islice(rows, 1000))
+                if not batch:
+                    break
+                ReverseLink.objects.using(db_alias).bulk_create([
+                    ReverseLink(linker_content_type_id=linker_content_type.pk,
+                                linker_id=linker_id,
+                                field_name=field.name,
+                                target_content_type_id=target_content_type_id,
+                                target_id=target_id)
+                    for linker_id, target_content_type_id, target_id in batch
+                ])
+
+    if skipped:
+        warnings.warn(
+            "The links of %s weren't indexed, run the rebuild_link_index "
+            "command once all the migrations are applied." % ', '.join(sorted(skipped)),
+        )
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0001_initial'),
+        ('widgy', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReverseLink',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('linker_id', models.PositiveIntegerField()),
+                ('field_name', models.CharField(max_length=255)),
+                ('target_id', models.PositiveIntegerField()),
+                ('linker_content_type', models.ForeignKey(related_name='+', to='contenttypes.ContentType')),
+                ('target_content_type', models.ForeignKey(related_name='+', to='contenttypes.ContentType')),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='reverselink',
+            unique_together=set([('linker_content_type', 'linker_id', 'field_name')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='reverselink',
+            index_together=set([('target_content_type', 'target_id')]),
+        ),
+        migrations.RunPython(fill_reverse_links, noop),
+    ]
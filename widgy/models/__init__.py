@@ -1,2 +1,3 @@
 from widgy.models.base import Node, Content, UnknownWidget
 from widgy.models.versioning import VersionTracker, VersionCommit
+from widgy.models.links import ReverseLink
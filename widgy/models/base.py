@@ -28,6 +28,7 @@ from widgy.exceptions import (
 )
 from widgy.signals import pre_delete_widget
 from widgy.generic import WidgyGenericForeignKey, ProxyGenericRelation
+from widgy.models.links import LinkFormMixin
 from widgy.utils import exception_to_bool, update_context, unset_pks
 from widgy.widgets import DateTimeWidget, DateWidget, TimeWidget
 
@@ -586,6 +587,9 @@ class Content(models.Model):
     def get_form(self, request, **form_kwargs):
         form_class = self.get_form_class(request)
         form_kwargs.setdefault('instance', self)
+        site = getattr(request, 'widgy_site', None)
+        if site is not None and issubclass(form_class, LinkFormMixin):
+            form_kwargs.setdefault('site', site)
         return form_class(**form_kwargs)
 
     def valid_parent_of(self, cls, obj=None):
@@ -741,6 +745,21 @@ class Content(models.Model):
                 context
             )
 
+    def get_search_text(self):
+        """
+        The text of this widget for the search index, without the text of its
+        children, or None if it can only be found by rendering the widget. See
+        widgy.utils.get_tree_search_text.
+        """
+        return None
+
+    def get_search_children(self):
+        """
+        The children whose text is indexed with this widget, when
+        get_search_text doesn't return None.
+        """
+        return self.get_children()
+
     def formfield_for_dbfield(self, db_field, **kwargs):
         """
         Hook for specifying the form Field instance for a given database Field
@@ -1,12 +1,17 @@
 import copy
+from collections import defaultdict
 from operator import or_
 import itertools
+import six
 from six.moves import reduce
 
 from django.db import models
+from django.dispatch import receiver
 from django.db.models.fields import Field
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.template.defaultfilters import capfirst
+from django.template.loader import render_to_string
 from django import forms
 from django.utils.encoding import force_text
 
@@ -20,17 +25,43 @@ except ImportError:
 
 from widgy.generic import WidgyGenericForeignKey
 from widgy import BaseRegistry
-from widgy.utils import model_has_field
+from widgy.utils import model_has_field, QuerySet
 
 
 class LinkRegistry(BaseRegistry):
     def get_links(self, obj):
+        """
+        The objects that link to `obj`, found in the ReverseLink table. The
+        LinkFields that aren't indexed there (see is_indexed) are looked up
+        in their own table.
+        """
         if not isinstance(obj, tuple(self)):
             raise ValueError("The object class is not registered linkable")
-        all_qs = (linker._default_manager.filter(points_to_links(linker, obj))
-                  for linker in self.get_all_linker_classes())
-
-        return itertools.chain.from_iterable(all_qs)
+        content_type = ContentType.objects.get_for_model(obj)
+        linker_ids = defaultdict(set)
+        if isinstance(obj.pk, six.integer_types):
+            for content_type_id, linker_id in ReverseLink.objects.filter(
+                    target_content_type=content_type,
+                    target_id=obj.pk).values_list('linker_content_type_id', 'linker_id'):
+                linker_ids[content_type_id].add(linker_id)
+
+        linkers = ((ContentType.objects.get_for_id(content_type_id).model_class(), ids)
+                   for content_type_id, ids in sorted(linker_ids.items()))
+        indexed_qs = (linker._default_manager.filter(pk__in=ids)
+                      for linker, ids in linkers
+                      if linker is not None)
+
+        unindexed = ((linker, [field for field in get_link_fields(linker)
+                               if field.model is linker and not is_indexed(field)])
+                     for linker in self.get_all_linker_classes())
+        unindexed_qs = (linker._default_manager.filter(reduce(or_, (
+                            models.Q(**{field.ct_field: content_type, field.fk_field: obj.pk})
+                            for field in fields)))
+                        for linker, fields in unindexed
+                        if fields)
+
+        return itertools.chain(itertools.chain.from_iterable(indexed_qs),
+                               itertools.chain.from_iterable(unindexed_qs))
 
     @classmethod
     def get_all_linker_classes(cls):
@@ -79,6 +110,21 @@ class LinkField(WidgyGenericForeignKey):
         return ((Model, Model._default_manager.all())
                 for Model in sorted(self._link_registry, key=key))
 
+    def search(self, query):
+        """
+        Like get_choices_by_class, but only the objects that match `query` in
+        one of their link search fields. The querysets aren't evaluated, so
+        they can be paginated.
+        """
+        for Model, qs in self.get_choices_by_class():
+            search_fields = get_link_search_fields(Model)
+            if query:
+                if not search_fields:
+                    continue
+                qs = qs.filter(reduce(or_, (models.Q(**{'%s__icontains' % name: query})
+                                            for name in search_fields)))
+            yield Model, qs.order_by(*(search_fields[:1] + ['pk']))
+
     def contribute_to_class(self, cls, name):
         if self.ct_field is None:
             self.ct_field = '%s_content_type' % name
@@ -107,11 +153,189 @@ class LinkField(WidgyGenericForeignKey):
         return obj
 
 
+_link_fields = {}
+
+
+def get_link_fields(model):
+    """
+    The LinkFields of `model`, including the ones of its concrete parents.
+    It's called for every save, so the result is kept.
+    """
+    try:
+        return _link_fields[model]
+    except KeyError:
+        pass
+    fields = []
+    for cls in [model] + list(model._meta.get_parent_list()):
+        for field in cls._meta.virtual_fields:
+            if isinstance(field, LinkField) and field not in fields:
+                fields.append(field)
+    _link_fields[model] = fields
+    return fields
+
+
+INTEGER_FIELD_TYPES = (
+    'AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+    'PositiveIntegerField', 'PositiveSmallIntegerField',
+)
+
+
+def is_integer_field(field):
+    # a relation is stored like the field it points to
+    while field.rel is not None:
+        field = field.rel.get_related_field()
+    return field.get_internal_type() in INTEGER_FIELD_TYPES
+
+
+def is_indexed(field):
+    """
+    Whether the links of a LinkField are kept in the ReverseLink table. Its
+    ids are integers, so the primary key of the field's model and the
+    fk_field of the LinkField must be integer fields.
+    """
+    opts = field.model._meta
+    return is_integer_field(opts.pk) and is_integer_field(opts.get_field(field.fk_field))
+
+
+def get_indexed_link_fields(model):
+    """
+    The LinkFields of `model` itself that are indexed in ReverseLink. The
+    ones inherited from a concrete parent are indexed with it.
+    """
+    return [field for field in get_link_fields(model)
+            if field.model is model and is_indexed(field)]
+
+
+class ReverseLink(models.Model):
+    """
+    One row for each LinkField of an object that links somewhere, so that
+    LinkRegistry.get_links is one indexed lookup. The linker is recorded as an
+    instance of the model the LinkField belongs to. The rows of an object are
+    updated when it's saved or deleted, the rebuild_link_index command
+    recreates all of them.
+
+    The ids are integers, LinkFields on models with other primary keys, or
+    with an fk_field that isn't an integer, aren't indexed, see is_indexed.
+    """
+    linker_content_type = models.ForeignKey(ContentType, related_name='+')
+    linker_id = models.PositiveIntegerField()
+    field_name = models.CharField(max_length=255)
+    target_content_type = models.ForeignKey(ContentType, related_name='+')
+    target_id = models.PositiveIntegerField()
+
+    class Meta:
+        app_label = 'widgy'
+        unique_together = [('linker_content_type', 'linker_id', 'field_name')]
+        index_together = [('target_content_type', 'target_id')]
+
+    class ReverseLinkQuerySet(QuerySet):
+        def for_linker(self, linker, fields):
+            fields = [field for field in fields if is_indexed(field)]
+            if not fields:
+                return self.none()
+            return self.filter(
+                linker_content_type__in=[ContentType.objects.get_for_model(field.model) for field in fields],
+                linker_id=linker.pk,
+            )
+
+        def build(self, linker, fields):
+            """
+            The unsaved ReverseLinks of `linker` for the indexed `fields`.
+            """
+            reverse_links = []
+            for field in fields:
+                if not is_indexed(field):
+                    continue
+                target_content_type_id = getattr(linker, linker._meta.get_field(field.ct_field).attname)
+                target_id = getattr(linker, field.fk_field)
+                if target_content_type_id is not None and target_id is not None:
+                    reverse_links.append(self.model(
+                        linker_content_type=ContentType.objects.get_for_model(field.model),
+                        linker_id=linker.pk,
+                        field_name=field.name,
+                        target_content_type_id=target_content_type_id,
+                        target_id=target_id,
+                    ))
+            return reverse_links
+
+        def rebuild(self, model, batch_size=1000):
+            """
+            Recreates the ReverseLinks of all the objects of `model`, reading
+            `batch_size` of them at a time. Returns the number of links.
+            """
+            fields = get_indexed_link_fields(model)
+            self.filter(linker_content_type=ContentType.objects.get_for_model(model)).delete()
+
+            count = 0
+            last_pk = None
+            while fields:
+                qs = model._default_manager.order_by('pk')
+                if last_pk is not None:
+                    qs = qs.filter(pk__gt=last_pk)
+                linkers = list(qs[:batch_size])
+                if not linkers:
+                    break
+                reverse_links = []
+                for linker in linkers:
+                    reverse_links.extend(self.build(linker, fields))
+                self.bulk_create(reverse_links)
+                count += len(reverse_links)
+                last_pk = linkers[-1].pk
+            return count
+
+    objects = ReverseLinkQuerySet.as_manager()
+
+
+@receiver(models.signals.post_save)
+def update_reverse_links(sender, instance, created, **kwargs):
+    fields = get_link_fields(sender)
+    if not fields:
+        return
+    if not created:
+        ReverseLink.objects.for_linker(instance, fields).delete()
+    reverse_links = ReverseLink.objects.build(instance, fields)
+    if reverse_links:
+        ReverseLink.objects.bulk_create(reverse_links)
+
+
+@receiver(models.signals.post_delete)
+def delete_reverse_links(sender, instance, **kwargs):
+    fields = get_link_fields(sender)
+    if fields:
+        ReverseLink.objects.for_linker(instance, fields).delete()
+
+
+def get_link_search_fields(model):
+    """
+    The fields searched for the link choices of `model`. They can be chosen
+    with a `link_search_fields` attribute on the model, otherwise its text
+    fields are used.
+    """
+    try:
+        return list(model.link_search_fields)
+    except AttributeError:
+        return [field.name for field in model._meta.fields
+                if isinstance(field, (models.CharField, models.TextField)) and not field.choices]
+
+
 def get_composite_key(linkable):
     content_type = ContentType.objects.get_for_model(linkable)
     return u'%s-%s' % (content_type.pk, linkable.pk)
 
 
+def get_linkable(composite_key):
+    """
+    The object whose get_composite_key is `composite_key`, None if it's
+    empty. Raises ObjectDoesNotExist if there is no such object.
+    """
+    content_type_pk, _, object_pk = composite_key.partition('-')
+    if object_pk:
+        content_type = ContentType.objects.get_for_id(content_type_pk)
+        return content_type.get_object_for_this_type(pk=object_pk)
+    else:
+        return None
+
+
 def convert_linkable_to_choice(linkable):
     key = get_composite_key(linkable)
 
@@ -123,18 +347,54 @@ def convert_linkable_to_choice(linkable):
     return (key, value)
 
 
+class LinkWidget(forms.Widget):
+    """
+    A search box for the link choices, which are fetched page by page from
+    `search_url` (a WidgySite's link_search_view). Only the selected object
+    is looked up to render it.
+    """
+    def __init__(self, search_url, empty_label=None, attrs=None):
+        self.search_url = search_url
+        self.empty_label = empty_label
+        super(LinkWidget, self).__init__(attrs)
+
+    def render(self, name, value, attrs=None):
+        label = ''
+        if value:
+            try:
+                label = convert_linkable_to_choice(get_linkable(value))[1]
+            except (ObjectDoesNotExist, ValueError):
+                value = ''
+        return render_to_string('widgy/link_widget.html', {
+            'html_id': (attrs or {}).get('id') or 'id_%s' % name,
+            'name': name,
+            'value': value or '',
+            'label': label,
+            'search_url': self.search_url,
+            'empty_label': None if self.is_required else self.empty_label,
+        })
+
+
 class LinkFormField(forms.ChoiceField):
     def __init__(self, choices=(), empty_label="---------", *args, **kwargs):
         self.empty_label = empty_label
         super(LinkFormField, self).__init__(choices, *args, **kwargs)
 
     def clean(self, value):
-        content_type_pk, _, object_pk = value.partition('-')
-        if object_pk:
-            content_type = ContentType.objects.get_for_id(content_type_pk)
-            return content_type.get_object_for_this_type(pk=object_pk)
-        else:
-            return None
+        try:
+            return get_linkable(value)
+        except (ObjectDoesNotExist, ValueError):
+            raise ValidationError(self.error_messages['invalid_choice'],
+                                  code='invalid_choice',
+                                  params={'value': value})
+
+    def use_search(self, search_url):
+        """
+        Replaces the select of all the choices with a LinkWidget that searches
+        them at `search_url`.
+        """
+        self.widget = LinkWidget(search_url, self.empty_label)
+        self.widget.is_required = self.required
 
     def populate_choices(self, choice_map):
         keyfn = lambda x: x[1].lower()
@@ -157,13 +417,27 @@ def get_link_field_from_model(model, name):
 
 
 class LinkFormMixin(object):
+    """
+    When the form is given a WidgySite as `site`, the link choices are
+    searched with its link_search_view. Otherwise all of them are put in the
+    form.
+    """
     def __init__(self, *args, **kwargs):
+        site = kwargs.pop('site', None)
         super(LinkFormMixin, self).__init__(*args, **kwargs)
+        opts = self.instance._meta
         for name, field in self.get_link_form_fields():
             value = getattr(self.instance, name, None)
             model_field = get_link_field_from_model(self.instance, name)
             field.initial = get_composite_key(value) if value else None
-            field.populate_choices(model_field.get_choices_by_class())
+            if site is None:
+                field.populate_choices(model_field.get_choices_by_class())
+            else:
+                field.use_search(site.reverse(site.link_search_view, kwargs={
+                    'app_label': opts.app_label,
+                    'object_name': opts.object_name,
+                    'field_name': name,
+                }))
 
     def get_link_form_fields(self):
         return ((name, field)
@@ -1,6 +1,7 @@
 import copy
 
 from django.db import models
+from django.db.models import Max
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.encoding import python_2_unicode_compatible
@@ -10,6 +11,7 @@ from django.template.defaultfilters import date as date_format
 
 from widgy.db.fields import WidgyField
 from widgy.models.base import Node
+from widgy.signals import published_tree_changed
 from widgy.utils import QuerySet, unset_pks
 
 
@@ -85,6 +87,11 @@ class VersionTracker(models.Model):
 
         self.save()
 
+        from widgy.diff import schedule_commit_diff
+        schedule_commit_diff(self.head)
+
+        self.send_published_tree_changed_if_ready(self.head)
+
         return self.head
 
     def revert_to(self, commit, user=None, **kwargs):
@@ -103,8 +110,14 @@ class VersionTracker(models.Model):
         self.save()
         old_working_copy.content.delete()
 
+        self.send_published_tree_changed_if_ready(self.head)
+
         return self.head
 
+    def send_published_tree_changed_if_ready(self, commit):
+        if self.commit_is_ready(commit):
+            published_tree_changed.send(sender=self.__class__, tracker_ids=[self.pk])
+
     def reset(self):
         old_working_copy = self.working_copy
         self.working_copy = self.head.root_node.clone_tree(freeze=False)
@@ -123,6 +136,34 @@ class VersionTracker(models.Model):
         """
         return commit.is_published
 
+    def get_ready_commits(self):
+        """
+        The queryset counterpart of :meth:`commit_is_ready`.
+        """
+        return self.commits.filter(publish_at__lte=timezone.now())
+
+    def get_commits_ahead_of_published(self):
+        """
+        A queryset of the commits that are newer than the currently published
+        one. Commits are created in history order, so this doesn't have to walk
+        the history to find them.
+        """
+        published_id = self.get_ready_commits().aggregate(id=Max('id'))['id']
+        qs = self.commits.all()
+        if published_id is not None:
+            qs = qs.filter(id__gt=published_id)
+        return qs
+
+    def get_commit_summary(self):
+        """
+        Counts of interesting commits ahead of the published one, in a constant
+        number of queries regardless of the length of the history.
+        """
+        return {
+            'future': self.get_commits_ahead_of_published().filter(
+                publish_at__gt=timezone.now()).count(),
+        }
+
     def get_published_node(self, request):
         for commit in self.get_history():
             if self.commit_is_ready(commit):
@@ -3,3 +3,11 @@ from django.dispatch import Signal
 
 pre_delete_widget = Signal(providing_args=['instance', 'raw'])
 widgy_pre_index = Signal()
+
+# Sent when the published tree of some version trackers may have changed: a
+# ready commit was made or reverted to, a commit was approved or unapproved, or
+# a scheduled commit became published (see the notify_scheduled_commits
+# command). `tracker_ids` are the pks of the trackers. It's sent inside the
+# transaction, receivers with side effects outside of the database should wait
+# for it to be committed (see widgy.utils.collect_on_commit).
+published_tree_changed = Signal(providing_args=['tracker_ids'])
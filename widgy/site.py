@@ -18,6 +18,7 @@ from widgy.views import (
     RevertView,
     DiffView,
     ResetView,
+    LinkSearchView,
 )
 from widgy.exceptions import (
     MutualRejection,
@@ -42,6 +43,7 @@ class WidgySite(object):
             url('^node/(?P<node_pk>[^/]+)/templates/$', self.node_templates_view),
             url('^node/(?P<node_pk>[^/]+)/possible-parents/$', self.node_parents_view),
             url('^contents/(?P<app_label>[A-z_][\w_]*)/(?P<object_name>[A-z_][\w_]*)/(?P<object_pk>[^/]+)/$', self.content_view),
+            url('^links/(?P<app_label>[A-z_][\w_]*)/(?P<object_name>[A-z_][\w_]*)/(?P<field_name>[A-z_][\w_]*)/$', self.link_search_view),
 
             # versioning
             url('^revert/(?P<pk>[^/]+)/(?P<commit_pk>[^/]+)/$', self.revert_view),
@@ -101,6 +103,10 @@ class WidgySite(object):
     def content_view(self):
         return ContentView.as_view(site=self)
 
+    @cached_property
+    def link_search_view(self):
+        return LinkSearchView.as_view(site=self)
+
     @cached_property
     def shelf_view(self):
         return ShelfView.as_view(site=self)
@@ -1,16 +1,19 @@
 """
 Some utility functions used throughout the project.
 """
+import threading
 import warnings
+from collections import OrderedDict
 from six.moves import filterfalse
 from contextlib import contextmanager
 from functools import wraps
 import six
+from six.moves import html_parser
 
 import bs4
 
 from django.template import Context
-from django.db import models
+from django.db import models, transaction
 from django.db.models import query
 from django.utils.http import urlencode
 from django.http.request import QueryDict
@@ -108,7 +111,125 @@ def build_url(path, *args, **kwargs):
     return path
 
 
+# BBB Python 2 raises it for broken markup, Python 3 doesn't have it
+HTMLParseError = getattr(html_parser, 'HTMLParseError', ())
+
+
+class PlaintextParser(html_parser.HTMLParser):
+    """
+    Collects the text of an HTML document as it's parsed, without building a
+    tree. See html_to_plaintext.
+    """
+    IGNORED_TAGS = ('script', 'style', 'head')
+    INDEXED_ATTRIBUTES = ('title', 'alt')
+
+    def __init__(self):
+        if six.PY3:
+            html_parser.HTMLParser.__init__(self, convert_charrefs=True)
+        else:
+            html_parser.HTMLParser.__init__(self)
+        self.texts = []
+        self.data = []
+        # the open tags whose content is ignored
+        self.ignored = []
+        # the tag name and nesting depth of the role="main" element, while
+        # it's open, and the texts it contains
+        self.main_tag = None
+        self.main_depth = 0
+        self.main_start = None
+        self.main_end = None
+
+    def flush(self):
+        if self.data:
+            text = ''.join(self.data).strip()
+            self.data = []
+            if text:
+                self.texts.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self.flush()
+        if tag == 'body' and 'head' in self.ignored:
+            # the head wasn't closed
+            self.ignored = []
+        if self.ignored:
+            if tag in self.IGNORED_TAGS:
+                self.ignored.append(tag)
+            return
+
+        attrs = dict(attrs)
+        for attr in self.INDEXED_ATTRIBUTES:
+            if attr in attrs:
+                self.texts.append(attrs[attr] or '')
+
+        if tag in self.IGNORED_TAGS:
+            self.ignored.append(tag)
+        elif self.main_tag is not None:
+            if tag == self.main_tag:
+                self.main_depth += 1
+        elif self.main_start is None and attrs.get('role') == 'main':
+            self.main_tag = tag
+            self.main_depth = 1
+            self.main_start = len(self.texts)
+
+    def handle_endtag(self, tag):
+        self.flush()
+        if self.ignored:
+            if tag in self.ignored:
+                while self.ignored.pop() != tag:
+                    pass
+            return
+
+        if tag == self.main_tag:
+            self.main_depth -= 1
+            if not self.main_depth:
+                self.main_tag = None
+                self.main_end = len(self.texts)
+
+    def handle_data(self, data):
+        if not self.ignored:
+            self.data.append(data)
+
+    def handle_entityref(self, name):
+        # BBB Python 2 doesn't have convert_charrefs
+        self.handle_data(self.unescape('&%s;' % name))
+
+    def handle_charref(self, name):
+        self.handle_data(self.unescape('&#%s;' % name))
+
+    def close(self):
+        html_parser.HTMLParser.close(self)
+        self.flush()
+
+    def get_text(self):
+        if self.main_start is None:
+            texts = self.texts
+        else:
+            texts = self.texts[self.main_start:self.main_end]
+        return ' '.join(texts)
+
+
 def html_to_plaintext(html):
+    """
+    The text of `html` for the search index. The content of script, style and
+    head tags and comments are left out, and the title and alt attributes are
+    included. When there's an element with role="main", only its content is
+    used, to index only the main text of the page.
+    """
+    parser = PlaintextParser()
+    try:
+        parser.feed(force_text(html))
+        parser.close()
+    except HTMLParseError:
+        # BBB Python 2's parser gives up on some broken markup
+        return soup_to_plaintext(html)
+    return parser.get_text()
+
+
+def soup_to_plaintext(html):
+    """
+    Like html_to_plaintext, but parses `html` with BeautifulSoup. It's slower,
+    but copes with any markup.
+    """
 
     def get_text(node):
         IGNORED_TAGS = ['script', 'style', 'head']
@@ -137,6 +258,27 @@ def html_to_plaintext(html):
     return text
 
 
+def get_tree_search_text(root, render):
+    """
+    The text of a prefetched tree of Content for the search index, from the
+    get_search_text of each widget. The widgets that don't implement it are
+    rendered with `render(content)`, and the text is extracted from their
+    HTML.
+    """
+    texts = []
+    stack = [root]
+    while stack:
+        content = stack.pop()
+        text = content.get_search_text()
+        if text is None:
+            text = html_to_plaintext(render(content))
+        else:
+            stack.extend(reversed(list(content.get_search_children())))
+        if text:
+            texts.append(text)
+    return ' '.join(texts)
+
+
 def unique_everseen(iterable, key=None):
     "List unique elements, preserving order. Remember all elements ever seen."
     # http://docs.python.org/2/library/itertools.html
@@ -241,3 +383,71 @@ def model_has_field(cls, field_name):
         ))
     else:
         return False
+
+
+class LRUCache(object):
+    """
+    A thread-safe, process-local mapping that holds on to at most `max_size`
+    items, forgetting the least recently used ones first.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_on_commit_batches = threading.local()
+
+
+def collect_on_commit(key, values, callback, using=None):
+    """
+    Collects `values` under `key` until the current transaction is committed,
+    then calls `callback` once with the set of all the values collected during
+    the transaction. Outside of a transaction (or before Django 1.9, which
+    doesn't have on_commit), `callback` is called right away.
+    """
+    connection = transaction.get_connection(using)
+    if not hasattr(transaction, 'on_commit') or not connection.in_atomic_block:
+        callback(set(values))
+        return
+
+    batches = _on_commit_batches.__dict__.setdefault('batches', {})
+    key = (connection.alias, key)
+    batch, run = batches.get(key, (None, None))
+    # A rolled back transaction leaves its batch behind, without its callback
+    if batch is not None and any(i[1] is run for i in connection.run_on_commit):
+        batch.update(values)
+        return
+
+    batch = set(values)
+
+    def run():
+        if batches.get(key, (None, None))[1] is run:
+            del batches[key]
+        callback(batch)
+
+    batches[key] = (batch, run)
+    transaction.on_commit(run, using=using)
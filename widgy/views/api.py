@@ -13,6 +13,8 @@ from django.views.generic import DetailView
 from django.views.generic.detail import SingleObjectMixin
 from django.db.models import ProtectedError
 from django.utils.translation import ugettext as _
+from django.utils.encoding import force_text
+from django.template.defaultfilters import capfirst
 
 try:
     from django.apps import apps
@@ -25,6 +27,7 @@ except ImportError:
 from argonauts.views import RestView
 
 from widgy.models import Node
+from widgy.models.links import get_link_field_from_model, convert_linkable_to_choice
 from widgy.exceptions import InvalidTreeMovement
 from widgy.utils import extract_id
 from widgy.views.base import WidgyViewMixin, AuthorizedMixin
@@ -279,3 +282,55 @@ class NodeParentsView(NodeSingleObjectMixin, WidgyView):
         node.prefetch_tree()
         possible_parents = node.possible_parents(self.site, node.get_root())
         return self.render_to_response([i.get_api_url(self.site) for i in possible_parents])
+
+
+class LinkSearchView(WidgyView):
+    """
+    Searches the link choices of a LinkField for the LinkWidget. Takes the
+    search text as ``q`` and a 1-based ``page``, and returns::
+
+        {
+            results: [{value: composite key, label: label, group: model name}],
+            more: whether there is another page
+        }
+    """
+    paginate_by = 20
+
+    def get(self, request, app_label, object_name, field_name):
+        try:
+            model = get_model(app_label, object_name)
+        except LookupError:
+            model = None
+        field = model and get_link_field_from_model(model, field_name)
+        if not field:
+            raise Http404
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            raise Http404
+        query = request.GET.get('q', '').strip()
+
+        skip = (page - 1) * self.paginate_by
+        results = []
+        more = False
+        for Model, qs in field.search(query):
+            if len(results) == self.paginate_by:
+                more = qs.exists()
+                if more:
+                    break
+                continue
+            count = qs.count()
+            if skip >= count:
+                skip -= count
+                continue
+            end = skip + self.paginate_by - len(results)
+            group = force_text(capfirst(Model._meta.verbose_name_plural))
+            for linkable in qs[skip:end]:
+                value, label = convert_linkable_to_choice(linkable)
+                results.append({'value': value, 'label': label, 'group': group})
+            more = end < count
+            if more:
+                break
+            skip = 0
+
+        return self.render_to_response({'results': results, 'more': more})
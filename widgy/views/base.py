@@ -5,6 +5,11 @@ from django.core.exceptions import PermissionDenied
 class WidgyViewMixin(object):
     site = None
 
+    def dispatch(self, request, *args, **kwargs):
+        # The forms rendered for this request use it to find the site's views.
+        request.widgy_site = self.site
+        return super(WidgyViewMixin, self).dispatch(request, *args, **kwargs)
+
     def auth(self, request, *args, **kwargs):
         self.site.authorize_view(request, self)
 
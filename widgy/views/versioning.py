@@ -15,15 +15,14 @@ from django.utils.translation import ugettext_lazy as _
 from django.utils import timezone
 from django.utils.encoding import force_text
 from django.core.exceptions import PermissionDenied
-from django.core import urlresolvers
 from django.http import Http404
 
 from bs4 import BeautifulSoup
 
+from widgy.models import Node
 from widgy.views.base import AuthorizedMixin
 from widgy.utils import build_url
-
-DIFF_ENABLED = bool(getattr(settings, 'DAISYDIFF_JAR_PATH', False))
+from widgy.diff import get_rendered_diff
 
 
 class CommitForm(forms.Form):
@@ -83,11 +82,9 @@ class VersionTrackerMixin(SingleObjectMixin):
                         yield link
 
     def get_diff_urls(self, before_node, after_node):
-        if DIFF_ENABLED:
-            for a, b in zip(self.get_preview_urls(before_node), self.get_preview_urls(after_node)):
-                yield build_url(self.site.reverse(self.site.diff_view),
-                                before=a['url'],
-                                after=b['url'])
+        yield build_url(self.site.reverse(self.site.diff_view),
+                        before=before_node.pk,
+                        after=after_node.pk)
 
 
 class PopupView(object):
@@ -114,8 +111,8 @@ class CommitView(PopupView, AuthorizedMixin, VersionTrackerMixin, FormView):
             kwargs['permission_error_message'] = self.permission_error_message
 
         if self.object.head:
-            kwargs['diff_urls'] = self.get_diff_urls(self.object.working_copy,
-                                                     self.object.head.root_node)
+            kwargs['diff_urls'] = self.get_diff_urls(self.object.head.root_node,
+                                                     self.object.working_copy)
 
         # lazy because the template doesn't always use it
         kwargs['changed_anything'] = lambda: self.object.has_changes()
@@ -186,7 +183,7 @@ class HistoryView(AuthorizedMixin, VersionTrackerMixin, DetailView):
         kwargs['commits'] = self.object.get_history_list()
         for commit in kwargs['commits']:
             if commit.parent_id:
-                commit.diff_urls = self.get_diff_urls(commit.root_node, commit.parent.root_node)
+                commit.diff_urls = self.get_diff_urls(commit.parent.root_node, commit.root_node)
         return kwargs
 
 
@@ -259,24 +256,21 @@ class RevertView(PopupView, AuthorizedMixin, VersionTrackerMixin, FormView):
 
 
 class DiffView(AuthorizedMixin, TemplateView):
+    """
+    Shows the structural diff between the trees of two nodes, given by the
+    `before` and `after` GET parameters.
+    """
     template_name = 'widgy/diff.html'
 
-    def call_view_from_url(self, url):
-        view, args, kwargs = urlresolvers.resolve(url)
-        return view(self.request, *args, **kwargs).rendered_content
-
-    def get_context_data(self, **kwargs):
-        kwargs = super(DiffView, self).get_context_data(**kwargs)
+    def get_node(self, name):
         try:
-            before_url = self.request.GET['before']
-            after_url = self.request.GET['after']
-        except KeyError:
+            return Node.objects.get(pk=self.request.GET[name])
+        except (KeyError, ValueError, Node.DoesNotExist):
             raise Http404
 
-        before = self.call_view_from_url(before_url)
-        after = self.call_view_from_url(after_url)
-
-        kwargs['diff'] = daisydiff(before, after)
+    def get_context_data(self, **kwargs):
+        kwargs = super(DiffView, self).get_context_data(**kwargs)
+        kwargs['diff'] = get_rendered_diff(self.get_node('before'), self.get_node('after'))
 
         return kwargs
 
@@ -285,6 +279,9 @@ def daisydiff(before, after):
     """
     Given two strings of html documents in a and b, return a string containing
     html representing the diff between a and b. Requires java and daisydiff.
+
+    DiffView doesn't use this anymore, see :mod:`widgy.diff` for the
+    structural diff between two trees.
     """
     with tempfile.NamedTemporaryFile() as f_a:
         with tempfile.NamedTemporaryFile() as f_b: